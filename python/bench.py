@@ -0,0 +1,378 @@
+"""
+This program executes local micro-benchmarks of the parsing and
+data-wrangling code in this project; no database is required.
+Usage:
+    python bench.py agtype_parser <iterations>
+    python bench.py agtype_parser 2000
+    python bench.py case_file_scanner <case-count>
+    python bench.py case_file_scanner 20000
+    python bench.py cite_parser <cite-count>
+    python bench.py cite_parser 1000000
+    python bench.py counter <key-count>
+    python bench.py counter 1000000
+Options:
+  -h --help     Show this screen.
+  --version     Show version.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import random
+import sys
+import time
+import traceback
+
+from docopt import docopt
+from dotenv import load_dotenv
+
+from src.services.config_service import ConfigService
+from src.services.logging_level_service import LoggingLevelService
+
+from src.util.agtype_parser import AgtypeParser
+from src.util.case_file_scanner import CaseFileScanner
+from src.util.cite_parser import STATES, CiteParser
+from src.util.counter import Counter
+from src.util.fs import FS
+from src.util.query_result_parser import QueryResultParser
+
+logging.basicConfig(
+    format="%(asctime)s - %(message)s", level=LoggingLevelService.get_level()
+)
+
+
+def print_options(msg):
+    print("{} {}".format(os.path.basename(__file__), msg))
+    arguments = docopt(__doc__, version=ConfigService.project_version())
+    print(arguments)
+
+
+def legacy_query_result_parse(query_result: tuple):
+    """
+    The QueryResultParser#parse logic prior to class AgtypeParser, retained
+    here as the baseline for the agtype_parser benchmark.
+    """
+    print("parse() {} {}".format(query_result, str(type(query_result))))
+    if isinstance(query_result, tuple):
+        if len(query_result) == 1:
+            elem = query_result[0]
+            print("1elem: {} {}".format(elem, str(type(elem))))
+            if isinstance(elem, str):
+                if elem.count("::") == 1:
+                    try:
+                        return json.loads(elem.strip().split("::")[0])
+                    except Exception as e:
+                        return dict
+                return elem
+            return elem
+        return list(query_result)
+    return None
+
+
+def agtype_parser(iterations: int):
+    """
+    Compare the legacy parse logic with QueryResultParser/AgtypeParser
+    over the captured Apache AGE rows in data/age/agtype_rows.txt.
+    The legacy logic print()s twice per row; its output is sent to a
+    line-buffered os.devnull, like a console or container log stream.
+    """
+    rows = [(line.rstrip("\n"),) for line in FS.read_lines("data/age/agtype_rows.txt")]
+    vertex_rows = [row for row in rows if row[0].endswith("::vertex")]
+    qrp = QueryResultParser()
+    results = dict()
+    results["row_count"] = len(rows)
+    results["vertex_row_count"] = len(vertex_rows)
+    results["iterations"] = iterations
+    results["orjson"] = sys.modules.get("orjson") is not None
+
+    for name, corpus in [("all_rows", rows), ("vertex_rows", vertex_rows)]:
+        total_rows = len(corpus) * iterations
+        with open(os.devnull, "w", buffering=1) as devnull:
+            with contextlib.redirect_stdout(devnull):
+                start_time = time.perf_counter()
+                for n in range(iterations):
+                    for row in corpus:
+                        legacy_query_result_parse(row)
+                legacy_elapsed = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        for n in range(iterations):
+            for row in corpus:
+                qrp.parse(row)
+        current_elapsed = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        for n in range(iterations):
+            for row in corpus:
+                AgtypeParser.parse_typed(row[0])
+        typed_elapsed = time.perf_counter() - start_time
+
+        corpus_results = dict()
+        corpus_results["legacy_rows_per_sec"] = int(total_rows / legacy_elapsed)
+        corpus_results["query_result_parser_rows_per_sec"] = int(
+            total_rows / current_elapsed
+        )
+        corpus_results["agtype_parser_typed_rows_per_sec"] = int(
+            total_rows / typed_elapsed
+        )
+        corpus_results["speedup"] = round(legacy_elapsed / current_elapsed, 1)
+        results[name] = corpus_results
+    print(json.dumps(results, sort_keys=False, indent=2))
+
+
+def legacy_case_scan(cases_sql_infile: str) -> dict:
+    """
+    The step1_scan_sqlfile_for_citations loop of wrangle_legal_cases.py
+    prior to class CaseFileScanner, retained here as the baseline for the
+    case_file_scanner benchmark.
+    """
+    case_id_name_dict = dict()
+    with open(cases_sql_infile, "r", encoding="ISO-8859-1") as file:
+        for line in file:
+            stripped = line.strip()
+            if len(stripped) > 10:
+                tokens = stripped.split("\t")
+                if len(tokens) == 3:
+                    try:
+                        case_doc = json.loads(tokens[1].strip())
+                        id = str(case_doc["id"])
+                        case_id_name_dict[id] = CaseFileScanner.case_metadata(case_doc)
+                    except Exception as e:
+                        pass
+    return case_id_name_dict
+
+
+def case_file_scanner(case_count: int):
+    """
+    Compare the legacy sequential scan of a synthetic cases.sql file,
+    with case documents of about 10KB, with class CaseFileScanner.
+    """
+    infile = "tmp/bench_cases.sql"
+    with open(infile, "wt", encoding="ISO-8859-1") as f:
+        f.write("COPY public.cases (id, json, embedding) FROM stdin;\n")
+        for idx in range(case_count):
+            doc = dict()
+            doc["id"] = idx
+            doc["name_abbreviation"] = "Case {} v. State".format(idx)
+            doc["file_name"] = "{:04d}".format(idx % 9999 + 1)
+            doc["citations"] = [{"cite": "{} Wash. {}".format(idx % 200, idx % 999)}]
+            doc["cites_to"] = [
+                {"cite": "{} Wn. (2d) {}".format(n, idx % 700)} for n in range(10)
+            ]
+            doc["casebody"] = {"opinions": [{"text": "lorem ipsum " * 800}]}
+            embedding = [round(n / 1536.0, 6) for n in range(64)]
+            f.write("{}\t{}\t{}\n".format(idx, json.dumps(doc), embedding))
+    results = dict()
+    results["case_count"] = case_count
+    results["file_bytes"] = os.path.getsize(infile)
+    results["cpu_count"] = os.cpu_count()
+    results["orjson"] = sys.modules.get("orjson") is not None
+
+    start_time = time.perf_counter()
+    legacy_cases = legacy_case_scan(infile)
+    legacy_elapsed = time.perf_counter() - start_time
+    results["legacy_cases_per_sec"] = int(case_count / legacy_elapsed)
+
+    for workers in sorted(set([1, os.cpu_count() or 1])):
+        start_time = time.perf_counter()
+        scan_results = CaseFileScanner(workers=workers).scan(infile)
+        elapsed = time.perf_counter() - start_time
+        assert scan_results["cases"] == legacy_cases
+        key = "scanner_{}_workers".format(workers)
+        results[key] = dict()
+        results[key]["cases_per_sec"] = int(case_count / elapsed)
+        results[key]["speedup"] = round(legacy_elapsed / elapsed, 1)
+    os.remove(infile)
+    print(json.dumps(results, sort_keys=False, indent=2))
+
+
+class LegacyCiteParser:
+    """
+    The CiteParser logic prior to its precompiled regular expression,
+    memoization, and bounded diagnostics, retained here as the baseline
+    for the cite_parser benchmark.
+    """
+
+    values_counter = Counter()
+
+    def __init__(self):
+        self.scrubbed_cite = None
+
+    def parse(self, cite: str, file_name: str = None) -> str:
+        concat_raw_values = "{}^{}".format(cite, file_name)
+        LegacyCiteParser.values_counter.increment(concat_raw_values)
+        self.scrubbed_cite = (
+            str(cite).lower().replace(".", "").replace("(", "").replace(")", "").strip()
+        )
+        url = None
+        tokens = self.scrubbed_cite.split(" ")
+        if len(tokens) == 3 or len(tokens) == 4:
+            dir = tokens[0].strip()
+            state = STATES.get(tokens[1].strip())
+            if state is not None:
+                if len(tokens) == 4:
+                    state = "{}-{}".format(state, tokens[2].strip())
+                file = tokens[-1].strip()
+                if 0 < len(file) < 4:
+                    file = file.rjust(4, "0")
+                file = "{}-01".format(file)
+                if file_name is not None:
+                    if "-" not in file_name:
+                        file_name = "{}-01".format(file_name)
+                    file = file_name
+                url = "https://static.case.law/{}/{}/cases/{}.json".format(
+                    state, dir, file
+                )
+        LegacyCiteParser.values_counter.increment(
+            "parsed | {} | {}".format(concat_raw_values, url)
+        )
+        return url
+
+
+def cite_parser(cite_count: int):
+    """
+    Compare the legacy CiteParser logic with the current CiteParser over
+    a synthetic stream of cites_to citations, where a few thousand popular
+    precedents are cited far more often than the rest.
+    """
+    random.seed(42)
+    reporters = ["Wash.", "Wn. (2d)", "Wash. App.", "Cal.", "U.S.", "P.2d", "Idaho"]
+    popular = [
+        "{} {} {}".format(random.randint(1, 200), random.choice(reporters), n)
+        for n in range(5000)
+    ]
+    cites = list()
+    for n in range(cite_count):
+        if random.random() < 0.7:
+            cites.append(popular[int(random.paretovariate(1.2)) % len(popular)])
+        else:
+            cites.append(
+                "{} {} {}".format(
+                    random.randint(1, 999),
+                    random.choice(reporters),
+                    random.randint(1, 9999),
+                )
+            )
+    results = dict()
+    results["cite_count"] = cite_count
+    results["distinct_cites"] = len(set(cites))
+
+    legacy = LegacyCiteParser()
+    start_time = time.perf_counter()
+    for cite in cites:
+        legacy.parse(cite, None)
+    legacy_elapsed = time.perf_counter() - start_time
+    results["legacy_cites_per_sec"] = int(cite_count / legacy_elapsed)
+    results["legacy_counter_keys"] = len(LegacyCiteParser.values_counter.get_data())
+
+    for diagnostics in [True, False]:
+        CiteParser.set_diagnostics(diagnostics)
+        parser = CiteParser()
+        start_time = time.perf_counter()
+        for cite in cites:
+            parser.parse(cite, None)
+        elapsed = time.perf_counter() - start_time
+        key = "cite_parser_diagnostics_{}".format("on" if diagnostics else "off")
+        results[key] = dict()
+        results[key]["cites_per_sec"] = int(cite_count / elapsed)
+        results[key]["speedup"] = round(legacy_elapsed / elapsed, 1)
+        results[key]["counter_keys"] = len(CiteParser.values_counter.get_data())
+        start_time = time.perf_counter()
+        for n in range(0, cite_count, 10000):
+            CiteParser.parse_batch(cites[n : n + 10000])
+        elapsed = time.perf_counter() - start_time
+        results[key]["parse_batch_cites_per_sec"] = int(cite_count / elapsed)
+        results[key]["parse_batch_speedup"] = round(legacy_elapsed / elapsed, 1)
+    results["cache_info"] = str(CiteParser.cache_info())
+    print(json.dumps(results, sort_keys=False, indent=2))
+
+
+class LegacyCounter:
+    """
+    The Counter#increment and #most_frequent logic prior to the single
+    dict operation increments, retained here as the baseline for the
+    counter benchmark.
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    def increment(self, key: str) -> None:
+        keys = self.data.keys()
+        if key in keys:
+            self.data[key] = self.data[key] + 1
+        else:
+            self.data[key] = 1
+
+    def most_frequent(self) -> str:
+        top_value, top_word = -1, None
+        for key in self.data.keys():
+            if self.data[key] > top_value:
+                top_value = self.data[key]
+                top_word = key
+        return top_word
+
+
+def counter(key_count: int):
+    """
+    Compare the legacy Counter logic with the current Counter, exact and
+    as a Space-Saving sketch, over a skewed stream of str keys.
+    """
+    random.seed(42)
+    keys = [str(int(random.paretovariate(0.8))) for n in range(key_count)]
+    results = dict()
+    results["key_count"] = key_count
+    results["distinct_keys"] = len(set(keys))
+
+    legacy = LegacyCounter()
+    start_time = time.perf_counter()
+    for key in keys:
+        legacy.increment(key)
+    legacy_elapsed = time.perf_counter() - start_time
+    results["legacy_increments_per_sec"] = int(key_count / legacy_elapsed)
+
+    for name, capacity in [("exact", None), ("space_saving_1000", 1000)]:
+        c = Counter(capacity)
+        start_time = time.perf_counter()
+        for key in keys:
+            c.increment(key)
+        elapsed = time.perf_counter() - start_time
+        results[name] = dict()
+        results[name]["increments_per_sec"] = int(key_count / elapsed)
+        results[name]["speedup"] = round(legacy_elapsed / elapsed, 1)
+        results[name]["tracked_keys"] = len(c.get_data())
+        results[name]["top_10_matches_exact"] = [k for k, n in c.most_common(10)] == [
+            k for k, n in sorted(legacy.data.items(), key=lambda i: -i[1])[:10]
+        ]
+    c = Counter()
+    start_time = time.perf_counter()
+    c.update(keys)
+    elapsed = time.perf_counter() - start_time
+    results["exact"]["update_per_sec"] = int(key_count / elapsed)
+    results["exact"]["update_speedup"] = round(legacy_elapsed / elapsed, 1)
+    print(json.dumps(results, sort_keys=False, indent=2))
+
+
+if __name__ == "__main__":
+    load_dotenv(override=True)
+
+    if len(sys.argv) < 2:
+        print_options("- no command-line args given")
+        exit(1)
+    else:
+        try:
+            func = sys.argv[1].lower()
+            if func == "agtype_parser":
+                agtype_parser(int(sys.argv[2]))
+            elif func == "case_file_scanner":
+                case_file_scanner(int(sys.argv[2]))
+            elif func == "cite_parser":
+                cite_parser(int(sys.argv[2]))
+            elif func == "counter":
+                counter(int(sys.argv[2]))
+            else:
+                print_options("- error - invalid function: {}".format(func))
+        except Exception as e:
+            logging.critical(str(e))
+            logging.exception(e, stack_info=True, exc_info=True)
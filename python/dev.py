@@ -12,8 +12,8 @@ Usage:
     python dev.py gen_pg_dump_script
     python dev.py gen_all
     python dev.py create_libraries_tsv
-    python dev.py create_libraries_cypher_load_statements <graphname> <count>
-    python dev.py create_libraries_cypher_load_statements libraries1 999999
+    python dev.py create_libraries_cypher_load_statements <graphname> <count> <optional-batch-size>
+    python dev.py create_libraries_cypher_load_statements libraries1 999999 500
     python dev.py zip_dumps
 Options:
   -h --help     Show this screen.
@@ -36,14 +36,28 @@ from src.services.config_service import ConfigService
 from src.services.logging_level_service import LoggingLevelService
 
 from src.util.fs import FS
+from src.util.library_docs import METADATA_ATTRIBUTES
+from src.util.cypher_batch import DEFAULT_BATCH_SIZE, CypherBatch
+from src.util.library_graph import (
+    EDGE_LABELS,
+    GRAPH_LIBRARY_FIELDS,
+    VERTEX_LABELS,
+    LibraryGraph,
+)
+from src.util.library_ingest import LibraryIngest
 from src.util.template import Template
 from src.util.sample_query import SampleQuery
 from src.util.sample_queries import SampleQueries
 
+# the document fields streamed by the LibraryIngest stage for the TSV file;
+# its description column is populated from the keywords
+TSV_LIBRARY_FIELDS = [a for a in METADATA_ATTRIBUTES if a != "description"] + [
+    "embedding"
+]
+
 logging.basicConfig(
     format="%(asctime)s - %(message)s", level=LoggingLevelService.get_level()
 )
-OMIT_LIBS = "geohash,myst-docutils,natto-py,cobs".split(",")  # problematic data
 
 
 def print_options(msg):
@@ -305,119 +319,44 @@ def filter_files_list(files_list, suffix):
     return filtered
 
 
-def create_libraries_cypher_load_statements(graphname, count):
-    """ """
+def create_libraries_cypher_load_statements(graphname, count, batch_size):
+    """
+    This method creates a file of batched Cypher statements to load the
+    libraries graph; the vertices, then the label table indexes, then the
+    edges, with up to batch_size vertices or edges per UNWIND statement.
+    See "python main.py load_library_graph", which loads the same graph
+    much faster with COPY into the label tables.
+    """
     data_dir = "../data/pypi/wrangled_libs"
     logging.info("load_libraries_table, data_dir: {}".format(data_dir))
-    files_list = FS.list_files_in_dir(data_dir)
-    filtered_files_list = filter_files_list(files_list, ".json")
-    library_docs_list, developers = list(), dict()
-    cypher_statements, edge_statements = list(), list()
-    library_count, developer_count, exception_count = 0, 0, 0
+    cypher_statements, counts = list(), dict()
     cypher_statements.append('SET search_path = ag_catalog, "$user", public;')
 
-    # Load the libraries documents into a list for subsequent iteration
-    for file_idx, lib_filename in enumerate(filtered_files_list):
-        if file_idx < count:
-            fq_filename = "{}/{}".format(data_dir, lib_filename)
-            logging.info("data_file {}: {}".format(file_idx, fq_filename))
-            doc = FS.read_json(fq_filename)
-            if is_valid_library(doc):
-                library_docs_list.append(doc)
-    logging.info("library docs list count: {}".format(len(library_docs_list)))
-
-    library_vertex_template = get_template("create_cypher_library_vertex.txt")
-    developer_vertex_template = get_template("create_cypher_developer_vertex.txt")
-    library_library_vertex_template = get_template("create_cypher_lib_lib_edge.txt")
-    generic_edge_template = get_template("create_cypher_generic_edge.txt")
-
-    # Collect the unique developers, and create their vertices
-    for doc in library_docs_list:
-        if "developers" in doc.keys():
-            for dev in doc["developers"]:
-                if dev in developers.keys():
-                    pass  # already processed
-                else:
-                    developers[dev] = 1
-                    values = dict()
-                    values["graphname"] = graphname
-                    values["name"] = dev
-                    cypher = Template.render(developer_vertex_template, values)
-                    cypher_statements.append(cypher.replace("\n", " ").strip())
-                    developer_count = developer_count + 1
-    logging.info("developer count: {}".format(len(developers)))
-
-    # Collect the library vertices and their edges
-    for doc in library_docs_list:
-        try:
-            libname = str(doc["name"]).replace("'", "").strip()
-            values = dict()
-            values["graphname"] = graphname
-            values["name"] = libname
-            values["libtype"] = str(doc["libtype"]).replace("'", "").strip()
-            values["license"] = str(doc["license"]).replace("'", "").strip()[0:40]
-            values["keywords"] = str(doc["keywords"]).replace("'", "").strip()
-            values["release_count"] = release_count(doc)
-            print(values)
-            cypher = Template.render(library_vertex_template, values)
-            cypher_statements.append(cypher.replace("\n", " ").strip())
-            library_count = library_count + 1
-
-            if "dependency_ids" in doc.keys():
-                for dep_libtype_libname in doc["dependency_ids"]:
-                    dep_libname = dep_libtype_libname[5:]
-
-                    values = dict()
-                    values["graphname"] = graphname
-                    values["lib1"] = libname
-                    values["lib2"] = dep_libname
-                    values["relname"] = "uses_lib"
-                    cypher = Template.render(library_library_vertex_template, values)
-                    edge_statements.append(cypher.replace("\n", " ").strip())
-
-                    values = dict()
-                    values["graphname"] = graphname
-                    values["lib1"] = dep_libname
-                    values["lib2"] = libname
-                    values["relname"] = "used_by_lib"
-                    cypher = Template.render(library_library_vertex_template, values)
-                    edge_statements.append(cypher.replace("\n", " ").strip())
-
-            if "developers" in doc.keys():
-                for dev in doc["developers"]:
-                    values = dict()
-                    values["graphname"] = graphname
-                    values["type1"] = "Developer"
-                    values["type2"] = "Library"
-                    values["attr1"] = "name"
-                    values["val1"] = libname
-                    values["attr2"] = "name"
-                    values["val2"] = dev
-                    values["relname"] = "developer_of"
-                    cypher = Template.render(generic_edge_template, values)
-                    edge_statements.append(cypher.replace("\n", " ").strip())
-
-                    values = dict()
-                    values["graphname"] = graphname
-                    values["type1"] = "Library"
-                    values["type2"] = "Developer"
-                    values["attr1"] = "name"
-                    values["val1"] = libname
-                    values["attr2"] = "name"
-                    values["val2"] = dev
-                    values["relname"] = "developed_by"
-                    cypher = Template.render(generic_edge_template, values)
-                    edge_statements.append(cypher.replace("\n", " ").strip())
-
-        except Exception as e:
-            exception_count = exception_count + 1
-            logging.error("error processing library name: {}".format(doc["name"]))
-            logging.critical(str(e))
-            logging.exception(e, stack_info=True, exc_info=True)
-
-    # The output file thus has all of the vertices first, followed by the edges.
-    for cypher in edge_statements:
-        cypher_statements.append(cypher.strip())
+    # Stream the libraries documents, with only the fields used here, from
+    # the shared process pool ingestion stage in a single pass.
+    graph = LibraryGraph()
+    for doc in LibraryIngest().iter_docs(data_dir, GRAPH_LIBRARY_FIELDS, count):
+        graph.add_doc(doc)
+
+    for label in VERTEX_LABELS:
+        counts[label] = graph.vertex_count(label)
+        for batch in CypherBatch.batches(graph.vertices[label], batch_size):
+            cypher_statements.append(
+                CypherBatch.vertex_literal_sql(graphname, label, batch)
+            )
+
+    # The label indexes are created before the edges, so that the
+    # edge MATCH clauses are index lookups rather than label scans.
+    for label in VERTEX_LABELS:
+        cypher_statements.extend(CypherBatch.index_statements(graphname, label))
+
+    for relname in EDGE_LABELS.keys():
+        counts[relname] = 0
+        for batch in CypherBatch.batches(graph.edge_name_pairs(relname), batch_size):
+            counts[relname] = counts[relname] + len(batch)
+            cypher_statements.append(
+                CypherBatch.edge_literal_sql(graphname, relname, batch)
+            )
 
     try:
         # The output file is large, too large for GitHub, so we write it
@@ -434,10 +373,8 @@ def create_libraries_cypher_load_statements(graphname, count):
         logging.exception(e, stack_info=True, exc_info=True)
 
     logging.info("Totals:")
-    logging.info("  library_count:     {}".format(library_count))
-    logging.info("  developer_count:   {}".format(len(developers)))
-    logging.info("  edge_count:        {}".format(len(edge_statements)))
-    logging.info("  exception_count:   {}".format(exception_count))
+    for name, value in counts.items():
+        logging.info("  {}: {}".format(name, value))
     logging.info("  cypher_statements: {}".format(len(cypher_statements)))
 
 
@@ -450,59 +387,56 @@ def create_libraries_tsv():
     This method creates a TSV file that can be loaded into the
     Azure PostgreSQL libraries table, from a psql terminal on your
     Win 11 laptop, with the following command:
+    See "python main.py load_libraries", which loads the same documents
+    directly into the table with COPY FROM STDIN (FORMAT BINARY).
     """
     data_dir = "../data/pypi/wrangled_libs"
     tsv_filename = "../data/pypi/libraries.tsv"
     zip_filename = "../data/pypi/libraries.tsv.lfs.zip"
 
     logging.info("load_libraries_table, data_dir: {}".format(data_dir))
-    files_list = FS.list_files_in_dir(data_dir)
-    filtered_files_list = filter_files_list(files_list, ".json")
-    tsv_lines, seq = list(), 0
-    for file_idx, filename in enumerate(filtered_files_list):
-        try:
-            if file_idx < 50000:
-                fq_filename = "{}/{}".format(data_dir, filename)
-                logging.info("processing file {} {}".format(file_idx, fq_filename))
-                doc = FS.read_json(fq_filename)
-                if is_valid_library(doc):
-                    seq = seq + 1
-                    # prune the potentially long str values for this sample data
-                    doc["name"] = truncate_scrub_str(doc["name"], 30)
-                    doc["description"] = truncate_scrub_str(doc["keywords"], 1000)
-                    doc["keywords"] = truncate_scrub_str(doc["keywords"], 250)
-                    doc["license"] = truncate_scrub_str(doc["license"], 250)
-                    doc["package_url"] = truncate_scrub_str(doc["package_url"], 99)
-                    doc["project_url"] = truncate_scrub_str(doc["project_url"], 99)
-
-                    metadata = dict()  # this is the jsonb value, a subset of the doc
-                    for (
-                        attr
-                    ) in "name,description,keywords,license,release_count,package_url,project_url".split(
-                        ","
-                    ):
-                        metadata[attr] = doc[attr]
-
-                    template = '{}\t{}\t{}\t{}\t{}\t{}\t{}\t{},\t{}\t"{}"'
-                    line = template.format(
-                        seq,
-                        doc["name"],
-                        doc["description"],
-                        doc["keywords"],
-                        doc["license"],
-                        int(doc["release_count"]),
-                        doc["package_url"],
-                        doc["project_url"],
-                        doc["embedding"],
-                        json.dumps(metadata).replace('"', '""'),
-                    )
-                    tsv_lines.append(convert_to_utf8(line))
-        except Exception as e:
-            logging.error("Error processing file: {}".format(fq_filename))
-            logging.info(str(e))
-
-    FS.write_lines(tsv_lines, tsv_filename)
-    print("{} lines".format(len(tsv_lines)))
+    # each line is written as it is created, rather than collected in memory
+    line_count, seq = 0, 0
+    with open(file=tsv_filename, encoding="utf-8", mode="w") as tsv_file:
+        for doc in LibraryIngest().iter_docs(data_dir, TSV_LIBRARY_FIELDS, 50000):
+            try:
+                seq = seq + 1
+                # prune the potentially long str values for this sample data;
+                # as in the published TSV, the description is the keywords
+                doc["name"] = truncate_scrub_str(doc["name"], 30)
+                doc["description"] = truncate_scrub_str(doc["keywords"], 1000)
+                doc["keywords"] = truncate_scrub_str(doc["keywords"], 250)
+                doc["license"] = truncate_scrub_str(doc["license"], 250)
+                doc["package_url"] = truncate_scrub_str(doc["package_url"], 99)
+                doc["project_url"] = truncate_scrub_str(doc["project_url"], 99)
+
+                metadata = dict()  # this is the jsonb value, a subset of the doc
+                for attr in METADATA_ATTRIBUTES:
+                    metadata[attr] = doc[attr]
+
+                template = '{}\t{}\t{}\t{}\t{}\t{}\t{}\t{},\t{}\t"{}"'
+                line = template.format(
+                    seq,
+                    doc["name"],
+                    doc["description"],
+                    doc["keywords"],
+                    doc["license"],
+                    int(doc["release_count"]),
+                    doc["package_url"],
+                    doc["project_url"],
+                    doc["embedding"],
+                    json.dumps(metadata).replace('"', '""'),
+                )
+                if line_count > 0:
+                    tsv_file.write("\n")
+                tsv_file.write(convert_to_utf8(line))
+                line_count = line_count + 1
+            except Exception as e:
+                logging.error("Error processing library: {}".format(doc["name"]))
+                logging.info(str(e))
+
+    logging.warning("file written: {}".format(tsv_filename))
+    print("{} lines".format(line_count))
 
     with zipfile.ZipFile(zip_filename, "w", zipfile.ZIP_DEFLATED) as z:
         z.write(tsv_filename)
@@ -522,12 +456,6 @@ def truncate_scrub_str(s, max_len):
         return s2
 
 
-def is_valid_library(a):
-    if a["name"].strip().lower() in OMIT_LIBS:
-        return False
-    return True
-
-
 def release_count(doc):
     try:
         return int(doc["release_count"].strip())
@@ -594,7 +522,10 @@ if __name__ == "__main__":
             elif func == "create_libraries_cypher_load_statements":
                 graphname = sys.argv[2]
                 count = int(sys.argv[3])
-                create_libraries_cypher_load_statements(graphname, count)
+                batch_size = DEFAULT_BATCH_SIZE
+                if len(sys.argv) > 4:
+                    batch_size = int(sys.argv[4])
+                create_libraries_cypher_load_statements(graphname, count, batch_size)
             elif func == "zip_dumps":
                 zip_dumps()
             elif func == "ad_hoc":
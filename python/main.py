@@ -3,10 +3,27 @@ Usage:
     python main.py log_defined_env_vars
     python main.py list_pg_extensions_and_settings
     python main.py delete_define_libraries_table
+    python main.py load_libraries <data-dir> <optional-max-files> <optional-concurrency>
+    python main.py load_libraries ../data/pypi/wrangled_libs 50000 8
+    python main.py load_library_graph <graphname> <data-dir> <optional-max-files> <optional-workers>
+    python main.py load_library_graph libraries1 ../data/pypi/wrangled_libs 50000 4
+    python main.py load_library_graph_cypher <graphname> <data-dir> <optional-max-files> <optional-batch-size>
+    python main.py load_library_graph_cypher libraries1 ../data/pypi/wrangled_libs 50000 500
+    python main.py execute_sql_file <sql-or-zip-file> <optional-connections> <optional-commit-size> <optional-resume|restart>
+    python main.py execute_sql_file ../data/cypher/us_openflights.zip 4 500 resume
     python main.py create_libraries_table_vector_index
+    python main.py create_libraries_table_fts_index
+    python main.py manage_vector_index <ivfflat|hnsw> <l2|ip|cosine> <parallel-workers>
+    python main.py manage_vector_index hnsw l2 2
     python main.py vector_search_similar_libraries flask 10
     python main.py vector_search_words word1 word2 word3 etc
     python main.py vector_search_words running calculator miles kilometers pace speed mph
+    python main.py benchmark_statement_execution <iterations> <optional-sql>
+    python main.py benchmark_statement_execution 100 "SELECT count(*) FROM libraries;"
+    python main.py benchmark_vector_transfer <iterations> <optional-count>
+    python main.py benchmark_vector_transfer 100 10
+    python main.py benchmark_vector_search <sample-size> <k> <concurrency>
+    python main.py benchmark_vector_search 100 10 4
 Options:
   -h --help     Show this screen.
   --version     Show version.
@@ -17,6 +34,7 @@ import json
 import logging
 import os
 import sys
+import time
 import traceback
 
 import psycopg_pool
@@ -26,9 +44,18 @@ from dotenv import load_dotenv
 
 from src.services.ai_service import AiService
 from src.services.config_service import ConfigService
+from src.services.cypher_loader import CypherLoader
+from src.services.db_service import DbService
+from src.services.graph_loader import GraphLoader
+from src.services.library_loader import DEFAULT_MAX_FILES, LibraryLoader
 from src.services.logging_level_service import LoggingLevelService
+from src.services.sql_file_executor import SqlFileExecutor
 
+from src.util.cypher_batch import DEFAULT_BATCH_SIZE
 from src.util.fs import FS
+from src.util.latency_stats import LatencyStats
+from src.util.vector_adapter import Vector, VectorAdapter
+from src.util.vector_index import VectorIndex
 
 logging.basicConfig(
     format="%(asctime)s - %(message)s", level=LoggingLevelService.get_level()
@@ -59,32 +86,17 @@ def get_pg_connection_str():
     Create and return the connection string for your Azure
     PostgreSQL database per the AIG4PG_xxx environment variables.
     """
-    db = ConfigService.postgresql_database()
-    user = ConfigService.postgresql_user()
-    password = ConfigService.postgresql_password()
-    host = ConfigService.postgresql_server()
-    port = ConfigService.postgresql_port()
-    return "host={} port={} dbname={} user={} password={} ".format(
-        host, port, db, user, password
-    )
+    return DbService.connection_string()
 
 
 async def initialze_pool() -> psycopg_pool.AsyncConnectionPool:
     """
-    Create and open a psycopg_pool.AsyncConnectionPool
+    Create and open the shared DbService psycopg_pool.AsyncConnectionPool
     which is used throughout this module.
     """
     logging.info("initialze_pool...")
-    conn_str = get_pg_connection_str()
-    conn_str_tokens = conn_str.split("password")
-    logging.info(
-        "initialze_pool, conn_str: {} password=<omitted>".format(conn_str_tokens[0])
-    )
-    pool = psycopg_pool.AsyncConnectionPool(conninfo=conn_str, open=False)
-    logging.info("initialze_pool, pool created: {}".format(pool))
-    await pool.open()
-    await pool.check()
-    logging.info("initialze_pool, pool opened")
+    pool = await DbService.initialize()
+    logging.info("initialze_pool, pool opened: {}".format(pool))
     return pool
 
 
@@ -94,19 +106,20 @@ async def close_pool(pool):
     """
     if pool is not None:
         logging.info("close_pool, closing...")
-        await pool.close()
+        await DbService.close()
         logging.info("close_pool, closed")
 
 
-async def execute_query(pool, sql) -> list:
+async def execute_query(pool, sql, params=None, prepare=None) -> list:
     """
-    Execute the given SQL query and return the results
-    as a list of tuples.
+    Execute the given SQL query, with the optional parameters, and return
+    the results as a list of tuples.  Set prepare to True to use a
+    server-side prepared statement.
     """
     results_list = list()
     async with pool.connection() as conn:
         async with conn.cursor() as cursor:
-            await cursor.execute(sql)
+            await cursor.execute(sql, params, prepare=prepare)
             results = await cursor.fetchall()
             for row in results:
                 results_list.append(row)
@@ -157,6 +170,54 @@ async def delete_define_table(
             logging.info(row)
 
 
+async def load_libraries(data_dir: str, max_files: int, concurrency: int):
+    """
+    Bulk load the wrangled library JSON documents into the libraries table
+    with COPY FROM STDIN (FORMAT BINARY), and write the load statistics.
+    """
+    loader = LibraryLoader(concurrency=concurrency)
+    stats = await loader.load(data_dir, max_files)
+    logging.info("load_libraries, stats: {}".format(json.dumps(stats)))
+    FS.write_json(stats, "tmp/load_libraries.json")
+
+
+async def load_library_graph(
+    graphname: str, data_dir: str, max_files: int, workers: int | None
+):
+    """
+    Bulk load the libraries graph into Apache AGE with COPY into the
+    vertex and edge label tables, and write the load statistics.
+    """
+    loader = GraphLoader(graphname, workers)
+    stats = await loader.load(data_dir, max_files)
+    FS.write_json(stats, "tmp/load_library_graph_{}.json".format(graphname))
+
+
+async def load_library_graph_cypher(
+    graphname: str, data_dir: str, max_files: int, batch_size: int
+):
+    """
+    Load the libraries graph into Apache AGE with batched, pipelined
+    UNWIND Cypher statements, and write the per-label statistics.
+    """
+    loader = CypherLoader(graphname, batch_size=batch_size)
+    stats = await loader.load(data_dir, max_files)
+    FS.write_json(stats, "tmp/load_library_graph_cypher_{}.json".format(graphname))
+
+
+async def execute_sql_file(path: str, connections: int, commit_size: int, resume: bool):
+    """
+    Execute the statements of the given plain or zipped .sql file, such as
+    a generated Cypher load file, with pipelined transactions on several
+    pooled connections.  The load is resumable from its checkpoint file.
+    """
+    executor = SqlFileExecutor(
+        connections, commit_size, SqlFileExecutor.default_checkpoint_file(path)
+    )
+    stats = await executor.execute(path, resume)
+    FS.write_json(stats, "tmp/execute_sql_file_{}.json".format(os.path.basename(path)))
+
+
 def filter_files_list(files_list, suffix):
     filtered = list()
     for f in files_list:
@@ -269,43 +330,163 @@ async def create_libraries_table_vector_index(pool: psycopg_pool.AsyncConnection
             logging.info(row)
 
 
+async def create_libraries_table_fts_index(pool: psycopg_pool.AsyncConnectionPool):
+    """
+    Add the generated search_tsv full-text column and its GIN index,
+    used by the hybrid search API, to an existing libraries table.
+    """
+    ddl = FS.read("sql/libraries_fts.sql")
+    logging.info(ddl)
+    async with pool.connection() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(ddl)
+    rows = await execute_query(
+        pool, "select * FROM pg_indexes WHERE tablename = 'libraries';"
+    )
+    for row in rows:
+        logging.info(row)
+
+
+async def manage_vector_index(
+    pool: psycopg_pool.AsyncConnectionPool,
+    method: str,
+    metric: str,
+    parallel_workers: int,
+):
+    """
+    Drop the vector indexes on libraries.embedding, of any method and metric,
+    and build the IVFFlat or HNSW index with the operator class for the given
+    distance metric (l2, ip or cosine), and with build parameters derived
+    from the row count; a stale index would otherwise be used instead.  Report the build time,
+    the index size, and whether an EXPLAIN of a vector search uses the index.
+    """
+    VectorIndex.validate(method, metric)
+    table, column = "libraries", "embedding"
+    rows = await execute_query(
+        pool,
+        "select count(*), max(vector_dims(embedding)) from libraries where embedding is not null",
+    )
+    row_count, dimensions = rows[0][0], rows[0][1] or 1536
+    index_name = VectorIndex.index_name(table, column, method, metric)
+    ddl = VectorIndex.create_index_sql(table, column, method, metric, row_count)
+    build_settings = VectorIndex.build_settings(row_count, dimensions, parallel_workers)
+    search_settings = VectorIndex.search_settings(method, row_count)
+    logging.info("manage_vector_index, ddl: {}".format(ddl))
+
+    results = dict()
+    results["index_name"] = index_name
+    results["row_count"] = row_count
+    results["dimensions"] = dimensions
+    results["ddl"] = ddl
+    results["build_settings"] = build_settings
+    results["search_settings"] = search_settings
+
+    # the settings are local to the transaction, so the session settings
+    # of the pooled connection are restored when it ends
+    async with pool.connection() as conn:
+        async with conn.transaction():
+            async with conn.cursor() as cursor:
+                for name, value in build_settings.items():
+                    await cursor.execute(
+                        "SELECT set_config(%s, %s, true);", (name, value)
+                    )
+                await cursor.execute(
+                    "select indexname, indexdef from pg_indexes where tablename = %s",
+                    (table,),
+                )
+                results["dropped_indexes"] = list()
+                for row in await cursor.fetchall():
+                    if VectorIndex.is_vector_index_on(row[1], column):
+                        await cursor.execute("DROP INDEX IF EXISTS {};".format(row[0]))
+                        results["dropped_indexes"].append(row[0])
+                start_time = time.perf_counter()
+                await cursor.execute(ddl)
+                results["build_seconds"] = round(time.perf_counter() - start_time, 3)
+                await cursor.execute("ANALYZE {};".format(table))
+                await cursor.execute(
+                    "select pg_relation_size(%s::regclass), pg_size_pretty(pg_relation_size(%s::regclass))",
+                    (index_name, index_name),
+                )
+                row = await cursor.fetchone()
+                results["index_bytes"], results["index_size"] = row[0], row[1]
+
+                for name, value in search_settings.items():
+                    await cursor.execute(
+                        "SELECT set_config(%s, %s, true);", (name, value)
+                    )
+                explain_sql = """
+EXPLAIN select id, name from libraries
+order by embedding {} (select embedding from libraries where embedding is not null limit 1)
+limit 10""".format(
+                    VectorIndex.operator(metric)
+                )
+                await cursor.execute(explain_sql)
+                plan_lines = [row[0] for row in await cursor.fetchall()]
+                results["explain"] = plan_lines
+                results["index_used"] = VectorIndex.explain_uses_index(
+                    plan_lines, index_name
+                )
+
+    if not results["index_used"]:
+        logging.warning(
+            "manage_vector_index; the EXPLAIN plan doesn't use {}".format(index_name)
+        )
+    logging.info(json.dumps(results, sort_keys=False, indent=2))
+    FS.write_json(results, "tmp/vector_index_{}_{}.json".format(method, metric))
+
+
 async def vector_search_similar_libraries(
     pool: psycopg_pool.AsyncConnectionPool, libname: str, count: int
 ):
     """
-    First execute a traditional SELECT to find the given library.
-    Then use its embedding to find the other similar libraries via a vector search query.
+    Find the libraries similar to the given library with a single vector
+    search statement, in which a scalar subquery reads the embedding of the
+    given library.  The embedding is thus never sent to or from this program.
     """
     logging.info(
         "vector_search_similar_libraries, library_name: {}, count: {}".format(
             libname, count
         )
     )
-    sql = "select id, name, embedding from libraries where name = '{}' limit 1;".format(
-        libname
-    )
+    sql, params = similar_libraries_sql(libname, count)
     logging.info(sql)
-
-    results = await execute_query(pool, sql)
+    results = await execute_query(pool, sql, params, prepare=True)
     if (results is not None) and (len(results) > 0):
-        embedding = results[0][2]
-        sql = vector_query_sql(embedding, count)
-        results = await execute_query(pool, sql)
         for row in results:
             logging.info(row)
     else:
         logging.info("No results found for library: {}".format(libname))
 
 
+def similar_libraries_sql(libname, count):
+    """
+    Return the parameterized similar-libraries SQL statement and its
+    parameters.  The given library itself is excluded from the results,
+    and no rows are returned if it doesn't exist.
+    """
+    sql = """
+select id, name, keywords
+from  libraries
+where name <> %(name)s
+  and exists (select 1 from libraries where name = %(name)s)
+order by embedding <-> (select embedding from libraries where name = %(name)s limit 1)
+limit %(count)s;
+    """.strip()
+    return sql, {"name": libname, "count": count}
+
+
 def vector_query_sql(embedding, count):
-    return """
+    """
+    Return the parameterized vector search SQL statement and its parameters;
+    the embedding is sent in the pgvector binary format.
+    """
+    sql = """
 select id, name, keywords
 from  libraries
-order by embedding <-> '{}'
-limit {};
-    """.format(
-        embedding, count
-    ).strip()
+order by embedding <-> %b
+limit %s;
+    """.strip()
+    return sql, (Vector(embedding), count)
 
 
 async def vector_search_words(pool: psycopg_pool.AsyncConnectionPool):
@@ -320,14 +501,267 @@ async def vector_search_words(pool: psycopg_pool.AsyncConnectionPool):
         resp = ai_svc.generate_embeddings(" ".join(words))
         embedding = resp.data[0].embedding
         if (embedding is not None) and (len(embedding) == 1536):
-            sql = vector_query_sql(embedding, 12)
-            results = await execute_query(pool, sql)
+            sql, params = vector_query_sql(embedding, 12)
+            results = await execute_query(pool, sql, params, prepare=True)
             for row in results:
                 logging.info(row)
     except Exception as e:
         logging.critical(str(e))
 
 
+async def benchmark_statement_execution(
+    pool: psycopg_pool.AsyncConnectionPool, iterations: int, stmt: str
+):
+    """
+    Compare the latency of the former query console execution path
+    (SET search_path, then execute the statement twice as a "warmup")
+    with the current path, which executes the statement once on a pooled
+    connection already configured by DbService#configure_connection.
+    """
+    logging.info(
+        "benchmark_statement_execution, iterations: {}, stmt: {}".format(
+            iterations, stmt
+        )
+    )
+    legacy_ms, current_ms = list(), list()
+    for n in range(iterations):
+        async with DbService.connection() as conn:
+            async with conn.cursor() as cursor:
+                start_time = time.perf_counter()
+                await cursor.execute('SET search_path = "$user", ag_catalog, public;')
+                try:
+                    await cursor.execute(stmt)
+                except Exception as e:
+                    pass
+                await cursor.execute(stmt)
+                await cursor.fetchall()
+                legacy_ms.append((time.perf_counter() - start_time) * 1000.0)
+
+                start_time = time.perf_counter()
+                await cursor.execute(stmt)
+                await cursor.fetchall()
+                current_ms.append((time.perf_counter() - start_time) * 1000.0)
+
+    results = dict()
+    results["stmt"] = stmt
+    results["iterations"] = iterations
+    results["legacy_execute_twice"] = LatencyStats.summary(legacy_ms)
+    results["execute_once"] = LatencyStats.summary(current_ms)
+    if results["execute_once"]["mean"] > 0:
+        results["speedup"] = round(
+            results["legacy_execute_twice"]["mean"] / results["execute_once"]["mean"],
+            2,
+        )
+    results["pool_stats"] = DbService.get_stats()
+    logging.info(json.dumps(results, sort_keys=False, indent=2))
+    FS.write_json(results, "tmp/benchmark_statement_execution.json")
+
+
+async def benchmark_vector_transfer(
+    pool: psycopg_pool.AsyncConnectionPool, iterations: int, count: int
+):
+    """
+    Compare three ways of sending a 1536-dimension embedding in a vector
+    search query; formatted into the SQL text (the former approach), as a
+    text parameter, and as a binary parameter of a prepared statement.
+    The embedding of the first row of the libraries table is used.
+    """
+    logging.info(
+        "benchmark_vector_transfer, iterations: {}, count: {}".format(
+            iterations, count
+        )
+    )
+    rows = await execute_query(
+        pool, "select embedding from libraries where embedding is not null limit 1"
+    )
+    if len(rows) == 0:
+        logging.error("benchmark_vector_transfer; no embeddings in libraries table")
+        return
+    embedding = rows[0][0]
+    if isinstance(embedding, str):
+        embedding = VectorAdapter.from_text(embedding)
+    vector = Vector(embedding)
+    param_sql = "select id from libraries order by embedding <-> {} limit %s"
+
+    async def formatted_sql(cursor):
+        await cursor.execute(
+            "select id from libraries order by embedding <-> '{}' limit {}".format(
+                embedding, count
+            )
+        )
+
+    async def text_param(cursor):
+        await cursor.execute(param_sql.format("%t"), (vector, count))
+
+    async def binary_param_prepared(cursor):
+        await cursor.execute(param_sql.format("%b"), (vector, count), prepare=True)
+
+    methods = dict()
+    methods["formatted_sql"] = formatted_sql
+    methods["text_param"] = text_param
+    methods["binary_param_prepared"] = binary_param_prepared
+    latencies = dict()
+    for name in methods.keys():
+        latencies[name] = list()
+
+    async with pool.connection() as conn:
+        async with conn.cursor() as cursor:
+            for n in range(iterations):
+                for name, method in methods.items():
+                    start_time = time.perf_counter()
+                    await method(cursor)
+                    await cursor.fetchall()
+                    latencies[name].append((time.perf_counter() - start_time) * 1000.0)
+
+    results = dict()
+    results["iterations"] = iterations
+    results["dimensions"] = len(embedding)
+    results["bytes"] = dict()
+    results["bytes"]["formatted_sql"] = len(str(embedding))
+    results["bytes"]["text_param"] = len(VectorAdapter.to_text(embedding))
+    results["bytes"]["binary_param_prepared"] = len(VectorAdapter.to_binary(embedding))
+    for name in methods.keys():
+        results[name] = LatencyStats.summary(latencies[name])
+    if results["binary_param_prepared"]["mean"] > 0:
+        results["speedup"] = round(
+            results["formatted_sql"]["mean"] / results["binary_param_prepared"]["mean"],
+            2,
+        )
+    logging.info(json.dumps(results, sort_keys=False, indent=2))
+    FS.write_json(results, "tmp/benchmark_vector_transfer.json")
+
+
+async def benchmark_vector_search(
+    pool: psycopg_pool.AsyncConnectionPool, sample_size: int, k: int, concurrency: int
+):
+    """
+    Measure the recall@k and the latency of the vector index on the libraries
+    table over a sweep of ivfflat.probes or hnsw.ef_search values.  The query
+    vectors are the embeddings of a random sample of libraries, and the exact
+    ground truth is computed with index scans disabled.  Each sweep value is
+    executed by the given number of concurrent connections.
+    """
+    logging.info(
+        "benchmark_vector_search, sample_size: {}, k: {}, concurrency: {}".format(
+            sample_size, k, concurrency
+        )
+    )
+    method, index_name, lists = None, None, None
+    rows = await execute_query(
+        pool, "select indexname, indexdef from pg_indexes where tablename = 'libraries'"
+    )
+    for row in rows:
+        if method is None and VectorIndex.method_of_indexdef(row[1]) is not None:
+            index_name, method = row[0], VectorIndex.method_of_indexdef(row[1])
+            lists = VectorIndex.lists_of_indexdef(row[1])
+    if method is None:
+        logging.error(
+            "benchmark_vector_search; no vector index, see manage_vector_index"
+        )
+        return
+    rows = await execute_query(
+        pool, "select count(*) from libraries where embedding is not null"
+    )
+    row_count = rows[0][0]
+    sample = await execute_query(
+        pool,
+        "select embedding from libraries where embedding is not null order by random() limit %s",
+        (sample_size,),
+    )
+    vectors = [Vector(row[0]) for row in sample]
+    search_sql = "select id from libraries order by embedding <-> %b limit %s"
+
+    # the exact k nearest neighbors of each query vector, via sequential scans;
+    # not prepared, so the sweep never reuses a cached sequential scan plan
+    truth = list()
+    async with pool.connection() as conn:
+        async with conn.transaction():
+            async with conn.cursor() as cursor:
+                for name in ["enable_indexscan", "enable_bitmapscan"]:
+                    await cursor.execute("SELECT set_config(%s, 'off', true);", (name,))
+                for vector in vectors:
+                    await cursor.execute(search_sql, (vector, k), prepare=False)
+                    truth.append([row[0] for row in await cursor.fetchall()])
+
+    async def search_worker(
+        param, value, worker_vectors, worker_truth, latencies, recalls
+    ):
+        async with pool.connection() as conn:
+            async with conn.transaction():
+                async with conn.cursor() as cursor:
+                    await cursor.execute(
+                        "SELECT set_config(%s, %s, true);", (param, str(value))
+                    )
+                    for vector, truth_ids in zip(worker_vectors, worker_truth):
+                        start_time = time.perf_counter()
+                        await cursor.execute(search_sql, (vector, k), prepare=True)
+                        result_ids = [row[0] for row in await cursor.fetchall()]
+                        latencies.append((time.perf_counter() - start_time) * 1000.0)
+                        recalls.append(
+                            VectorIndex.recall_at_k(truth_ids, result_ids, k)
+                        )
+
+    param = VectorIndex.search_param(method)
+    concurrency = max(concurrency, 1)
+    sweep = list()
+    for value in VectorIndex.sweep_values(method, lists, k):
+        latencies, recalls = list(), list()
+        start_time = time.perf_counter()
+        await asyncio.gather(
+            *[
+                search_worker(
+                    param,
+                    value,
+                    vectors[n::concurrency],
+                    truth[n::concurrency],
+                    latencies,
+                    recalls,
+                )
+                for n in range(concurrency)
+            ]
+        )
+        elapsed = time.perf_counter() - start_time
+        result = dict()
+        result[param] = value
+        result["recall"] = round(sum(recalls) / max(len(recalls), 1), 4)
+        result["qps"] = round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0
+        result["latency_ms"] = LatencyStats.summary(latencies)
+        sweep.append(result)
+
+    results = dict()
+    results["project_version"] = ConfigService.project_version()
+    results["date"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    results["index_name"] = index_name
+    results["method"] = method
+    results["row_count"] = row_count
+    results["sample_size"] = len(vectors)
+    results["k"] = k
+    results["concurrency"] = concurrency
+    results["sweep"] = sweep
+
+    lines = list()
+    lines.append(
+        "{:>16} {:>8} {:>9} {:>9} {:>9} {:>9}".format(
+            param, "recall", "p50_ms", "p95_ms", "p99_ms", "qps"
+        )
+    )
+    for result in sweep:
+        lines.append(
+            "{:>16} {:>8.4f} {:>9.3f} {:>9.3f} {:>9.3f} {:>9.1f}".format(
+                result[param],
+                result["recall"],
+                result["latency_ms"]["p50"],
+                result["latency_ms"]["p95"],
+                result["latency_ms"]["p99"],
+                result["qps"],
+            )
+        )
+    for line in lines:
+        logging.info(line)
+    FS.write_json(results, "tmp/benchmark_vector_search.json")
+    FS.write_lines(lines, "tmp/benchmark_vector_search.txt")
+
+
 async def example_async_method(pool: psycopg_pool.AsyncConnectionPool):
     """This method is intended a sample for creating new async methods."""
     await asyncio.sleep(0.1)
@@ -342,6 +776,7 @@ async def async_main():
     rather than synchronous programming as it is more performant
     and production-oriented.
     """
+    pool = None
     try:
         pool = await initialze_pool()
         if len(sys.argv) < 2:
@@ -355,8 +790,62 @@ async def async_main():
                 await list_pg_extensions_and_settings(pool)
             elif func == "delete_define_libraries_table":
                 await delete_define_table(pool, "sql/libraries_ddl.sql", "libraries")
+            elif func == "load_libraries":
+                data_dir = "../data/pypi/wrangled_libs"
+                max_files, concurrency = DEFAULT_MAX_FILES, 8
+                if len(sys.argv) > 2:
+                    data_dir = sys.argv[2]
+                if len(sys.argv) > 3:
+                    max_files = int(sys.argv[3])
+                if len(sys.argv) > 4:
+                    concurrency = int(sys.argv[4])
+                await load_libraries(data_dir, max_files, concurrency)
+            elif func == "load_library_graph":
+                graphname = sys.argv[2]
+                data_dir = "../data/pypi/wrangled_libs"
+                max_files, workers = DEFAULT_MAX_FILES, None
+                if len(sys.argv) > 3:
+                    data_dir = sys.argv[3]
+                if len(sys.argv) > 4:
+                    max_files = int(sys.argv[4])
+                if len(sys.argv) > 5:
+                    workers = int(sys.argv[5])
+                await load_library_graph(graphname, data_dir, max_files, workers)
+            elif func == "load_library_graph_cypher":
+                graphname = sys.argv[2]
+                data_dir = "../data/pypi/wrangled_libs"
+                max_files, batch_size = DEFAULT_MAX_FILES, DEFAULT_BATCH_SIZE
+                if len(sys.argv) > 3:
+                    data_dir = sys.argv[3]
+                if len(sys.argv) > 4:
+                    max_files = int(sys.argv[4])
+                if len(sys.argv) > 5:
+                    batch_size = int(sys.argv[5])
+                await load_library_graph_cypher(
+                    graphname, data_dir, max_files, batch_size
+                )
+            elif func == "execute_sql_file":
+                path, connections, commit_size, resume = sys.argv[2], 4, 500, True
+                if len(sys.argv) > 3:
+                    connections = int(sys.argv[3])
+                if len(sys.argv) > 4:
+                    commit_size = int(sys.argv[4])
+                if len(sys.argv) > 5:
+                    resume = sys.argv[5].lower() != "restart"
+                await execute_sql_file(path, connections, commit_size, resume)
             elif func == "create_libraries_table_vector_index":
                 await create_libraries_table_vector_index(pool)
+            elif func == "create_libraries_table_fts_index":
+                await create_libraries_table_fts_index(pool)
+            elif func == "manage_vector_index":
+                method, metric, parallel_workers = "hnsw", "l2", 2
+                if len(sys.argv) > 2:
+                    method = sys.argv[2].lower()
+                if len(sys.argv) > 3:
+                    metric = sys.argv[3].lower()
+                if len(sys.argv) > 4:
+                    parallel_workers = int(sys.argv[4])
+                await manage_vector_index(pool, method, metric, parallel_workers)
             elif func == "vector_search_similar_libraries":
                 library_name = sys.argv[2].lower()
                 count = int(sys.argv[3])
@@ -364,6 +853,27 @@ async def async_main():
             elif func == "vector_search_words":
                 library_name = sys.argv[2].lower()
                 await vector_search_words(pool)
+            elif func == "benchmark_vector_transfer":
+                iterations = int(sys.argv[2])
+                count = 10
+                if len(sys.argv) > 3:
+                    count = int(sys.argv[3])
+                await benchmark_vector_transfer(pool, iterations, count)
+            elif func == "benchmark_vector_search":
+                sample_size, k, concurrency = 100, 10, 4
+                if len(sys.argv) > 2:
+                    sample_size = int(sys.argv[2])
+                if len(sys.argv) > 3:
+                    k = int(sys.argv[3])
+                if len(sys.argv) > 4:
+                    concurrency = int(sys.argv[4])
+                await benchmark_vector_search(pool, sample_size, k, concurrency)
+            elif func == "benchmark_statement_execution":
+                iterations = int(sys.argv[2])
+                stmt = "SELECT count(*) FROM ag_catalog.ag_label;"
+                if len(sys.argv) > 3:
+                    stmt = sys.argv[3]
+                await benchmark_statement_execution(pool, iterations, stmt)
             else:
                 print_options("- unknown command-line arg: {}".format(func))
     except Exception as e:
@@ -372,10 +882,7 @@ async def async_main():
         logging.error("Stack trace:\n%s", traceback.format_exc())
 
     finally:
-        if pool is not None:
-            logging.info("closing pool...")
-            await pool.close()
-            logging.info("pool closed")
+        await close_pool(pool)
 
 
 if __name__ == "__main__":
@@ -1,9 +1,24 @@
 # PowerShell script to set the necessary AIG4PG_ environment variables,
-# generated by dev.py on Fri Nov 15 05:08:29 2024
+# generated by dev.py on Sun Oct 18 09:46:39 2026
 # Edit ALL of these generated values per your actual deployments.
 
 echo "Setting AIG4PG environment variables"
 
+echo 'setting AIG4PG_EMBEDDING_CACHE_ENABLED'
+[Environment]::SetEnvironmentVariable("AIG4PG_EMBEDDING_CACHE_ENABLED", "true", "User")
+
+echo 'setting AIG4PG_EMBEDDING_CACHE_FILE'
+[Environment]::SetEnvironmentVariable("AIG4PG_EMBEDDING_CACHE_FILE", "", "User")
+
+echo 'setting AIG4PG_EMBEDDING_CACHE_LRU_SIZE'
+[Environment]::SetEnvironmentVariable("AIG4PG_EMBEDDING_CACHE_LRU_SIZE", "1024", "User")
+
+echo 'setting AIG4PG_EMBEDDING_CACHE_MAX_ENTRIES'
+[Environment]::SetEnvironmentVariable("AIG4PG_EMBEDDING_CACHE_MAX_ENTRIES", "100000", "User")
+
+echo 'setting AIG4PG_EMBEDDING_CACHE_TTL_SECONDS'
+[Environment]::SetEnvironmentVariable("AIG4PG_EMBEDDING_CACHE_TTL_SECONDS", "2592000", "User")
+
 echo 'setting AIG4PG_ENCRYPTION_SYMMETRIC_KEY'
 [Environment]::SetEnvironmentVariable("AIG4PG_ENCRYPTION_SYMMETRIC_KEY", "", "User")
 
@@ -13,12 +28,30 @@ echo 'setting AIG4PG_LOG_LEVEL'
 echo 'setting AIG4PG_OPENAI_COMPLETIONS_DEP'
 [Environment]::SetEnvironmentVariable("AIG4PG_OPENAI_COMPLETIONS_DEP", "gpt4", "User")
 
+echo 'setting AIG4PG_OPENAI_EMBEDDINGS_BATCH_MAX_TOKENS'
+[Environment]::SetEnvironmentVariable("AIG4PG_OPENAI_EMBEDDINGS_BATCH_MAX_TOKENS", "100000", "User")
+
+echo 'setting AIG4PG_OPENAI_EMBEDDINGS_BATCH_SIZE'
+[Environment]::SetEnvironmentVariable("AIG4PG_OPENAI_EMBEDDINGS_BATCH_SIZE", "256", "User")
+
+echo 'setting AIG4PG_OPENAI_EMBEDDINGS_CONCURRENCY'
+[Environment]::SetEnvironmentVariable("AIG4PG_OPENAI_EMBEDDINGS_CONCURRENCY", "4", "User")
+
 echo 'setting AIG4PG_OPENAI_EMBEDDINGS_DEP'
 [Environment]::SetEnvironmentVariable("AIG4PG_OPENAI_EMBEDDINGS_DEP", "embeddings", "User")
 
 echo 'setting AIG4PG_OPENAI_KEY'
 [Environment]::SetEnvironmentVariable("AIG4PG_OPENAI_KEY", "", "User")
 
+echo 'setting AIG4PG_OPENAI_MAX_CONNECTIONS'
+[Environment]::SetEnvironmentVariable("AIG4PG_OPENAI_MAX_CONNECTIONS", "20", "User")
+
+echo 'setting AIG4PG_OPENAI_MAX_RETRIES'
+[Environment]::SetEnvironmentVariable("AIG4PG_OPENAI_MAX_RETRIES", "5", "User")
+
+echo 'setting AIG4PG_OPENAI_TIMEOUT'
+[Environment]::SetEnvironmentVariable("AIG4PG_OPENAI_TIMEOUT", "30", "User")
+
 echo 'setting AIG4PG_OPENAI_URL'
 [Environment]::SetEnvironmentVariable("AIG4PG_OPENAI_URL", "", "User")
 
@@ -37,6 +70,36 @@ echo 'setting AIG4PG_PG_FLEX_SERVER'
 echo 'setting AIG4PG_PG_FLEX_USER'
 [Environment]::SetEnvironmentVariable("AIG4PG_PG_FLEX_USER", "", "User")
 
+echo 'setting AIG4PG_PG_LOAD_AGE'
+[Environment]::SetEnvironmentVariable("AIG4PG_PG_LOAD_AGE", "true", "User")
+
+echo 'setting AIG4PG_PG_POOL_MAX_IDLE'
+[Environment]::SetEnvironmentVariable("AIG4PG_PG_POOL_MAX_IDLE", "600", "User")
+
+echo 'setting AIG4PG_PG_POOL_MAX_LIFETIME'
+[Environment]::SetEnvironmentVariable("AIG4PG_PG_POOL_MAX_LIFETIME", "3600", "User")
+
+echo 'setting AIG4PG_PG_POOL_MAX_SIZE'
+[Environment]::SetEnvironmentVariable("AIG4PG_PG_POOL_MAX_SIZE", "10", "User")
+
+echo 'setting AIG4PG_PG_POOL_MIN_SIZE'
+[Environment]::SetEnvironmentVariable("AIG4PG_PG_POOL_MIN_SIZE", "2", "User")
+
+echo 'setting AIG4PG_PG_POOL_TIMEOUT'
+[Environment]::SetEnvironmentVariable("AIG4PG_PG_POOL_TIMEOUT", "30", "User")
+
+echo 'setting AIG4PG_PG_SESSION_GUCS'
+[Environment]::SetEnvironmentVariable("AIG4PG_PG_SESSION_GUCS", "statement_timeout=300s", "User")
+
+echo 'setting AIG4PG_QUERY_ITERSIZE'
+[Environment]::SetEnvironmentVariable("AIG4PG_QUERY_ITERSIZE", "500", "User")
+
+echo 'setting AIG4PG_QUERY_MAX_BYTES'
+[Environment]::SetEnvironmentVariable("AIG4PG_QUERY_MAX_BYTES", "16777216", "User")
+
+echo 'setting AIG4PG_QUERY_MAX_ROWS'
+[Environment]::SetEnvironmentVariable("AIG4PG_QUERY_MAX_ROWS", "10000", "User")
+
 echo 'setting AIG4PG_TRUNCATE_LLM_CONTEXT_MAX_NTOKENS'
 [Environment]::SetEnvironmentVariable("AIG4PG_TRUNCATE_LLM_CONTEXT_MAX_NTOKENS", "0", "User")
 
@@ -5,6 +5,7 @@ DROP TABLE IF EXISTS libraries CASCADE;
 CREATE TABLE libraries (
     id                   bigserial primary key,
     name                 VARCHAR(30),
+    libtype              VARCHAR(30),
     description          VARCHAR(1024),
     keywords             VARCHAR(255),
     license              VARCHAR(255),
@@ -12,5 +13,17 @@ CREATE TABLE libraries (
     package_url          VARCHAR(100),
     project_url          VARCHAR(100),
     embedding            vector(1536),
-    metadata             JSONB
-);
\ No newline at end of file
+    metadata             JSONB,
+    search_tsv           tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(keywords, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+);
+
+-- btree indexes for the metadata filters of the vector search API
+CREATE INDEX idx_libraries_name ON libraries (name);
+CREATE INDEX idx_libraries_libtype ON libraries (libtype);
+
+-- GIN index for the full-text query of the hybrid search API
+CREATE INDEX idx_libraries_search_tsv ON libraries USING gin (search_tsv);
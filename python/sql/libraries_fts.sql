@@ -0,0 +1,14 @@
+-- Add the generated search_tsv full-text column, and its GIN index, to an
+-- existing libraries table; see libraries_ddl.sql for new tables.
+-- The name, keywords and description are weighted A, B and C for ts_rank.
+
+ALTER TABLE libraries ADD COLUMN IF NOT EXISTS search_tsv tsvector
+GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(keywords, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'C')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_libraries_search_tsv
+ON     libraries
+USING  gin (search_tsv);
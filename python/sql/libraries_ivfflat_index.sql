@@ -1,13 +1,16 @@
 -- Delete/Define the idx_libraries_ivfflat_embedding index.
 -- See https://learn.microsoft.com/en-us/azure/postgresql/flexible-server/how-to-optimize-performance-pgvector#indexing
--- Set ivfflat.probes to 1/10th the value of lists
 -- Set lists to ~ rows / 1000
+-- The operator class must match the distance operator of the queries;
+-- vector_l2_ops for the '<->' operator used in this project.
+-- See also "python main.py manage_vector_index", which derives lists
+-- from the row count and can also build an HNSW index.
+-- ivfflat.probes is a search setting of each session or transaction, not
+-- of the index; choose its value with "python main.py benchmark_vector_search".
 
-SET ivfflat.probes = 5;
-
-DROP INDEX idx_libraries_ivfflat_embedding IF EXISTS CASCADE;
+DROP INDEX IF EXISTS idx_libraries_ivfflat_embedding CASCADE;
 
 CREATE INDEX idx_libraries_ivfflat_embedding
 ON     libraries
-USING  ivfflat (embedding vector_cosine_ops)
+USING  ivfflat (embedding vector_l2_ops)
 WITH  (lists = 50);
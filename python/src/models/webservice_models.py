@@ -24,6 +24,52 @@ class LivenessModel(BaseModel):
     rows_read: int
 
 
+class QueryStreamRequestModel(BaseModel):
+    query_text: str
+    max_rows: int | None = None
+    max_bytes: int | None = None
+
+
+class VectorSearchRequestModel(BaseModel):
+    text: str | None = None
+    library: str | None = None
+    k: int = 10
+    preset: str = "balanced"
+    libtype: str | None = None
+    license: str | None = None
+    min_release_count: int | None = None
+    max_release_count: int | None = None
+    filter_strategy: str = "auto"
+
+
+class VectorSearchResponseModel(BaseModel):
+    k: int
+    preset: str
+    filters: dict
+    strategy: str
+    settings: dict
+    rows: list
+    elapsed: float
+    error: str | None = None
+
+
+class HybridSearchRequestModel(BaseModel):
+    text: str
+    k: int = 10
+    mode: str = "auto"
+    preset: str = "balanced"
+
+
+class HybridSearchResponseModel(BaseModel):
+    text: str
+    k: int
+    mode: str
+    counts: dict
+    rows: list
+    elapsed: float
+    error: str | None = None
+
+
 class OwlInfoModel(BaseModel):
     ontology_file: str
     owl: str
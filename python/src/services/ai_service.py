@@ -1,15 +1,23 @@
+import asyncio
 import logging
 
+import openai
 import tiktoken
 
-from openai import AzureOpenAI
+from openai import AsyncAzureOpenAI, AzureOpenAI
+from openai.types import CreateEmbeddingResponse, Embedding
+from openai.types.create_embedding_response import Usage
 
 from src.services.config_service import ConfigService
 from src.services.ai_completion import AiCompletion
+from src.services.embedding_cache import EmbeddingCache
 
 # Instances of this class are used to execute AzureOpenAI functionality.
 # Chris Joakim, Microsoft
 
+# The maximum number of tokens in a single embeddings input string.
+EMBEDDING_INPUT_MAX_TOKENS = 8191
+
 
 class AiService:
     """Constructor method; call initialize() immediately after this."""
@@ -26,10 +34,20 @@ class AiService:
             self.aoai_version = ConfigService.azure_openai_version()
             self.chat_function = None
             self.max_ntokens = ConfigService.truncate_llm_context_max_ntokens()
+            self.async_aoai_client = None
+            self.embedding_cache = EmbeddingCache.get_shared()
+            self.tiktoken_encoding, self.enc = None, None
 
-            # tiktoken, for token estimation, doesn't work with gpt-4 at this time
-            self.tiktoken_encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
-            self.enc = tiktoken.get_encoding("cl100k_base")
+            try:
+                # tiktoken, for token estimation, doesn't work with gpt-4 at this time
+                self.tiktoken_encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
+                self.enc = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                logging.warning(
+                    "AiService#__init__ tiktoken unavailable, estimating tokens: {}".format(
+                        str(e)
+                    )
+                )
 
             self.aoai_client = AzureOpenAI(
                 azure_endpoint=self.aoai_endpoint,
@@ -60,6 +78,8 @@ class AiService:
 
     def num_tokens_from_string(self, s: str) -> int:
         try:
+            if self.tiktoken_encoding is None:
+                return int(len(s) / 4) + 1
             return len(self.tiktoken_encoding.encode(s))
         except Exception as e:
             logging.critical(
@@ -73,12 +93,23 @@ class AiService:
         Generate an embeddings array from the given text.
         Return an CreateEmbeddingResponse object or None.
         Invoke 'resp.data[0].embedding' to get the array of 1536 floats.
+        A str text is first looked up in the EmbeddingCache, if enabled.
         """
         try:
+            use_cache = self.embedding_cache is not None and isinstance(text, str)
+            if use_cache:
+                embedding = self.embedding_cache.get(self.embeddings_deployment, text)
+                if embedding is not None:
+                    return self.cached_embedding_response(embedding)
             # <class 'openai.types.create_embedding_response.CreateEmbeddingResponse'>
-            return self.aoai_client.embeddings.create(
+            resp = self.aoai_client.embeddings.create(
                 input=text, model=self.embeddings_deployment
             )
+            if use_cache:
+                self.embedding_cache.put(
+                    self.embeddings_deployment, text, resp.data[0].embedding
+                )
+            return resp
         except Exception as e:
             logging.critical(
                 "Exception in AiService#generate_embeddings: {}".format(str(e))
@@ -86,6 +117,166 @@ class AiService:
             logging.exception(e, stack_info=True, exc_info=True)
             return None
 
+    def cached_embedding_response(
+        self, embedding: list[float]
+    ) -> CreateEmbeddingResponse:
+        """Return a CreateEmbeddingResponse for the given cached embedding."""
+        return CreateEmbeddingResponse(
+            data=[Embedding(embedding=embedding, index=0, object="embedding")],
+            model=str(self.embeddings_deployment),
+            object="list",
+            usage=Usage(prompt_tokens=0, total_tokens=0),
+        )
+
+    def num_embedding_tokens(self, text: str) -> int:
+        """
+        Return the number of cl100k_base tokens in the given text, or an
+        estimate of about four characters per token if tiktoken is unavailable.
+        """
+        if self.enc is not None:
+            return len(self.enc.encode(text))
+        return int(len(text) / 4) + 1
+
+    def truncate_embedding_input(self, text: str) -> str:
+        """Truncate the given text to EMBEDDING_INPUT_MAX_TOKENS, if necessary."""
+        if self.enc is not None:
+            tokens = self.enc.encode(text)
+            if len(tokens) > EMBEDDING_INPUT_MAX_TOKENS:
+                logging.warning(
+                    "AiService#truncate_embedding_input truncating {} tokens".format(
+                        len(tokens)
+                    )
+                )
+                return self.enc.decode(tokens[0:EMBEDDING_INPUT_MAX_TOKENS])
+        return text
+
+    def embedding_batches(self, texts: list[str]) -> list[list[str]]:
+        """
+        Pack the given texts, in order, into batches which respect both the
+        maximum inputs per request and the maximum tokens per request.
+        """
+        max_inputs = max(ConfigService.azure_openai_embeddings_batch_size(), 1)
+        max_tokens = ConfigService.azure_openai_embeddings_batch_max_tokens()
+        batches, batch, batch_tokens = list(), list(), 0
+        for text in texts:
+            ntokens = min(self.num_embedding_tokens(text), EMBEDDING_INPUT_MAX_TOKENS)
+            if len(batch) > 0:
+                if (len(batch) >= max_inputs) or (batch_tokens + ntokens > max_tokens):
+                    batches.append(batch)
+                    batch, batch_tokens = list(), 0
+            batch.append(text)
+            batch_tokens = batch_tokens + ntokens
+        if len(batch) > 0:
+            batches.append(batch)
+        return batches
+
+    def get_async_client(self) -> AsyncAzureOpenAI:
+        """
+        Return the AsyncAzureOpenAI client, creating it on first use.
+        Retries are handled by this class, so the client doesn't retry.
+        """
+        if self.async_aoai_client is None:
+            self.async_aoai_client = AsyncAzureOpenAI(
+                azure_endpoint=self.aoai_endpoint,
+                api_key=self.aoai_api_key,
+                api_version=self.aoai_version,
+                max_retries=0,
+            )
+        return self.async_aoai_client
+
+    def retry_delay_seconds(self, e: Exception, attempt: int) -> float:
+        """
+        Return the number of seconds to wait before retrying after the given
+        exception, per its retry-after-ms or retry-after response header, or
+        an exponential backoff if there is no such header.
+        """
+        response = getattr(e, "response", None)
+        if response is not None:
+            try:
+                value = response.headers.get("retry-after-ms")
+                if value is not None:
+                    return float(value) / 1000.0
+                value = response.headers.get("retry-after")
+                if value is not None:
+                    return float(value)
+            except Exception:
+                pass  # for example, an HTTP-date retry-after value
+        return min(0.5 * (2**attempt), 30.0)
+
+    async def create_embeddings_with_retry(self, batch: list[str]):
+        """
+        Execute one embeddings request for the given batch, retrying on
+        HTTP 429 rate limiting, connection errors and server errors.
+        """
+        client = self.get_async_client()
+        max_retries = ConfigService.azure_openai_max_retries()
+        inputs = [self.truncate_embedding_input(text) for text in batch]
+        attempt = 0
+        while True:
+            try:
+                return await client.embeddings.create(
+                    input=inputs, model=self.embeddings_deployment
+                )
+            except (
+                openai.RateLimitError,
+                openai.APIConnectionError,
+                openai.InternalServerError,
+            ) as e:
+                attempt = attempt + 1
+                if attempt > max_retries:
+                    raise
+                delay = self.retry_delay_seconds(e, attempt)
+                logging.warning(
+                    "AiService#create_embeddings_with_retry attempt {} in {}s: {}".format(
+                        attempt, delay, str(e)
+                    )
+                )
+                await asyncio.sleep(delay)
+
+    async def generate_embeddings_batch(
+        self, texts: list[str], max_concurrency: int | None = None
+    ) -> list[list[float]]:
+        """
+        Generate the embeddings for the given list of texts, returning a list
+        of embeddings (lists of floats) in the same order as the texts.
+        Identical texts are embedded only once, and texts in the EmbeddingCache
+        are not re-embedded.  The remaining unique texts are packed
+        into batches per the AIG4PG_OPENAI_EMBEDDINGS_BATCH_xxx limits, and
+        the batches are executed concurrently, up to max_concurrency at a time.
+        Unlike generate_embeddings(), errors are raised rather than returned
+        as None, after the rate-limit aware retries are exhausted.
+        """
+        unique_texts = list(dict.fromkeys(texts))
+        if max_concurrency is None:
+            max_concurrency = ConfigService.azure_openai_embeddings_concurrency()
+        semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+        embeddings = dict()  # key is the text, value is its embedding
+        if self.embedding_cache is not None:
+            for text in unique_texts:
+                embedding = self.embedding_cache.get(self.embeddings_deployment, text)
+                if embedding is not None:
+                    embeddings[text] = embedding
+
+        async def execute_batch(batch: list[str]):
+            async with semaphore:
+                resp = await self.create_embeddings_with_retry(batch)
+            for item in resp.data:
+                embeddings[batch[item.index]] = item.embedding
+                if self.embedding_cache is not None:
+                    self.embedding_cache.put(
+                        self.embeddings_deployment, batch[item.index], item.embedding
+                    )
+
+        uncached_texts = [text for text in unique_texts if text not in embeddings]
+        batches = self.embedding_batches(uncached_texts)
+        logging.info(
+            "AiService#generate_embeddings_batch texts: {} unique: {} cached: {} batches: {}".format(
+                len(texts), len(unique_texts), len(embeddings), len(batches)
+            )
+        )
+        await asyncio.gather(*[execute_batch(batch) for batch in batches])
+        return [embeddings[text] for text in texts]
+
     def text_to_chunks(self, text):
         max_chunk_size, chunks = 2048, list()
         current_chunk = ""
@@ -0,0 +1,136 @@
+import asyncio
+import importlib.util
+import logging
+
+import httpx
+
+from openai import AsyncAzureOpenAI
+
+from src.services.ai_service import AiService
+from src.services.config_service import ConfigService
+
+# Instances of this class execute AzureOpenAI functionality with awaitable
+# methods, so that calls to Azure OpenAI don't block the event loop of the
+# web application.  One instance is created when the web application starts,
+# and its single AsyncAzureOpenAI client shares a pool of keep-alive HTTP
+# connections (HTTP/2 when the h2 package is installed) across all requests.
+# Each public method is bounded by the AIG4PG_OPENAI_TIMEOUT, including the
+# rate-limit aware retries of the AiService base class.
+
+
+class AsyncAiService(AiService):
+
+    def __init__(self, opts={}):
+        super().__init__(opts)
+        self.timeout = ConfigService.azure_openai_timeout()
+        self.http2 = importlib.util.find_spec("h2") is not None
+        self.http_client = None
+
+    def get_async_client(self) -> AsyncAzureOpenAI:
+        """
+        Return the AsyncAzureOpenAI client, creating it and its shared
+        httpx connection pool on first use.
+        """
+        if self.async_aoai_client is None:
+            max_connections = max(ConfigService.azure_openai_max_connections(), 1)
+            self.http_client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=10.0),
+            )
+            self.async_aoai_client = AsyncAzureOpenAI(
+                azure_endpoint=self.aoai_endpoint,
+                api_key=self.aoai_api_key,
+                api_version=self.aoai_version,
+                max_retries=0,
+                http_client=self.http_client,
+            )
+            logging.info(
+                "AsyncAiService#get_async_client http2: {} max_connections: {}".format(
+                    self.http2, max_connections
+                )
+            )
+        return self.async_aoai_client
+
+    async def close(self):
+        """Close the AsyncAzureOpenAI client and its HTTP connections."""
+        if self.async_aoai_client is not None:
+            await self.async_aoai_client.close()
+            self.async_aoai_client = None
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+
+    async def agenerate_embeddings(self, text: str, timeout: float | None = None):
+        """
+        Generate an embeddings array from the given text.
+        Return an CreateEmbeddingResponse object or None.
+        Invoke 'resp.data[0].embedding' to get the array of 1536 floats.
+        The text is first looked up in the EmbeddingCache, if enabled; its
+        blocking SQLite calls run in a worker thread, off the event loop.
+        This is the awaitable form of AiService#generate_embeddings, which
+        is inherited unchanged, so an AsyncAiService is still an AiService.
+        """
+        try:
+            if self.embedding_cache is not None:
+                embedding = await asyncio.to_thread(
+                    self.embedding_cache.get, self.embeddings_deployment, text
+                )
+                if embedding is not None:
+                    return self.cached_embedding_response(embedding)
+            resp = await asyncio.wait_for(
+                self.create_embeddings_with_retry([text]),
+                timeout=self.timeout if timeout is None else timeout,
+            )
+            if self.embedding_cache is not None:
+                await asyncio.to_thread(
+                    self.embedding_cache.put,
+                    self.embeddings_deployment,
+                    text,
+                    resp.data[0].embedding,
+                )
+            return resp
+        except Exception as e:
+            logging.critical(
+                "Exception in AsyncAiService#agenerate_embeddings: {}".format(str(e))
+            )
+            logging.exception(e, stack_info=True, exc_info=True)
+            return None
+
+    async def generate_completion(
+        self,
+        user_text: str,
+        system_prompt: str | None = None,
+        max_tokens: int | None = None,
+        timeout: float | None = None,
+    ):
+        """
+        Execute a chat completion of the given user text, with an optional
+        system prompt, using the completions deployment.
+        Return an openai ChatCompletion object or None.
+        Invoke 'resp.choices[0].message.content' to get the completion text.
+        """
+        try:
+            messages = list()
+            if system_prompt is not None:
+                messages.append({"role": "system", "content": system_prompt})
+            messages.append({"role": "user", "content": user_text})
+            kwargs = dict()
+            if max_tokens is not None:
+                kwargs["max_tokens"] = max_tokens
+            client = self.get_async_client()
+            return await asyncio.wait_for(
+                client.chat.completions.create(
+                    model=self.completions_deployment, messages=messages, **kwargs
+                ),
+                timeout=self.timeout if timeout is None else timeout,
+            )
+        except Exception as e:
+            logging.critical(
+                "Exception in AsyncAiService#generate_completion: {}".format(str(e))
+            )
+            logging.exception(e, stack_info=True, exc_info=True)
+            return None
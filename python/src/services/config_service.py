@@ -119,12 +119,75 @@ class ConfigService:
         d["AIG4PG_OPENAI_EMBEDDINGS_DEP"] = (
             "The name of your Azure OpenAI embeddings deployment"
         )
+        d["AIG4PG_OPENAI_EMBEDDINGS_BATCH_SIZE"] = (
+            "Maximum number of inputs per Azure OpenAI embeddings request"
+        )
+        d["AIG4PG_OPENAI_EMBEDDINGS_BATCH_MAX_TOKENS"] = (
+            "Maximum total tokens per Azure OpenAI embeddings request"
+        )
+        d["AIG4PG_OPENAI_EMBEDDINGS_CONCURRENCY"] = (
+            "Maximum number of concurrent Azure OpenAI embeddings requests"
+        )
+        d["AIG4PG_OPENAI_MAX_RETRIES"] = (
+            "Maximum number of retries of a rate-limited or failed Azure OpenAI request"
+        )
+        d["AIG4PG_OPENAI_TIMEOUT"] = (
+            "Timeout in seconds of an async Azure OpenAI call, including retries"
+        )
+        d["AIG4PG_OPENAI_MAX_CONNECTIONS"] = (
+            "Maximum number of pooled HTTP connections to Azure OpenAI"
+        )
+        d["AIG4PG_EMBEDDING_CACHE_ENABLED"] = (
+            "Set to true to cache embeddings in memory, and in the optional SQLite file"
+        )
+        d["AIG4PG_EMBEDDING_CACHE_FILE"] = (
+            "Opt-in SQLite file of the persistent embedding cache; empty for memory only"
+        )
+        d["AIG4PG_EMBEDDING_CACHE_LRU_SIZE"] = (
+            "Maximum number of embeddings in the in-process LRU cache"
+        )
+        d["AIG4PG_EMBEDDING_CACHE_MAX_ENTRIES"] = (
+            "Maximum number of embeddings in the persistent embedding cache"
+        )
+        d["AIG4PG_EMBEDDING_CACHE_TTL_SECONDS"] = (
+            "Time-to-live of cached embeddings in seconds; zero for no expiration"
+        )
         d["AIG4PG_TRUNCATE_LLM_CONTEXT_MAX_NTOKENS"] = ""
         d["AIG4PG_PG_FLEX_SERVER"] = "Azure PostgreSQL Flex Server hostname"
         d["AIG4PG_PG_FLEX_PORT"] = "Azure PostgreSQL Flex Server port"
         d["AIG4PG_PG_FLEX_DB"] = "Azure PostgreSQL Flex Server database"
         d["AIG4PG_PG_FLEX_USER"] = "Azure PostgreSQL Flex Server user"
         d["AIG4PG_PG_FLEX_PASS"] = "Azure PostgreSQL Flex Server user password"
+        d["AIG4PG_PG_POOL_MIN_SIZE"] = (
+            "Minimum number of connections kept open in the connection pool"
+        )
+        d["AIG4PG_PG_POOL_MAX_SIZE"] = (
+            "Maximum number of connections in the connection pool"
+        )
+        d["AIG4PG_PG_POOL_MAX_LIFETIME"] = (
+            "Seconds after which a pooled connection is closed and replaced"
+        )
+        d["AIG4PG_PG_POOL_MAX_IDLE"] = (
+            "Seconds a pooled connection above the minimum size may stay idle"
+        )
+        d["AIG4PG_PG_POOL_TIMEOUT"] = (
+            "Seconds to wait for a connection from the pool before failing"
+        )
+        d["AIG4PG_PG_LOAD_AGE"] = (
+            "Execute LOAD 'age' once on each new pooled connection; true or false"
+        )
+        d["AIG4PG_PG_SESSION_GUCS"] = (
+            "Optional semicolon-delimited name=value session settings for each new pooled connection"
+        )
+        d["AIG4PG_QUERY_MAX_ROWS"] = (
+            "Maximum number of rows returned by a streamed query console request"
+        )
+        d["AIG4PG_QUERY_MAX_BYTES"] = (
+            "Maximum number of bytes returned by a streamed query console request"
+        )
+        d["AIG4PG_QUERY_ITERSIZE"] = (
+            "Number of rows fetched per server-side cursor round trip"
+        )
 
         # Optional environment variables.  Cosmos DB PostgreSQL is not used in this project.
         d["LOCAL_PG_PASS"] = (
@@ -150,12 +213,33 @@ class ConfigService:
         d["AIG4PG_OPENAI_KEY"] = ""
         d["AIG4PG_OPENAI_COMPLETIONS_DEP"] = "gpt4"
         d["AIG4PG_OPENAI_EMBEDDINGS_DEP"] = "embeddings"
+        d["AIG4PG_OPENAI_EMBEDDINGS_BATCH_SIZE"] = "256"
+        d["AIG4PG_OPENAI_EMBEDDINGS_BATCH_MAX_TOKENS"] = "100000"
+        d["AIG4PG_OPENAI_EMBEDDINGS_CONCURRENCY"] = "4"
+        d["AIG4PG_OPENAI_MAX_RETRIES"] = "5"
+        d["AIG4PG_OPENAI_TIMEOUT"] = "30"
+        d["AIG4PG_OPENAI_MAX_CONNECTIONS"] = "20"
+        d["AIG4PG_EMBEDDING_CACHE_ENABLED"] = "true"
+        d["AIG4PG_EMBEDDING_CACHE_FILE"] = ""
+        d["AIG4PG_EMBEDDING_CACHE_LRU_SIZE"] = "1024"
+        d["AIG4PG_EMBEDDING_CACHE_MAX_ENTRIES"] = "100000"
+        d["AIG4PG_EMBEDDING_CACHE_TTL_SECONDS"] = "2592000"
         d["AIG4PG_TRUNCATE_LLM_CONTEXT_MAX_NTOKENS"] = "0"
         d["AIG4PG_PG_FLEX_SERVER"] = ""
         d["AIG4PG_PG_FLEX_PORT"] = "5432"
         d["AIG4PG_PG_FLEX_DB"] = ""
         d["AIG4PG_PG_FLEX_USER"] = ""
         d["AIG4PG_PG_FLEX_PASS"] = ""
+        d["AIG4PG_PG_POOL_MIN_SIZE"] = "2"
+        d["AIG4PG_PG_POOL_MAX_SIZE"] = "10"
+        d["AIG4PG_PG_POOL_MAX_LIFETIME"] = "3600"
+        d["AIG4PG_PG_POOL_MAX_IDLE"] = "600"
+        d["AIG4PG_PG_POOL_TIMEOUT"] = "30"
+        d["AIG4PG_PG_LOAD_AGE"] = "true"
+        d["AIG4PG_PG_SESSION_GUCS"] = "statement_timeout=300s"
+        d["AIG4PG_QUERY_MAX_ROWS"] = "10000"
+        d["AIG4PG_QUERY_MAX_BYTES"] = "16777216"
+        d["AIG4PG_QUERY_ITERSIZE"] = "500"
         d["LOCAL_PG_PASS"] = ""
         return d
 
@@ -231,6 +315,58 @@ class ConfigService:
         else:
             return value
 
+    @classmethod
+    def postgresql_pool_min_size(cls) -> int:
+        return cls.int_envvar("AIG4PG_PG_POOL_MIN_SIZE", 2)
+
+    @classmethod
+    def postgresql_pool_max_size(cls) -> int:
+        return cls.int_envvar("AIG4PG_PG_POOL_MAX_SIZE", 10)
+
+    @classmethod
+    def postgresql_pool_max_lifetime(cls) -> float:
+        return cls.float_envvar("AIG4PG_PG_POOL_MAX_LIFETIME", 3600.0)
+
+    @classmethod
+    def postgresql_pool_max_idle(cls) -> float:
+        return cls.float_envvar("AIG4PG_PG_POOL_MAX_IDLE", 600.0)
+
+    @classmethod
+    def postgresql_pool_timeout(cls) -> float:
+        return cls.float_envvar("AIG4PG_PG_POOL_TIMEOUT", 30.0)
+
+    @classmethod
+    def postgresql_load_age(cls) -> bool:
+        return cls.boolean_envvar("AIG4PG_PG_LOAD_AGE", True)
+
+    @classmethod
+    def postgresql_session_gucs(cls) -> dict:
+        """
+        Return a dict of the name=value session settings (GUCs) in the
+        AIG4PG_PG_SESSION_GUCS environment variable, such as
+        "statement_timeout=300s; work_mem=64MB".
+        """
+        gucs = dict()
+        for pair in cls.envvar("AIG4PG_PG_SESSION_GUCS", "").split(";"):
+            tokens = pair.split("=", 1)
+            if len(tokens) == 2:
+                name, value = tokens[0].strip(), tokens[1].strip()
+                if len(name) > 0:
+                    gucs[name] = value
+        return gucs
+
+    @classmethod
+    def query_max_rows(cls) -> int:
+        return cls.int_envvar("AIG4PG_QUERY_MAX_ROWS", 10000)
+
+    @classmethod
+    def query_max_bytes(cls) -> int:
+        return cls.int_envvar("AIG4PG_QUERY_MAX_BYTES", 16777216)
+
+    @classmethod
+    def query_itersize(cls) -> int:
+        return cls.int_envvar("AIG4PG_QUERY_ITERSIZE", 500)
+
     @classmethod
     def azure_openai_url(cls) -> str:
         value = cls.envvar("AIG4PG_OPENAI_URL", None)
@@ -259,6 +395,50 @@ class ConfigService:
     def azure_openai_embeddings_deployment(cls) -> str:
         return cls.envvar("AIG4PG_OPENAI_EMBEDDINGS_DEP", None)
 
+    @classmethod
+    def azure_openai_embeddings_batch_size(cls) -> int:
+        return cls.int_envvar("AIG4PG_OPENAI_EMBEDDINGS_BATCH_SIZE", 256)
+
+    @classmethod
+    def azure_openai_embeddings_batch_max_tokens(cls) -> int:
+        return cls.int_envvar("AIG4PG_OPENAI_EMBEDDINGS_BATCH_MAX_TOKENS", 100000)
+
+    @classmethod
+    def azure_openai_embeddings_concurrency(cls) -> int:
+        return cls.int_envvar("AIG4PG_OPENAI_EMBEDDINGS_CONCURRENCY", 4)
+
+    @classmethod
+    def azure_openai_max_retries(cls) -> int:
+        return cls.int_envvar("AIG4PG_OPENAI_MAX_RETRIES", 5)
+
+    @classmethod
+    def azure_openai_timeout(cls) -> float:
+        return cls.float_envvar("AIG4PG_OPENAI_TIMEOUT", 30.0)
+
+    @classmethod
+    def azure_openai_max_connections(cls) -> int:
+        return cls.int_envvar("AIG4PG_OPENAI_MAX_CONNECTIONS", 20)
+
+    @classmethod
+    def embedding_cache_enabled(cls) -> bool:
+        return cls.boolean_envvar("AIG4PG_EMBEDDING_CACHE_ENABLED", True)
+
+    @classmethod
+    def embedding_cache_file(cls) -> str:
+        return cls.envvar("AIG4PG_EMBEDDING_CACHE_FILE", "")
+
+    @classmethod
+    def embedding_cache_lru_size(cls) -> int:
+        return cls.int_envvar("AIG4PG_EMBEDDING_CACHE_LRU_SIZE", 1024)
+
+    @classmethod
+    def embedding_cache_max_entries(cls) -> int:
+        return cls.int_envvar("AIG4PG_EMBEDDING_CACHE_MAX_ENTRIES", 100000)
+
+    @classmethod
+    def embedding_cache_ttl_seconds(cls) -> int:
+        return cls.int_envvar("AIG4PG_EMBEDDING_CACHE_TTL_SECONDS", 2592000)
+
     @classmethod
     def truncate_llm_context_max_ntokens(cls) -> int:
         """
@@ -0,0 +1,231 @@
+import logging
+import time
+import traceback
+
+from contextlib import asynccontextmanager
+
+import psycopg_pool
+
+from src.services.config_service import ConfigService
+from src.util.vector_adapter import VectorAdapter
+
+# This class manages the single psycopg_pool.AsyncConnectionPool that is
+# shared by the web application and the command-line programs, so that
+# requests reuse open connections rather than paying for a new
+# TCP + TLS + authentication handshake with Azure PostgreSQL each time.
+# Each new physical connection is configured once for Apache AGE (LOAD 'age',
+# search_path, and optional session settings) and for pgvector binary
+# transfer by the pool configure hook.
+# It also collects simple checkout statistics for the pool.
+
+AGE_SEARCH_PATH = 'SET search_path = "$user", ag_catalog, public;'
+
+
+class DbService:
+
+    pool = None
+    configured_connections = 0
+    checkouts = 0
+    checkouts_in_use = 0
+    checkout_total_ms = 0.0
+    checkout_max_ms = 0.0
+    checkout_last_ms = 0.0
+
+    @classmethod
+    def connection_string(cls) -> str:
+        """
+        Create and return the connection string for your Azure
+        PostgreSQL database per the AIG4PG_xxx environment variables.
+        """
+        db = ConfigService.postgresql_database()
+        user = ConfigService.postgresql_user()
+        password = ConfigService.postgresql_password()
+        host = ConfigService.postgresql_server()
+        port = ConfigService.postgresql_port()
+        return "host={} port={} dbname={} user={} password={}".format(
+            host, port, db, user, password
+        )
+
+    @classmethod
+    def pool_kwargs(cls) -> dict:
+        """
+        Return the keyword arguments for the AsyncConnectionPool constructor
+        per the AIG4PG_PG_POOL_xxx environment variables.
+        """
+        min_size = max(ConfigService.postgresql_pool_min_size(), 0)
+        max_size = max(ConfigService.postgresql_pool_max_size(), min_size, 1)
+        kwargs = dict()
+        kwargs["min_size"] = min_size
+        kwargs["max_size"] = max_size
+        kwargs["max_lifetime"] = ConfigService.postgresql_pool_max_lifetime()
+        kwargs["max_idle"] = ConfigService.postgresql_pool_max_idle()
+        kwargs["timeout"] = ConfigService.postgresql_pool_timeout()
+        kwargs["kwargs"] = {"autocommit": True}
+        kwargs["configure"] = cls.configure_connection
+        return kwargs
+
+    @classmethod
+    def session_statements(cls) -> list[tuple]:
+        """
+        Return the list of (sql, params) tuples which are executed once
+        per physical connection by configure_connection().
+        """
+        statements = list()
+        if ConfigService.postgresql_load_age():
+            statements.append(("LOAD 'age';", None))
+        statements.append((AGE_SEARCH_PATH, None))
+        gucs = ConfigService.postgresql_session_gucs()
+        for name in sorted(gucs.keys()):
+            statements.append(("SELECT set_config(%s, %s, false);", (name, gucs[name])))
+        return statements
+
+    @classmethod
+    async def configure_connection(cls, conn) -> None:
+        """
+        The pool configure hook; invoked once when the pool creates a new
+        connection, before it is made available to requests.  The pgvector
+        binary adapters of class VectorAdapter are also registered.  A failed
+        LOAD 'age' is logged rather than raised, as some servers
+        preload the extension and restrict the LOAD command.
+        """
+        for sql, params in cls.session_statements():
+            try:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(sql, params)
+            except Exception as e:
+                if sql.startswith("LOAD"):
+                    logging.warning(
+                        "DbService#configure_connection, {} failed: {}".format(
+                            sql, str(e)
+                        )
+                    )
+                else:
+                    raise
+        try:
+            await VectorAdapter.register(conn)
+        except Exception as e:
+            logging.warning(
+                "DbService#configure_connection, vector adapter not registered: {}".format(
+                    str(e)
+                )
+            )
+        cls.configured_connections = cls.configured_connections + 1
+
+    @classmethod
+    def create_pool(cls) -> psycopg_pool.AsyncConnectionPool:
+        """Create, but do not open, the AsyncConnectionPool."""
+        conn_str = cls.connection_string()
+        logging.info(
+            "DbService#create_pool, conn_str: {} password=<omitted>".format(
+                conn_str.split("password")[0]
+            )
+        )
+        kwargs = cls.pool_kwargs()
+        logging.info(
+            "DbService#create_pool, min_size: {} max_size: {} max_lifetime: {} max_idle: {} timeout: {}".format(
+                kwargs["min_size"],
+                kwargs["max_size"],
+                kwargs["max_lifetime"],
+                kwargs["max_idle"],
+                kwargs["timeout"],
+            )
+        )
+        return psycopg_pool.AsyncConnectionPool(
+            conninfo=conn_str, open=False, name="aig4pg", **kwargs
+        )
+
+    @classmethod
+    async def initialize(cls) -> psycopg_pool.AsyncConnectionPool | None:
+        """
+        Create and open the shared pool, if necessary, and return it.
+        Opening waits until min_size connections have been established
+        so that the first requests don't pay the connection cost.
+        """
+        if cls.pool is not None:
+            return cls.pool
+        pool = None
+        try:
+            pool = cls.create_pool()
+            start_time = time.perf_counter()
+            await pool.open(wait=True, timeout=ConfigService.postgresql_pool_timeout())
+            await pool.check()
+            cls.pool = pool
+            logging.info(
+                "DbService#initialize, pool opened and warmed in {:.1f} ms; stats: {}".format(
+                    (time.perf_counter() - start_time) * 1000.0, cls.get_stats()
+                )
+            )
+        except Exception as e:
+            logging.error("DbService#initialize - exception: {}".format(str(e)))
+            logging.error(traceback.format_exc())
+            if pool is not None:
+                await pool.close()
+        return cls.pool
+
+    @classmethod
+    async def close(cls) -> None:
+        """Close the shared pool, if it is open."""
+        if cls.pool is not None:
+            logging.info("DbService#close, closing pool...")
+            await cls.pool.close()
+            cls.pool = None
+            logging.info("DbService#close, pool closed")
+
+    @classmethod
+    @asynccontextmanager
+    async def connection(cls, timeout: float | None = None):
+        """
+        Async context manager which checks out a connection from the shared
+        pool and returns it to the pool on exit.  Use it like this:
+        async with DbService.connection() as conn:
+        """
+        if cls.pool is None:
+            await cls.initialize()
+        if cls.pool is None:
+            raise psycopg_pool.PoolTimeout("DbService pool is not available")
+        start_time = time.perf_counter()
+        async with cls.pool.connection(timeout=timeout) as conn:
+            cls.record_checkout((time.perf_counter() - start_time) * 1000.0)
+            cls.checkouts_in_use = cls.checkouts_in_use + 1
+            try:
+                yield conn
+            finally:
+                cls.checkouts_in_use = cls.checkouts_in_use - 1
+
+    @classmethod
+    def record_checkout(cls, elapsed_ms: float) -> None:
+        cls.checkouts = cls.checkouts + 1
+        cls.checkout_total_ms = cls.checkout_total_ms + elapsed_ms
+        cls.checkout_last_ms = elapsed_ms
+        if elapsed_ms > cls.checkout_max_ms:
+            cls.checkout_max_ms = elapsed_ms
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        """
+        Return a dict of pool statistics, combining the psycopg_pool
+        statistics (size, available, waiting) with the checkout
+        latency values collected by this class.
+        """
+        stats = dict()
+        if cls.pool is not None:
+            stats.update(cls.pool.get_stats())
+            stats["in_use"] = stats.get("pool_size", 0) - stats.get("pool_available", 0)
+            stats["requests_waiting"] = stats.get("requests_waiting", 0)
+        stats["configured_connections"] = cls.configured_connections
+        stats["checkouts"] = cls.checkouts
+        stats["checkouts_in_use"] = cls.checkouts_in_use
+        stats["checkout_last_ms"] = round(cls.checkout_last_ms, 3)
+        stats["checkout_max_ms"] = round(cls.checkout_max_ms, 3)
+        if cls.checkouts > 0:
+            stats["checkout_avg_ms"] = round(cls.checkout_total_ms / cls.checkouts, 3)
+        else:
+            stats["checkout_avg_ms"] = 0.0
+        return stats
+
+    @classmethod
+    def reset_stats(cls) -> None:
+        cls.checkouts = 0
+        cls.checkout_total_ms = 0.0
+        cls.checkout_max_ms = 0.0
+        cls.checkout_last_ms = 0.0
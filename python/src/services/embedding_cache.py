@@ -0,0 +1,265 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from array import array
+from collections import OrderedDict
+
+from src.services.config_service import ConfigService
+
+# This class is a content-addressed cache of embeddings, so that the same
+# phrase isn't re-embedded (costing both money and 100-300 ms) on every
+# vector search.  The key is the SHA-256 hash of the embeddings deployment
+# name and the normalized text.  There are two tiers: an in-process LRU
+# cache, and an opt-in persistent local SQLite file, named by the
+# AIG4PG_EMBEDDING_CACHE_FILE environment variable, in which each embedding
+# is stored as a compact float32 BLOB (the same precision as pgvector).
+# Entries expire after the configured TTL, and the least recently used
+# persistent entries are evicted when the configured maximum is exceeded.
+# Hit and miss counters are kept for both tiers.
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS embedding_cache (
+  key         TEXT PRIMARY KEY,
+  deployment  TEXT NOT NULL,
+  dimensions  INTEGER NOT NULL,
+  embedding   BLOB NOT NULL,
+  created_at  REAL NOT NULL,
+  accessed_at REAL NOT NULL
+)
+"""
+
+CREATE_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS embedding_cache_accessed_at
+  ON embedding_cache (accessed_at)
+"""
+
+
+class EmbeddingCache:
+
+    shared_instance = None
+
+    @classmethod
+    def get_shared(cls):
+        """
+        Return the EmbeddingCache shared by all AiService instances in this
+        process, creating it on first use, or None if the cache is disabled.
+        """
+        if not ConfigService.embedding_cache_enabled():
+            return None
+        if cls.shared_instance is None:
+            cls.shared_instance = EmbeddingCache()
+        return cls.shared_instance
+
+    def __init__(
+        self,
+        db_file: str | None = None,
+        lru_size: int | None = None,
+        max_entries: int | None = None,
+        ttl_seconds: int | None = None,
+    ):
+        """
+        The default values are read from the AIG4PG_EMBEDDING_CACHE_xxx
+        environment variables.  An empty db_file disables the persistent tier.
+        """
+        if db_file is None:
+            db_file = ConfigService.embedding_cache_file()
+        if lru_size is None:
+            lru_size = ConfigService.embedding_cache_lru_size()
+        if max_entries is None:
+            max_entries = ConfigService.embedding_cache_max_entries()
+        if ttl_seconds is None:
+            ttl_seconds = ConfigService.embedding_cache_ttl_seconds()
+        self.db_file = db_file
+        self.lru_size = max(lru_size, 0)
+        self.max_entries = max(max_entries, 1)
+        self.ttl_seconds = max(ttl_seconds, 0)
+        self.lru = OrderedDict()  # key -> (created_at, embedding)
+        self.lock = threading.Lock()
+        self.conn = None
+        # the persistent tier is pruned every evict_interval puts, so the
+        # entry count may briefly exceed max_entries by about one percent
+        self.evict_interval = min(max(int(self.max_entries / 100), 1), 100)
+        self.puts_since_evict = 0
+        self.reset_stats()
+        if len(self.db_file) > 0:
+            try:
+                self.open_db()
+            except Exception as e:
+                logging.warning(
+                    "EmbeddingCache#__init__ persistent tier disabled: {}".format(
+                        str(e)
+                    )
+                )
+                self.conn = None
+
+    def open_db(self):
+        db_dir = os.path.dirname(self.db_file)
+        if len(db_dir) > 0:
+            os.makedirs(db_dir, exist_ok=True)
+        self.conn = sqlite3.connect(
+            self.db_file, check_same_thread=False, isolation_level=None
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(CREATE_TABLE_SQL)
+        self.conn.execute(CREATE_INDEX_SQL)
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    def reset_stats(self):
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.puts = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    @classmethod
+    def normalize_text(cls, text: str) -> str:
+        """
+        Return the given text in Unicode NFC form with its whitespace
+        collapsed; case is preserved as it affects the embedding.
+        """
+        return WHITESPACE_PATTERN.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+    @classmethod
+    def cache_key(cls, deployment: str, text: str) -> str:
+        s = "{}\x00{}".format(deployment, cls.normalize_text(text))
+        return hashlib.sha256(s.encode("utf-8")).hexdigest()
+
+    def is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and (now - created_at) > self.ttl_seconds
+
+    def get(self, deployment: str, text: str) -> list[float] | None:
+        """
+        Return the cached embedding for the given deployment and text,
+        or None if it is not cached or has expired.
+        """
+        key = self.cache_key(deployment, text)
+        now = time.time()
+        with self.lock:
+            entry = self.lru.get(key)
+            if entry is not None:
+                if not self.is_expired(entry[0], now):
+                    self.lru.move_to_end(key)
+                    self.memory_hits = self.memory_hits + 1
+                    return entry[1]
+                del self.lru[key]
+                self.expirations = self.expirations + 1
+            if self.conn is not None:
+                row = self.conn.execute(
+                    "SELECT embedding, created_at FROM embedding_cache WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                if row is not None:
+                    if not self.is_expired(row[1], now):
+                        self.conn.execute(
+                            "UPDATE embedding_cache SET accessed_at = ? WHERE key = ?",
+                            (now, key),
+                        )
+                        embedding = array("f", row[0]).tolist()
+                        self.lru_put(key, row[1], embedding)
+                        self.persistent_hits = self.persistent_hits + 1
+                        return embedding
+                    self.conn.execute(
+                        "DELETE FROM embedding_cache WHERE key = ?", (key,)
+                    )
+                    self.expirations = self.expirations + 1
+            self.misses = self.misses + 1
+            return None
+
+    def put(self, deployment: str, text: str, embedding: list[float]):
+        """Add the given embedding to both tiers of the cache."""
+        key = self.cache_key(deployment, text)
+        now = time.time()
+        with self.lock:
+            self.lru_put(key, now, embedding)
+            if self.conn is not None:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO embedding_cache VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        key,
+                        deployment,
+                        len(embedding),
+                        array("f", embedding).tobytes(),
+                        now,
+                        now,
+                    ),
+                )
+                self.puts_since_evict = self.puts_since_evict + 1
+                if self.puts_since_evict >= self.evict_interval:
+                    self.evict(now)
+                    self.puts_since_evict = 0
+            self.puts = self.puts + 1
+
+    def lru_put(self, key: str, created_at: float, embedding: list[float]):
+        if self.lru_size < 1:
+            return
+        self.lru[key] = (created_at, embedding)
+        self.lru.move_to_end(key)
+        while len(self.lru) > self.lru_size:
+            self.lru.popitem(last=False)
+
+    def evict(self, now: float):
+        """
+        Delete the expired persistent entries, and the least recently
+        accessed entries in excess of max_entries.  Called with the lock held.
+        """
+        deleted = 0
+        if self.ttl_seconds > 0:
+            cursor = self.conn.execute(
+                "DELETE FROM embedding_cache WHERE created_at < ?",
+                (now - self.ttl_seconds,),
+            )
+            self.expirations = self.expirations + max(cursor.rowcount, 0)
+        count = self.conn.execute("SELECT count(*) FROM embedding_cache").fetchone()[0]
+        if count > self.max_entries:
+            cursor = self.conn.execute(
+                "DELETE FROM embedding_cache WHERE key IN "
+                + "(SELECT key FROM embedding_cache ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,),
+            )
+            deleted = max(cursor.rowcount, 0)
+            self.evictions = self.evictions + deleted
+        return deleted
+
+    def get_stats(self) -> dict:
+        stats = dict()
+        stats["memory_hits"] = self.memory_hits
+        stats["persistent_hits"] = self.persistent_hits
+        stats["misses"] = self.misses
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        if lookups > 0:
+            stats["hit_ratio"] = round(
+                (self.memory_hits + self.persistent_hits) / lookups, 4
+            )
+        else:
+            stats["hit_ratio"] = 0.0
+        stats["puts"] = self.puts
+        stats["expirations"] = self.expirations
+        stats["evictions"] = self.evictions
+        stats["memory_entries"] = len(self.lru)
+        stats["lru_size"] = self.lru_size
+        stats["db_file"] = self.db_file if self.conn is not None else None
+        if self.conn is not None:
+            with self.lock:
+                stats["persistent_entries"] = self.conn.execute(
+                    "SELECT count(*) FROM embedding_cache"
+                ).fetchone()[0]
+        else:
+            stats["persistent_entries"] = 0
+        stats["max_entries"] = self.max_entries
+        stats["ttl_seconds"] = self.ttl_seconds
+        return stats
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import time
+
+from psycopg import sql
+
+from src.services.db_service import DbService
+from src.util.library_graph import (
+    EDGE_LABELS,
+    GRAPH_LIBRARY_FIELDS,
+    VERTEX_LABELS,
+    LibraryGraph,
+)
+from src.util.library_ingest import LibraryIngest
+
+# This class bulk loads the PyPI libraries graph into Apache AGE by COPYing
+# the vertex and edge rows directly into the AGE label tables, such as
+# "libraries1"."Library", rather than executing one cypher() CREATE
+# statement per vertex and one MATCH ... CREATE statement, with two label
+# scans, per edge.  The graph is built in memory by class LibraryGraph from
+# the shared LibraryIngest stage, a block of each label's id sequence is
+# reserved for the computed graphids, and the whole load runs in a single
+# transaction.  The label tables are locked for the duration of the load,
+# so concurrent Cypher writers wait rather than collide with the ids.
+
+LABELS_SQL = """
+select l.name, l.id, l.seq_name
+from ag_catalog.ag_label l
+join ag_catalog.ag_graph g on l.graph = g.graphid
+where g.name = %s
+""".strip()
+
+
+class GraphLoader:
+
+    def __init__(self, graphname: str, workers: int | None = None):
+        self.graphname = graphname
+        self.workers = workers
+        self.stats = dict()
+
+    def build_graph(self, data_dir: str, max_files: int | None) -> LibraryGraph:
+        """Build the LibraryGraph from the documents; runs in a worker thread."""
+        graph = LibraryGraph()
+        ingest = LibraryIngest(workers=self.workers)
+        for doc in ingest.iter_docs(data_dir, GRAPH_LIBRARY_FIELDS, max_files):
+            graph.add_doc(doc)
+        self.stats["ingest"] = ingest.get_stats()
+        return graph
+
+    def copy_sql(self, label: str, edge: bool):
+        if edge:
+            columns = "id, start_id, end_id, properties"
+        else:
+            columns = "id, properties"
+        return sql.SQL("COPY {} (" + columns + ") FROM STDIN").format(
+            sql.Identifier(self.graphname, label)
+        )
+
+    async def ensure_graph_and_labels(self, cursor) -> dict:
+        """
+        Create the graph and its labels, as necessary, and return a dict of
+        label name -> (label id, qualified sequence name).
+        """
+        await cursor.execute(
+            "select count(*) from ag_catalog.ag_graph where name = %s",
+            (self.graphname,),
+        )
+        if (await cursor.fetchone())[0] == 0:
+            logging.info("GraphLoader, creating graph {}".format(self.graphname))
+            await cursor.execute(
+                "select ag_catalog.create_graph(%s)", (self.graphname,)
+            )
+        labels = await self.fetch_labels(cursor)
+        for label in list(VERTEX_LABELS) + list(EDGE_LABELS.keys()):
+            if label not in labels:
+                if label in VERTEX_LABELS:
+                    func = "create_vlabel"
+                else:
+                    func = "create_elabel"
+                await cursor.execute(
+                    "select ag_catalog.{}(%s, %s)".format(func),
+                    (self.graphname, label),
+                )
+        return await self.fetch_labels(cursor)
+
+    async def fetch_labels(self, cursor) -> dict:
+        await cursor.execute(LABELS_SQL, (self.graphname,))
+        labels = dict()
+        for name, label_id, seq_name in await cursor.fetchall():
+            seq = sql.Identifier(self.graphname, seq_name).as_string(None)
+            labels[name] = (label_id, seq)
+        return labels
+
+    async def reserve_entry_ids(self, cursor, seq: str, count: int) -> int:
+        """
+        Reserve a block of count entry ids from the given label sequence,
+        and return the first one.
+        """
+        if count < 1:
+            return 1
+        await cursor.execute(
+            "select setval(%s::regclass, nextval(%s::regclass) + %s - 1)",
+            (seq, seq, count),
+        )
+        last = (await cursor.fetchone())[0]
+        return last - count + 1
+
+    async def copy_rows(self, cursor, label: str, edge: bool, rows) -> int:
+        count = 0
+        async with cursor.copy(self.copy_sql(label, edge)) as copy:
+            for row in rows:
+                await copy.write_row(row)
+                count = count + 1
+        return count
+
+    async def load(self, data_dir: str, max_files: int | None = None) -> dict:
+        """
+        Load the graph from the documents in the given directory, and
+        return the load statistics.
+        """
+        start_time = time.time()
+        self.stats = dict()
+        graph = await asyncio.to_thread(self.build_graph, data_dir, max_files)
+        self.stats["build_elapsed"] = round(time.time() - start_time, 3)
+        self.stats["duplicate_libraries"] = graph.duplicate_count
+        label_ids, first_entry_ids = dict(), dict()
+        async with DbService.connection() as conn:
+            async with conn.transaction():
+                async with conn.cursor() as cursor:
+                    await cursor.execute(
+                        "SELECT set_config('statement_timeout', '0', true);"
+                    )
+                    labels = await self.ensure_graph_and_labels(cursor)
+                    for label in list(VERTEX_LABELS) + list(EDGE_LABELS.keys()):
+                        await cursor.execute(
+                            sql.SQL("LOCK TABLE {} IN EXCLUSIVE MODE").format(
+                                sql.Identifier(self.graphname, label)
+                            )
+                        )
+
+                    vertex_start = time.time()
+                    vertex_count = 0
+                    for label in VERTEX_LABELS:
+                        label_id, seq = labels[label]
+                        first = await self.reserve_entry_ids(
+                            cursor, seq, graph.vertex_count(label)
+                        )
+                        label_ids[label], first_entry_ids[label] = label_id, first
+                        rows = graph.vertex_rows(label, label_id, first)
+                        count = await self.copy_rows(cursor, label, False, rows)
+                        self.stats["{}_vertices".format(label)] = count
+                        vertex_count = vertex_count + count
+                    vertex_elapsed = time.time() - vertex_start
+
+                    edge_start = time.time()
+                    edge_count = 0
+                    for label in EDGE_LABELS.keys():
+                        label_id, seq = labels[label]
+                        first = await self.reserve_entry_ids(
+                            cursor, seq, graph.edge_count(label)
+                        )
+                        rows = graph.edge_rows(
+                            label, label_id, first, label_ids, first_entry_ids
+                        )
+                        count = await self.copy_rows(cursor, label, True, rows)
+                        self.stats["{}_edges".format(label)] = count
+                        edge_count = edge_count + count
+                    edge_elapsed = time.time() - edge_start
+
+        self.stats["vertices"] = vertex_count
+        self.stats["edges"] = edge_count
+        self.stats["vertex_elapsed"] = round(vertex_elapsed, 3)
+        self.stats["edge_elapsed"] = round(edge_elapsed, 3)
+        self.stats["vertices_per_second"] = round(
+            vertex_count / max(vertex_elapsed, 0.000001), 1
+        )
+        self.stats["edges_per_second"] = round(
+            edge_count / max(edge_elapsed, 0.000001), 1
+        )
+        self.stats["elapsed"] = round(time.time() - start_time, 3)
+        logging.info("GraphLoader#load, stats: {}".format(self.stats))
+        return self.stats
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import re
+import time
+
+from src.services.db_service import DbService
+from src.services.vector_search_service import MAX_K, VectorSearchService
+from src.util.rank_fusion import DEFAULT_RRF_K, RankFusion
+
+# This class executes hybrid searches of the libraries table; a full-text
+# search of the generated search_tsv column (name, keywords and description,
+# weighted A, B and C) with its GIN index, and a pgvector k-NN search.
+# The two queries run concurrently on separate pooled connections, and
+# their rankings are fused with Reciprocal Rank Fusion.  A library whose
+# name exactly matches the text is ranked first by the full-text query.
+#
+# In "keyword" mode, and in the default "auto" mode for short identifier-like
+# queries such as a package name, only the full-text query runs, so the
+# embedding of the text is never requested from Azure OpenAI.
+
+MODES = ("hybrid", "keyword", "vector", "auto")
+
+KEYWORD_QUERY_PATTERN = re.compile(r"^[\w.\-]+(\s+[\w.\-]+)?$")
+
+FTS_SQL = """
+select name, libtype, license, release_count, keywords, description,
+  ts_rank(search_tsv, query) as fts_rank
+from libraries, websearch_to_tsquery('english', %(text)s) query
+where search_tsv @@ query
+order by (lower(name) = lower(%(text)s)) desc, fts_rank desc
+limit %(limit)s
+""".strip()
+
+
+class HybridSearchService:
+
+    def __init__(
+        self,
+        ai_svc=None,
+        k: int = 10,
+        mode: str = "auto",
+        preset: str = "balanced",
+        candidates: int | None = None,
+        rrf_k: int = DEFAULT_RRF_K,
+    ):
+        """
+        ai_svc is the AsyncAiService used to embed the text in the hybrid
+        and vector modes.  candidates is the number of rows requested from
+        each query before fusion, by default the greater of 4 * k and 40.
+        """
+        if mode not in MODES:
+            raise ValueError("invalid mode: {}".format(mode))
+        self.ai_svc = ai_svc
+        self.k = min(max(k, 1), MAX_K)
+        self.mode = mode
+        if candidates is None:
+            candidates = max(4 * self.k, 40)
+        self.candidates = min(max(candidates, self.k), MAX_K)
+        self.vector_svc = VectorSearchService(k=self.candidates, preset=preset)
+        self.rrf_k = rrf_k
+
+    @classmethod
+    def is_keyword_query(cls, text: str) -> bool:
+        """
+        Return True if the given text looks like a package name or keyword,
+        one or two identifier-like words, rather than a natural language phrase.
+        """
+        return KEYWORD_QUERY_PATTERN.match(text.strip()) is not None
+
+    def effective_mode(self, text: str) -> str:
+        if self.mode == "auto":
+            if self.is_keyword_query(text):
+                return "keyword"
+            return "hybrid"
+        return self.mode
+
+    async def fts_search(self, text: str) -> list[dict]:
+        async with DbService.connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(
+                    FTS_SQL, {"text": text, "limit": self.candidates}, prepare=True
+                )
+                names = [col.name for col in cursor.description]
+                return [dict(zip(names, row)) for row in await cursor.fetchall()]
+
+    async def vector_search(self, text: str) -> list[dict]:
+        resp = await self.ai_svc.agenerate_embeddings(text)
+        if resp is None:
+            raise ValueError("unable to generate the embedding of the text")
+        result = await self.vector_svc.search(embedding=resp.data[0].embedding)
+        return result["rows"]
+
+    async def search(self, text: str) -> dict:
+        """
+        Execute the search for the given text.  Return a dict with the fused
+        rows, each with its rrf_score and its ranks in the underlying lists.
+        """
+        start_time = time.time()
+        mode = self.effective_mode(text)
+        ranked_lists = dict()
+        if mode == "keyword":
+            ranked_lists["fts"] = await self.fts_search(text)
+        elif mode == "vector":
+            ranked_lists["vector"] = await self.vector_search(text)
+        else:
+            fts_rows, vector_rows = await asyncio.gather(
+                self.fts_search(text), self.vector_search(text)
+            )
+            ranked_lists["fts"] = fts_rows
+            ranked_lists["vector"] = vector_rows
+        rows = RankFusion.reciprocal_rank_fusion(
+            ranked_lists, "name", self.rrf_k, self.k
+        )
+        result = dict()
+        result["text"] = text
+        result["k"] = self.k
+        result["mode"] = mode
+        result["counts"] = {name: len(lst) for name, lst in ranked_lists.items()}
+        result["rows"] = rows
+        result["elapsed"] = time.time() - start_time
+        logging.info(
+            "HybridSearchService#search mode: {} counts: {} elapsed: {}".format(
+                mode, result["counts"], result["elapsed"]
+            )
+        )
+        return result
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+import traceback
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from psycopg import sql
+from psycopg.types.json import Jsonb
+
+from src.services.db_service import DbService
+from src.util.library_docs import COPY_COLUMNS, COPY_TYPES, LibraryDocs
+from src.util.library_ingest import DEFAULT_CHUNK_SIZE, LibraryIngest, read_docs_chunk
+
+# This class bulk loads the wrangled PyPI library JSON documents into the
+# libraries table with a single COPY libraries FROM STDIN (FORMAT BINARY)
+# statement, streamed via psycopg cursor.copy().  This replaces the
+# intermediate TSV file and the manual psql \copy step; the embeddings are
+# written in the pgvector binary format rather than as 1536 decimal strings.
+#
+# The files are parsed and transformed into rows in chunks by the process
+# pool of the shared LibraryIngest stage, while the rows are written to the
+# COPY stream in file order.  At most window chunks are in flight at any
+# time, so memory is bounded regardless of the number of files.  Progress
+# and throughput are logged every progress_interval rows.
+
+DEFAULT_MAX_FILES = 50000
+
+
+class LibraryLoader:
+
+    def __init__(
+        self,
+        concurrency: int = 8,
+        window: int | None = None,
+        progress_interval: int = 1000,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        """
+        concurrency is the number of reader processes, and window is the
+        maximum number of chunks of chunk_size files read ahead of the COPY
+        stream, by default 2 * concurrency.
+        """
+        self.ingest = LibraryIngest(concurrency, chunk_size, window)
+        self.concurrency = self.ingest.workers
+        self.window = self.ingest.max_pending
+        self.progress_interval = max(progress_interval, 1)
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.ingest.reset_stats()
+        self.rows_written = 0
+        self.start_time = time.time()
+
+    @classmethod
+    def copy_sql(cls, table: str = "libraries"):
+        return sql.SQL("COPY {} ({}) FROM STDIN (FORMAT BINARY)").format(
+            sql.Identifier(table),
+            sql.SQL(", ").join([sql.Identifier(c) for c in COPY_COLUMNS]),
+        )
+
+    def get_stats(self) -> dict:
+        elapsed = max(time.time() - self.start_time, 0.000001)
+        stats = dict()
+        stats["files_read"] = self.ingest.files_read
+        stats["rows_written"] = self.rows_written
+        stats["rows_skipped"] = self.ingest.invalid_count
+        stats["errors"] = self.ingest.errors
+        stats["mb_read"] = round(self.ingest.bytes_read / (1024 * 1024), 3)
+        stats["elapsed"] = round(elapsed, 3)
+        stats["files_per_second"] = round(self.ingest.files_read / elapsed, 1)
+        stats["rows_per_second"] = round(self.rows_written / elapsed, 1)
+        stats["mb_per_second"] = round(stats["mb_read"] / elapsed, 3)
+        return stats
+
+    def log_progress(self) -> None:
+        stats = self.get_stats()
+        logging.info(
+            "LibraryLoader#load, rows: {} files: {} mb: {} rows/s: {} files/s: {} mb/s: {}".format(
+                stats["rows_written"],
+                stats["files_read"],
+                stats["mb_read"],
+                stats["rows_per_second"],
+                stats["files_per_second"],
+                stats["mb_per_second"],
+            )
+        )
+
+    async def write_next(self, copy, pending: deque) -> None:
+        chunk, future = pending.popleft()
+        for row in self.ingest.record_chunk(chunk, await future):
+            await copy.write_row(row[0:-1] + (Jsonb(row[-1]),))
+            self.rows_written = self.rows_written + 1
+            if (self.rows_written % self.progress_interval) == 0:
+                self.log_progress()
+
+    async def load(
+        self,
+        data_dir: str,
+        max_files: int = DEFAULT_MAX_FILES,
+        table: str = "libraries",
+    ) -> dict:
+        """
+        Load the JSON documents in the given directory into the given table,
+        in one transaction, and return the load statistics.
+        """
+        self.reset_stats()
+        paths = self.ingest.list_files(data_dir, max_files)
+        logging.info(
+            "LibraryLoader#load, data_dir: {} files: {} concurrency: {} window: {}".format(
+                data_dir, len(paths), self.concurrency, self.window
+            )
+        )
+        loop = asyncio.get_running_loop()
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=self.concurrency) as executor:
+            try:
+                async with DbService.connection() as conn:
+                    async with conn.transaction():
+                        async with conn.cursor() as cursor:
+                            await cursor.execute(
+                                "SELECT set_config('statement_timeout', '0', true);"
+                            )
+                            async with cursor.copy(self.copy_sql(table)) as copy:
+                                copy.set_types(COPY_TYPES)
+                                for chunk in self.ingest.chunks(paths):
+                                    future = loop.run_in_executor(
+                                        executor,
+                                        read_docs_chunk,
+                                        chunk,
+                                        None,
+                                        LibraryDocs.to_copy_row,
+                                    )
+                                    pending.append((chunk, future))
+                                    if len(pending) >= self.window:
+                                        await self.write_next(copy, pending)
+                                while len(pending) > 0:
+                                    await self.write_next(copy, pending)
+            except Exception as e:
+                logging.error("LibraryLoader#load - exception: {}".format(str(e)))
+                logging.error(traceback.format_exc())
+                for chunk, future in pending:
+                    future.cancel()
+                raise
+        self.log_progress()
+        return self.get_stats()
@@ -0,0 +1,142 @@
+import json
+import logging
+import time
+import uuid
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
+
+from src.services.config_service import ConfigService
+from src.services.db_service import DbService
+from src.util.query_result_parser import QueryResultParser
+
+# This class streams the results of a query console statement as
+# newline-delimited JSON (NDJSON).  SELECT statements, including the
+# Apache AGE "SELECT * FROM cypher(...)" statements, are read with a named
+# server-side cursor so that only one itersize chunk of rows is in memory
+# at a time.  Each chunk is parsed and yielded to the ASGI server before
+# the next chunk is fetched, so a slow client applies backpressure all the
+# way to PostgreSQL.  Row and byte caps bound the size of each response.
+
+SERVER_CURSOR_PREFIXES = ("select", "with", "values", "table")
+
+
+class QueryStreamService:
+
+    def __init__(
+        self,
+        max_rows: int | None = None,
+        max_bytes: int | None = None,
+        itersize: int | None = None,
+    ):
+        """
+        The given caps may lower, but not raise, the configured
+        AIG4PG_QUERY_MAX_ROWS and AIG4PG_QUERY_MAX_BYTES values.
+        """
+        self.max_rows = self.capped(max_rows, ConfigService.query_max_rows())
+        self.max_bytes = self.capped(max_bytes, ConfigService.query_max_bytes())
+        self.itersize = self.capped(itersize, ConfigService.query_itersize())
+        self.parser = QueryResultParser()
+        self.rows = 0
+        self.bytes = 0
+        self.truncated = False
+        self.error = None
+
+    def capped(self, requested: int | None, configured: int) -> int:
+        if requested is None or requested < 1:
+            return configured
+        return min(requested, configured)
+
+    @classmethod
+    def normalize_statement(cls, stmt: str) -> str:
+        """Remove CRLF sequences and any trailing semicolons."""
+        return stmt.replace("\r\n", " ").strip().rstrip(";").strip()
+
+    @classmethod
+    def uses_server_cursor(cls, stmt: str) -> bool:
+        """
+        Return True if the given statement can be declared as a server-side
+        cursor; statements like SET or CREATE are executed normally.
+        """
+        return stmt.lstrip().lower().startswith(SERVER_CURSOR_PREFIXES)
+
+    def dumps(self, obj) -> bytes:
+        if orjson is not None:
+            try:
+                return orjson.dumps(obj, default=str) + b"\n"
+            except TypeError:
+                pass  # for example, an int larger than 64 bits
+        return (json.dumps(obj, separators=(",", ":"), default=str) + "\n").encode(
+            "utf-8"
+        )
+
+    def encode_rows(self, rows: list) -> bytes:
+        """
+        Parse and encode the given rows as NDJSON lines, stopping when
+        either the row cap or the byte cap is reached.
+        """
+        lines = list()
+        for row in rows:
+            if self.rows >= self.max_rows:
+                self.truncated = True
+                break
+            line = self.dumps(self.parser.parse(row))
+            if self.bytes + len(line) > self.max_bytes:
+                self.truncated = True
+                break
+            lines.append(line)
+            self.rows = self.rows + 1
+            self.bytes = self.bytes + len(line)
+        return b"".join(lines)
+
+    def summary(self, elapsed: float) -> dict:
+        summary = dict()
+        summary["rows"] = self.rows
+        summary["bytes"] = self.bytes
+        summary["truncated"] = self.truncated
+        summary["max_rows"] = self.max_rows
+        summary["max_bytes"] = self.max_bytes
+        summary["elapsed"] = elapsed
+        if self.error is not None:
+            summary["error"] = self.error
+        return summary
+
+    async def stream(self, query_text: str):
+        """
+        Async generator which yields NDJSON chunks of parsed rows for the
+        given statement, followed by a final {"__summary": {...}} line.
+        """
+        start_time = time.time()
+        stmt = self.normalize_statement(query_text)
+        try:
+            async with DbService.connection() as conn:
+                if self.uses_server_cursor(stmt):
+                    # named cursors must be used within a transaction
+                    async with conn.transaction():
+                        name = "aig4pg_stream_{}".format(uuid.uuid4().hex)
+                        async with conn.cursor(name=name) as cursor:
+                            cursor.itersize = self.itersize
+                            await cursor.execute(stmt)
+                            async for chunk in self.fetch_chunks(cursor):
+                                yield chunk
+                else:
+                    async with conn.cursor() as cursor:
+                        await cursor.execute(stmt)
+                        if cursor.description is not None:
+                            async for chunk in self.fetch_chunks(cursor):
+                                yield chunk
+        except Exception as e:
+            logging.critical("QueryStreamService#stream: {}".format(str(e)))
+            self.error = str(e)
+        yield self.dumps({"__summary": self.summary(time.time() - start_time)})
+
+    async def fetch_chunks(self, cursor):
+        while not self.truncated:
+            rows = await cursor.fetchmany(self.itersize)
+            if len(rows) == 0:
+                break
+            chunk = self.encode_rows(rows)
+            if len(chunk) > 0:
+                yield chunk
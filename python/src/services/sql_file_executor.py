@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import os
+import time
+
+from src.services.db_service import DbService
+from src.util.fs import FS
+from src.util.latency_stats import LatencyStats
+from src.util.sql_statement_reader import PHASE_SESSION, SqlStatementReader
+
+# This class executes the statements of a large plain or zipped .sql file,
+# such as the generated Cypher load files of this project, rather than
+# feeding them to psql one statement per round trip.  The statements are
+# streamed and grouped into transactions of up to commit_size statements,
+# and each group is executed in psycopg pipeline mode, so the statements
+# of a group are sent without waiting for the results of the previous ones.
+#
+# Up to `connections` groups execute concurrently, each on its own pooled
+# connection.  Groups never span load phases, and each phase (for example
+# the vertices, then the edges that MATCH them) completes before the next
+# one starts.  The file's SET statements are applied to each group as
+# SET LOCAL, so they never leak into the other users of the pool.
+# Apache AGE creates a missing label when a Cypher CREATE first uses it,
+# and concurrent transactions that create the same label conflict; so a
+# group that references a label not yet seen in this load runs alone, and
+# commits, before the groups that follow it fan out again.
+#
+# The committed statement ranges are recorded in a JSON checkpoint file, so
+# an interrupted load resumes where it left off; the statement numbers are
+# stable because the file is read in the same order each time.
+
+
+class SqlFileExecutor:
+
+    def __init__(
+        self,
+        connections: int = 4,
+        commit_size: int = 500,
+        checkpoint_file: str | None = None,
+    ):
+        self.connections = max(connections, 1)
+        self.commit_size = max(commit_size, 1)
+        self.checkpoint_file = checkpoint_file
+        self.reset()
+
+    def reset(self) -> None:
+        self.committed_prefix = 0  # all statements before this index are committed
+        self.committed_ranges = list()  # committed [start, end) ranges beyond it
+        self.session_statements = list()
+        self.statements_executed = 0
+        self.statements_skipped = 0
+        self.group_latencies = list()
+        self.phases = list()
+        self.labels = set()  # the (graph, label) tuples of the committed groups
+
+    @classmethod
+    def default_checkpoint_file(cls, path: str) -> str:
+        return "tmp/execute_sql_file_{}.checkpoint.json".format(os.path.basename(path))
+
+    def load_checkpoint(self, path: str) -> None:
+        if self.checkpoint_file is None or not os.path.isfile(self.checkpoint_file):
+            return
+        checkpoint = FS.read_json(self.checkpoint_file)
+        if checkpoint.get("path") != path:
+            logging.warning(
+                "SqlFileExecutor, ignoring the checkpoint of {}".format(
+                    checkpoint.get("path")
+                )
+            )
+            return
+        self.committed_prefix = checkpoint["committed_prefix"]
+        self.committed_ranges = [tuple(r) for r in checkpoint["committed_ranges"]]
+        logging.info(
+            "SqlFileExecutor, resuming after statement {}".format(self.committed_prefix)
+        )
+
+    def save_checkpoint(self, path: str) -> None:
+        if self.checkpoint_file is None:
+            return
+        checkpoint = dict()
+        checkpoint["path"] = path
+        checkpoint["committed_prefix"] = self.committed_prefix
+        checkpoint["committed_ranges"] = self.committed_ranges
+        tmp_file = self.checkpoint_file + ".tmp"
+        FS.write_json(checkpoint, tmp_file, pretty=False, verbose=False)
+        os.replace(tmp_file, self.checkpoint_file)
+
+    def is_committed(self, index: int) -> bool:
+        if index < self.committed_prefix:
+            return True
+        for start, end in self.committed_ranges:
+            if start <= index < end:
+                return True
+        return False
+
+    def record_commit(self, start: int, end: int) -> None:
+        """Record the committed range, and advance the committed prefix."""
+        self.committed_ranges.append((start, end))
+        self.committed_ranges.sort()
+        remaining = list()
+        for range_start, range_end in self.committed_ranges:
+            if range_start <= self.committed_prefix:
+                self.committed_prefix = max(self.committed_prefix, range_end)
+            else:
+                remaining.append((range_start, range_end))
+        self.committed_ranges = remaining
+
+    def groups(self, path: str):
+        """
+        Yield the (phase, start index, statements) groups of the file,
+        skipping the committed statements and collecting the SET statements.
+        """
+        phase, start, statements = None, 0, list()
+        for index, statement in enumerate(SqlStatementReader.read_statements(path)):
+            stmt_phase = SqlStatementReader.phase(statement)
+            if stmt_phase == PHASE_SESSION:
+                # each group starts with the session statements
+                self.session_statements.append(
+                    SqlStatementReader.local_session_statement(statement)
+                )
+                self.record_commit(index, index + 1)
+                continue
+            if stmt_phase != phase:
+                if len(statements) > 0:
+                    yield phase, start, statements
+                    statements = list()
+                phase = stmt_phase
+                yield phase, index, list()  # an empty group starts each phase
+            if self.is_committed(index):
+                self.statements_skipped = self.statements_skipped + 1
+                if len(statements) > 0:
+                    yield phase, start, statements
+                    statements = list()
+                continue
+            if len(statements) == 0:
+                start = index
+            statements.append(statement)
+            if len(statements) >= self.commit_size:
+                yield phase, start, statements
+                statements = list()
+        if len(statements) > 0:
+            yield phase, start, statements
+
+    async def execute_group(self, path: str, start: int, statements: list) -> None:
+        group_start = time.perf_counter()
+        async with DbService.connection() as conn:
+            async with conn.transaction():
+                async with conn.cursor() as cursor:
+                    async with conn.pipeline():
+                        for statement in self.session_statements:
+                            await cursor.execute(statement, prepare=False)
+                        for statement in statements:
+                            await cursor.execute(statement)
+        self.group_latencies.append((time.perf_counter() - group_start) * 1000.0)
+        self.statements_executed = self.statements_executed + len(statements)
+        self.record_commit(start, start + len(statements))
+        self.save_checkpoint(path)
+
+    async def execute(self, path: str, resume: bool = True) -> dict:
+        """
+        Execute the statements of the given file, resuming from its
+        checkpoint if resume is True, and return the execution statistics.
+        """
+        self.reset()
+        if resume:
+            self.load_checkpoint(path)
+        else:
+            self.save_checkpoint(path)
+        start_time = time.time()
+        current_phase, pending = None, set()
+        try:
+            for phase, start, statements in self.groups(path):
+                if phase != current_phase:
+                    # a phase barrier; the previous phase must complete first
+                    if len(pending) > 0:
+                        await asyncio.gather(*pending)
+                        pending = set()
+                    current_phase = phase
+                    self.phases.append(phase)
+                    logging.info("SqlFileExecutor, phase: {}".format(phase))
+                if len(statements) == 0:
+                    continue
+                labels = set()
+                for statement in statements:
+                    labels.update(SqlStatementReader.labels(statement))
+                if not labels.issubset(self.labels):
+                    # the group may create labels; run it alone
+                    if len(pending) > 0:
+                        await asyncio.gather(*pending)
+                        pending = set()
+                    await self.execute_group(path, start, statements)
+                    self.labels.update(labels)
+                    continue
+                if len(pending) >= self.connections:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        task.result()  # raise the first failure
+                pending.add(
+                    asyncio.create_task(self.execute_group(path, start, statements))
+                )
+            if len(pending) > 0:
+                await asyncio.gather(*pending)
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            logging.error(
+                "SqlFileExecutor, stopped; committed through statement {}".format(
+                    self.committed_prefix
+                )
+            )
+            raise
+        elapsed = max(time.time() - start_time, 0.000001)
+        stats = dict()
+        stats["path"] = path
+        stats["connections"] = self.connections
+        stats["commit_size"] = self.commit_size
+        stats["phases"] = self.phases
+        stats["statements_executed"] = self.statements_executed
+        stats["statements_skipped"] = self.statements_skipped
+        stats["groups"] = len(self.group_latencies)
+        stats["elapsed"] = round(elapsed, 3)
+        stats["statements_per_second"] = round(self.statements_executed / elapsed, 1)
+        stats["group_ms"] = LatencyStats.summary(self.group_latencies)
+        logging.info("SqlFileExecutor#execute, stats: {}".format(stats))
+        return stats
@@ -0,0 +1,223 @@
+import logging
+import time
+
+from src.services.db_service import DbService
+from src.util.vector_adapter import Vector
+
+# This class executes tunable vector searches of the libraries table.
+# Each search requests k rows, with a recall/latency preset that sets the
+# ivfflat.probes and hnsw.ef_search values, and optional metadata filters
+# (libtype, license, and a release_count range).  The settings are applied
+# with set_config(..., true), the parameterized equivalent of SET LOCAL,
+# within the transaction of the search, so they never leak into the other
+# users of the pooled connection.
+#
+# A filtered k-NN search of an approximate index may return fewer than k
+# rows, as the filter is applied after the index returns its candidates.
+# With pgvector 0.8.0+ the "iterative" strategy enables iterative index
+# scans, which keep scanning until k rows pass the filter; the results are
+# then re-sorted, as relaxed_order may return them slightly out of order.
+# The "prefilter" strategy instead applies the filters in a materialized
+# CTE and computes the exact distances of the remaining rows, which is fast
+# for selective filters and works with any pgvector version.
+
+MAX_K = 1000
+
+# preset name -> (ivfflat.probes, hnsw.ef_search); "exact" disables index scans
+PRESETS = {
+    "fast": (4, 40),
+    "balanced": (10, 100),
+    "accurate": (40, 400),
+    "exact": (None, None),
+}
+
+FILTER_STRATEGIES = ("auto", "iterative", "prefilter")
+
+RESULT_COLUMNS = "name, libtype, license, release_count, keywords, description"
+
+
+class VectorSearchService:
+
+    pgvector_version = None  # cached (major, minor, patch) tuple
+
+    def __init__(
+        self,
+        k: int = 10,
+        preset: str = "balanced",
+        libtype: str | None = None,
+        license: str | None = None,
+        min_release_count: int | None = None,
+        max_release_count: int | None = None,
+        filter_strategy: str = "auto",
+    ):
+        if preset not in PRESETS:
+            raise ValueError("invalid preset: {}".format(preset))
+        if filter_strategy not in FILTER_STRATEGIES:
+            raise ValueError("invalid filter_strategy: {}".format(filter_strategy))
+        self.k = min(max(k, 1), MAX_K)
+        self.preset = preset
+        self.filters = dict()
+        if libtype is not None:
+            self.filters["libtype"] = libtype
+        if license is not None:
+            self.filters["license"] = license
+        if min_release_count is not None:
+            self.filters["min_release_count"] = min_release_count
+        if max_release_count is not None:
+            self.filters["max_release_count"] = max_release_count
+        self.filter_strategy = filter_strategy
+
+    @classmethod
+    def parse_version(cls, version: str) -> tuple:
+        parts = list()
+        for part in version.split(".")[0:3]:
+            digits = "".join([c for c in part if c.isdigit()])
+            parts.append(int(digits) if len(digits) > 0 else 0)
+        while len(parts) < 3:
+            parts.append(0)
+        return tuple(parts)
+
+    @classmethod
+    def supports_iterative_scan(cls, version: tuple | None) -> bool:
+        return version is not None and version >= (0, 8, 0)
+
+    def strategy(self, version: tuple | None) -> str:
+        """Return the filter strategy to use with the given pgvector version."""
+        if len(self.filters) == 0:
+            return "none"
+        if self.filter_strategy == "auto":
+            if self.supports_iterative_scan(version):
+                return "iterative"
+            return "prefilter"
+        return self.filter_strategy
+
+    def settings(self, strategy: str) -> dict:
+        """Return the transaction-local settings (GUCs) for the search."""
+        settings = dict()
+        probes, ef_search = PRESETS[self.preset]
+        if probes is None:
+            settings["enable_indexscan"] = "off"
+        else:
+            settings["ivfflat.probes"] = str(probes)
+            settings["hnsw.ef_search"] = str(max(ef_search, self.k))
+        if strategy == "iterative":
+            settings["hnsw.iterative_scan"] = "relaxed_order"
+            settings["ivfflat.iterative_scan"] = "relaxed_order"
+        return settings
+
+    def where_clause(self, library: str | None) -> str:
+        """Return the WHERE clause for the filters, with named parameters."""
+        conditions = ["embedding is not null"]
+        if library is not None:
+            # exclude the library itself, and return no rows if it doesn't exist
+            conditions.append("name <> %(library)s")
+            conditions.append(
+                "exists (select 1 from libraries where name = %(library)s)"
+            )
+        if "libtype" in self.filters:
+            conditions.append("libtype = %(libtype)s")
+        if "license" in self.filters:
+            conditions.append("license = %(license)s")
+        if "min_release_count" in self.filters:
+            conditions.append("release_count >= %(min_release_count)s")
+        if "max_release_count" in self.filters:
+            conditions.append("release_count <= %(max_release_count)s")
+        return " and ".join(conditions)
+
+    def search_sql(self, strategy: str, library: str | None = None) -> str:
+        """
+        Return the search SQL for the given strategy.  The query vector is
+        either the binary %(embedding)b parameter, or the embedding of the
+        given library, read by a scalar subquery.
+        """
+        if library is None:
+            vector = "%(embedding)b"
+        else:
+            vector = (
+                "(select embedding from libraries where name = %(library)s limit 1)"
+            )
+        where = self.where_clause(library)
+        if strategy == "prefilter":
+            return (
+                "with candidates as materialized "
+                + "(select {}, embedding from libraries where {}) ".format(
+                    RESULT_COLUMNS, where
+                )
+                + "select {}, embedding <-> {} as distance ".format(
+                    RESULT_COLUMNS, vector
+                )
+                + "from candidates order by distance limit %(k)s"
+            )
+        sql = "select {}, embedding <-> {} as distance ".format(
+            RESULT_COLUMNS, vector
+        ) + "from libraries where {} order by distance limit %(k)s".format(where)
+        if strategy == "iterative":
+            # re-sort the relaxed_order results of the iterative index scan
+            return (
+                "with results as materialized ({}) ".format(sql)
+                + "select * from results order by distance"
+            )
+        return sql
+
+    def params(self, embedding: list[float] | None, library: str | None) -> dict:
+        params = dict(self.filters)
+        params["k"] = self.k
+        if library is None:
+            params["embedding"] = Vector(embedding)
+        else:
+            params["library"] = library
+        return params
+
+    async def get_pgvector_version(self, cursor) -> tuple | None:
+        if VectorSearchService.pgvector_version is None:
+            await cursor.execute(
+                "select extversion from pg_extension where extname = 'vector'"
+            )
+            row = await cursor.fetchone()
+            if row is not None:
+                VectorSearchService.pgvector_version = self.parse_version(row[0])
+        return VectorSearchService.pgvector_version
+
+    async def search(
+        self, embedding: list[float] | None = None, library: str | None = None
+    ) -> dict:
+        """
+        Execute the search with the given embedding, or for the libraries
+        similar to the given library name.  Return a dict with the rows,
+        as dicts, and the strategy and settings used.
+        """
+        start_time = time.time()
+        result = dict()
+        async with DbService.connection() as conn:
+            async with conn.transaction():
+                async with conn.cursor() as cursor:
+                    strategy = self.strategy(await self.get_pgvector_version(cursor))
+                    settings = self.settings(strategy)
+                    for name, value in settings.items():
+                        await cursor.execute(
+                            "SELECT set_config(%s, %s, true);", (name, value)
+                        )
+                    # the plan of a prepared statement may be reused by
+                    # later searches, so that the enable_indexscan setting
+                    # of the "exact" preset is only honored if not prepared
+                    await cursor.execute(
+                        self.search_sql(strategy, library),
+                        self.params(embedding, library),
+                        prepare=(self.preset != "exact"),
+                    )
+                    names = [col.name for col in cursor.description]
+                    rows = [dict(zip(names, row)) for row in await cursor.fetchall()]
+        result["k"] = self.k
+        result["preset"] = self.preset
+        result["filters"] = self.filters
+        result["strategy"] = strategy
+        result["settings"] = settings
+        result["rows"] = rows
+        result["elapsed"] = time.time() - start_time
+        if len(rows) < self.k:
+            logging.info(
+                "VectorSearchService#search returned {} of {} rows".format(
+                    len(rows), self.k
+                )
+            )
+        return result
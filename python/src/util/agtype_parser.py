@@ -0,0 +1,213 @@
+import json
+import re
+
+from decimal import Decimal
+
+from typing import NamedTuple
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
+
+# This class decodes the text form of Apache AGE agtype values, such as
+# '{"id": 1, "label": "Library", "properties": {...}}::vertex', edges,
+# paths ('[{...}::vertex, {...}::edge, {...}::vertex]::path'), nested
+# lists and maps, and '::numeric' values.
+#
+# The '::vertex', '::edge' and '::path' suffixes always follow a closing
+# brace or bracket, so they are removed with fast str.replace() calls; a
+# compiled regular expression removes '::numeric' suffixes when present.
+# The fast path is only taken when no quoted string literal contains such a
+# suffix sequence, which is checked cheaply by counting the quotes before
+# each sequence; otherwise the string-literal-aware pattern, which copies
+# every quoted string through unchanged, is used so that property values
+# are never altered.  The result is decoded with orjson, if installed, or the
+# standard json module.  By default '::numeric' values are returned as
+# float, like the other numbers, so that the results remain serializable
+# with json.dumps; note that a float holds only about 15 significant digits.
+# With numeric_as_decimal=True, values with a '::numeric' suffix are decoded
+# with the standard json module as decimal.Decimal, so that their precision
+# is not lost; the other floats of such a value are then also Decimal.
+# Vertices, edges and paths are recognized by their structure, and can
+# optionally be returned as the Vertex, Edge and Path named tuples.
+
+NUMERIC_SUFFIX_PATTERN = re.compile(r"::numeric(?=[\s,\]}]|$)")
+
+SUFFIX_SEQUENCE_PATTERN = re.compile(r"::(?:vertex|edge|path|numeric)")
+
+AGTYPE_SUFFIX_OUTSIDE_STRINGS_PATTERN = re.compile(
+    r'("[^"\\]*(?:\\.[^"\\]*)*")|::(?:vertex|edge|path|numeric)'
+)
+
+
+class Vertex(NamedTuple):
+    id: int
+    label: str
+    properties: dict
+
+
+class Edge(NamedTuple):
+    id: int
+    label: str
+    start_id: int
+    end_id: int
+    properties: dict
+
+
+class Path(NamedTuple):
+    elements: list
+
+
+class AgtypeParser:
+
+    @classmethod
+    def has_agtype_suffix(cls, s: str) -> bool:
+        """Return True if the given str appears to contain an agtype suffix."""
+        return "::" in s
+
+    @classmethod
+    def has_suffix_text_in_strings(cls, s: str) -> bool:
+        """
+        Return True if a quoted string literal of the given agtype text may
+        contain a '::vertex', '::edge', '::path' or '::numeric' sequence, so
+        that strip_suffixes_outside_strings() is required.  A sequence is
+        within a string literal if an odd number of quotes precede it; text
+        with escaped quotes is conservatively reported as True.
+        """
+        match = SUFFIX_SEQUENCE_PATTERN.search(s)
+        if match is None or s.rfind('"') < match.start():
+            return False  # no sequence precedes the last quote
+        if '\\"' in s:
+            return True
+        quotes, start = 0, 0
+        for match in SUFFIX_SEQUENCE_PATTERN.finditer(s):
+            quotes = quotes + s.count('"', start, match.start())
+            if quotes % 2 == 1:
+                return True
+            start = match.start()
+        return False
+
+    @classmethod
+    def strip_suffixes(cls, s: str) -> str:
+        """Remove the agtype '::type' suffixes, leaving valid JSON text."""
+        if cls.has_suffix_text_in_strings(s):
+            return cls.strip_suffixes_outside_strings(s)
+        s = s.replace("}::vertex", "}").replace("}::edge", "}").replace("]::path", "]")
+        if "::numeric" in s:
+            s = NUMERIC_SUFFIX_PATTERN.sub("", s)
+        return s
+
+    @classmethod
+    def strip_suffixes_outside_strings(cls, s: str) -> str:
+        """
+        Remove the agtype '::type' suffixes, copying the quoted string
+        literals through unchanged; slower than strip_suffixes().
+        """
+        return AGTYPE_SUFFIX_OUTSIDE_STRINGS_PATTERN.sub(r"\1", s)
+
+    @classmethod
+    def loads(cls, jstr: str):
+        """
+        Decode the given JSON str with orjson if available.  The standard json
+        module is used as the fallback, as it also accepts the NaN and
+        Infinity float values that AGE may return.
+        """
+        if orjson is not None:
+            try:
+                return orjson.loads(jstr)
+            except orjson.JSONDecodeError:
+                pass
+        return json.loads(jstr)
+
+    @classmethod
+    def parse(cls, s: str, numeric_as_decimal: bool = False):
+        """
+        Parse the given agtype text into plain JSON-compatible values;
+        vertices and edges become dicts, and paths become lists.  Numeric
+        values become float, or Decimal if numeric_as_decimal is True.
+        The body of strip_suffixes() is inlined here as this is the
+        per-row hot path of the query console.
+        """
+        if cls.has_suffix_text_in_strings(s):
+            jstr = cls.strip_suffixes_outside_strings(s)
+        else:
+            jstr = (
+                s.replace("}::vertex", "}")
+                .replace("}::edge", "}")
+                .replace("]::path", "]")
+            )
+            if "::numeric" in jstr:
+                jstr = NUMERIC_SUFFIX_PATTERN.sub("", jstr)
+        if numeric_as_decimal and "::numeric" in s:
+            return json.loads(jstr, parse_float=Decimal)
+        if orjson is not None:
+            try:
+                return orjson.loads(jstr)
+            except orjson.JSONDecodeError:
+                pass
+        return json.loads(jstr)
+
+    @classmethod
+    def parse_typed(cls, s: str, numeric_as_decimal: bool = False):
+        """
+        Parse the given agtype text, returning Vertex, Edge and Path
+        named tuples in place of the vertex, edge and path dicts and lists.
+        """
+        typed = s.rstrip().endswith("::path")
+        return cls.to_typed(cls.parse(s, numeric_as_decimal), typed)
+
+    @classmethod
+    def to_typed(cls, value, is_path: bool = False):
+        if isinstance(value, dict):
+            if cls.is_edge(value):
+                return Edge(
+                    value["id"],
+                    value["label"],
+                    value["start_id"],
+                    value["end_id"],
+                    value.get("properties", {}),
+                )
+            if cls.is_vertex(value):
+                return Vertex(value["id"], value["label"], value.get("properties", {}))
+            return {k: cls.to_typed(v) for k, v in value.items()}
+        if isinstance(value, list):
+            elements = [cls.to_typed(v) for v in value]
+            if is_path or cls.is_path_elements(elements):
+                return Path(elements)
+            return elements
+        return value
+
+    @classmethod
+    def is_path_elements(cls, elements: list) -> bool:
+        """
+        Return True if the given typed elements alternate vertex, edge,
+        vertex, ... as in an AGE path.
+        """
+        if len(elements) < 3 or len(elements) % 2 == 0:
+            return False
+        for idx, elem in enumerate(elements):
+            expected = Vertex if idx % 2 == 0 else Edge
+            if not isinstance(elem, expected):
+                return False
+        return True
+
+    @classmethod
+    def is_vertex(cls, obj) -> bool:
+        return (
+            isinstance(obj, dict)
+            and "id" in obj
+            and "label" in obj
+            and "properties" in obj
+            and "start_id" not in obj
+        )
+
+    @classmethod
+    def is_edge(cls, obj) -> bool:
+        return (
+            isinstance(obj, dict)
+            and "id" in obj
+            and "label" in obj
+            and "start_id" in obj
+            and "end_id" in obj
+        )
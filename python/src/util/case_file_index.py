@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+
+# This class implements the byte-offset index of the cases.sql file, a
+# sidecar .npy file with one (id, offset, length) record per case line,
+# sorted by case id.  The index is written by step 1 of the legal cases
+# wrangling, and it is loaded with np.load(mmap_mode="r"), so that later
+# steps can look up a subset of the cases with a binary search and read
+# only their lines with os.pread, rather than rescanning the whole file.
+
+INDEX_DTYPE = np.dtype([("id", "<i8"), ("offset", "<i8"), ("length", "<i8")])
+
+
+class CaseFileIndex:
+
+    @classmethod
+    def index_file(cls, cases_sql_infile: str) -> str:
+        """Return the default index filename for the given cases file."""
+        return "tmp/{}.idx.npy".format(os.path.basename(cases_sql_infile))
+
+    @classmethod
+    def line_id(cls, line: bytes) -> int | None:
+        """Return the int case id prefix of the given line, or None."""
+        try:
+            return int(line.split(b"\t", 1)[0].strip())
+        except ValueError:
+            return None
+
+    @classmethod
+    def build(cls, ids, offsets, lengths) -> np.ndarray:
+        """Return the index array of the given columns, sorted by id."""
+        index = np.empty(len(ids), dtype=INDEX_DTYPE)
+        index["id"] = ids
+        index["offset"] = offsets
+        index["length"] = lengths
+        index.sort(order="id", kind="stable")
+        return index
+
+    @classmethod
+    def save(cls, index: np.ndarray, index_file: str) -> None:
+        with open(index_file, "wb") as f:
+            np.save(f, index, allow_pickle=False)
+
+    @classmethod
+    def load(cls, index_file: str) -> np.ndarray:
+        return np.load(index_file, mmap_mode="r", allow_pickle=False)
+
+    @classmethod
+    def lookup(cls, index: np.ndarray, ids) -> np.ndarray:
+        """
+        Return the index records of the given case ids, in file order.
+        Ids that are not in the index are ignored.
+        """
+        keys = np.unique(np.asarray([int(id) for id in ids], dtype="<i8"))
+        if len(keys) == 0 or len(index) == 0:
+            return np.empty(0, dtype=INDEX_DTYPE)
+        index_ids = index["id"]
+        left = np.searchsorted(index_ids, keys, side="left")
+        right = np.searchsorted(index_ids, keys, side="right")
+        positions = [np.arange(l, r) for l, r in zip(left, right) if r > l]
+        if len(positions) == 0:
+            return np.empty(0, dtype=INDEX_DTYPE)
+        records = np.asarray(index[np.concatenate(positions)])
+        return records[np.argsort(records["offset"], kind="stable")]
+
+    @classmethod
+    def read_records(cls, cases_sql_infile: str, records: np.ndarray):
+        """
+        Yield the stripped bytes line of each of the given index records,
+        read with os.pread.  Raise a ValueError if a line doesn't start with
+        its id, which means that the index is stale.
+        """
+        fd = os.open(cases_sql_infile, os.O_RDONLY)
+        try:
+            for record in records:
+                line = os.pread(fd, int(record["length"]), int(record["offset"]))
+                line = line.strip()
+                if CaseFileIndex.line_id(line) != int(record["id"]):
+                    raise ValueError(
+                        "stale index for {}, id {} is not at offset {}".format(
+                            cases_sql_infile, record["id"], record["offset"]
+                        )
+                    )
+                yield line
+        finally:
+            os.close(fd)
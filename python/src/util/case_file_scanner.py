@@ -0,0 +1,376 @@
+import json
+import mmap
+import os
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
+
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+
+from src.util.case_file_index import CaseFileIndex
+from src.util.cite_parser import CiteParser
+
+# This class scans the multi-GB cases.sql file of the legal cases data,
+# where each line is a tab-separated (id, case JSON, embedding) row.
+# The file is memory-mapped and split into byte ranges aligned on
+# newlines, and the ranges are scanned by a ProcessPoolExecutor, so the
+# scan scales with the number of cores and no worker reads the whole file.
+# Each worker returns only the metadata fields of its cases; the full case
+# documents are returned for the given seed ids only.  The partial results
+# are merged in file order, so they are the same as a sequential scan.
+# The scan also collects the byte-offset index of the case lines.  The JSON
+# of only the first max_data_lines data lines is parsed if a maximum is
+# given; the data lines of each range are then counted first, so that the
+# ranges are still scanned in parallel, each with its share of the maximum.
+
+ENCODING = "ISO-8859-1"  # the encoding of cases.sql
+
+METADATA_FIELDS = ["id", "name_abbreviation", "__case_url", "__citations"]
+
+CITE_PARSER = CiteParser()  # shared by the documents of each process
+
+BATCH_SIZE = 1000  # the number of cases per CiteParser.parse_batch call
+
+
+def iter_range_lines(mm: mmap.mmap, start: int, end: int):
+    """
+    Yield the (offset, length, stripped line) of the non-trivial lines
+    of the range; the length excludes the newline.
+    """
+    pos = start
+    while pos < end:
+        nl = mm.find(b"\n", pos, end)
+        if nl < 0:
+            nl = end
+        line = mm[pos:nl].strip()
+        if len(line) > 10:
+            yield pos, nl - pos, line
+        pos = nl + 1
+
+
+def range_index_columns(ids: list, offsets: list, lengths: list) -> tuple:
+    return (
+        np.asarray(ids, dtype="<i8"),
+        np.asarray(offsets, dtype="<i8"),
+        np.asarray(lengths, dtype="<i8"),
+    )
+
+
+def scan_range(
+    path: str, start: int, end: int, seed_ids=None, max_data_lines: int | None = None
+) -> dict:
+    """
+    Scan the given byte range of the cases file; this is the
+    ProcessPoolExecutor worker.  Return a dict with the metadata dict
+    of each case, keyed by case id, the full seed documents, counts,
+    and the byte-offset index columns of the case lines.  If given,
+    only the first max_data_lines data lines of the range are parsed;
+    all of them are counted and indexed.
+    """
+    ids, offsets, lengths, batch = list(), list(), list(), list()
+    seed_ids = set() if seed_ids is None else set(seed_ids)
+    result = dict()
+    result["cases"] = dict()
+    result["seed_docs"] = dict()
+    result["data_lines_read"] = 0
+    result["json_parse_ok"] = 0
+    result["json_parse_fail"] = 0
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for offset, length, line in iter_range_lines(mm, start, end):
+                tokens = line.split(b"\t")
+                if len(tokens) != 3:
+                    continue
+                result["data_lines_read"] = result["data_lines_read"] + 1
+                line_id = CaseFileIndex.line_id(line)
+                if line_id is not None:
+                    ids.append(line_id)
+                    offsets.append(offset)
+                    lengths.append(length)
+                if (
+                    max_data_lines is not None
+                    and result["data_lines_read"] > max_data_lines
+                ):
+                    continue
+                try:
+                    case_doc = CaseFileScanner.loads(tokens[1].strip())
+                    result["json_parse_ok"] = result["json_parse_ok"] + 1
+                    parts = CaseFileScanner.case_parts(case_doc)
+                    batch.append(parts)
+                    if parts[0] in seed_ids:
+                        result["seed_docs"][parts[0]] = case_doc
+                except Exception:
+                    result["json_parse_fail"] = result["json_parse_fail"] + 1
+                if len(batch) >= BATCH_SIZE:
+                    add_batch_metadata(result, batch)
+                    batch = list()
+    add_batch_metadata(result, batch)
+    result["index_columns"] = range_index_columns(ids, offsets, lengths)
+    return result
+
+
+def add_batch_metadata(result: dict, batch: list) -> None:
+    """Add the metadata of the given batch of case parts to the scan_range result."""
+    for metadata in CaseFileScanner.metadata_batch(batch):
+        result["cases"][metadata["id"]] = metadata
+        if metadata["id"] in result["seed_docs"]:
+            case_doc = result["seed_docs"][metadata["id"]]
+            case_doc["__case_url"] = metadata["__case_url"]
+            case_doc["__citations"] = metadata["__citations"]
+
+
+def count_range(path: str, start: int, end: int) -> int:
+    """
+    Return the count of the data lines of the given byte range, as
+    counted by scan_range; this is the ProcessPoolExecutor worker.
+    """
+    count = 0
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for offset, length, line in iter_range_lines(mm, start, end):
+                if line.count(b"\t") == 2:
+                    count = count + 1
+    return count
+
+
+def index_range(path: str, start: int, end: int) -> tuple:
+    """
+    Return the byte-offset index columns of the case lines of the given
+    byte range; this is the ProcessPoolExecutor worker.  Only the id prefix
+    of each line is examined; the case JSON is not parsed.
+    """
+    ids, offsets, lengths = list(), list(), list()
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for offset, length, line in iter_range_lines(mm, start, end):
+                if line.count(b"\t") != 2:
+                    continue
+                line_id = CaseFileIndex.line_id(line)
+                if line_id is not None:
+                    ids.append(line_id)
+                    offsets.append(offset)
+                    lengths.append(length)
+    return range_index_columns(ids, offsets, lengths)
+
+
+class CaseFileScanner:
+
+    def __init__(self, workers: int | None = None, ranges_per_worker: int = 4):
+        """
+        workers is the number of processes, by default the number of CPUs.
+        The file is split into workers * ranges_per_worker ranges, so that
+        the workers stay busy if some ranges have longer cases than others.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.workers = max(workers, 1)
+        self.ranges_per_worker = max(ranges_per_worker, 1)
+
+    @classmethod
+    def loads(cls, data: bytes) -> dict:
+        if orjson is not None:
+            return orjson.loads(data.decode(ENCODING))
+        return json.loads(data.decode(ENCODING))
+
+    @classmethod
+    def byte_ranges(cls, path: str, parts: int) -> list[tuple]:
+        """
+        Return the list of (start, end) byte ranges of the given file,
+        split into at most parts ranges; each range ends after a newline.
+        """
+        size = os.path.getsize(path)
+        if size == 0:
+            return list()
+        parts = max(parts, 1)
+        ranges, start = list(), 0
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for n in range(1, parts + 1):
+                    if start >= size:
+                        break
+                    end = max(start, (size * n) // parts)
+                    if n == parts:
+                        end = size
+                    else:
+                        nl = mm.find(b"\n", end)
+                        end = size if nl < 0 else nl + 1
+                    if end > start:
+                        ranges.append((start, end))
+                    start = end
+        return ranges
+
+    @classmethod
+    def case_url(cls, case_doc: dict) -> str:
+        """
+        Return the url for the case document like:
+        https://static.case.law/wash/184/cases/0560-01.json
+        or "?" if it can't be calculated.
+        """
+        try:
+            if "file_name" in case_doc.keys():  # this is expected
+                file_name = case_doc["file_name"].strip()
+                if "citations" in case_doc.keys():
+                    cite = case_doc["citations"][0]["cite"]
+                    url = CITE_PARSER.parse(cite, file_name)
+                    if url is not None:
+                        return url
+        except Exception:
+            pass
+        return "?"
+
+    @classmethod
+    def cited_urls(cls, case_doc: dict) -> list[str]:
+        """Return the list of urls of the cites_to citations of the case document."""
+        citations = list()
+        try:
+            for citation in case_doc["cites_to"]:
+                url = CITE_PARSER.parse(citation["cite"], None)
+                if url is not None:
+                    citations.append(url)
+        except Exception:
+            pass
+        return citations
+
+    @classmethod
+    def case_metadata(cls, case_doc: dict) -> dict:
+        metadata = dict()
+        metadata["id"] = str(case_doc["id"])
+        metadata["name_abbreviation"] = case_doc["name_abbreviation"]
+        metadata["__case_url"] = cls.case_url(case_doc)
+        metadata["__citations"] = cls.cited_urls(case_doc)
+        return metadata
+
+    @classmethod
+    def case_parts(cls, case_doc: dict) -> tuple:
+        """
+        Return the (id, name_abbreviation, case cite, file_name, cites_to
+        cites) of the case document, for method metadata_batch.  The case
+        cite is None if the url can't be calculated, and the cites_to cites
+        stop at the first invalid citation, like methods case_url and
+        cited_urls.
+        """
+        id, name = str(case_doc["id"]), case_doc["name_abbreviation"]
+        case_cite, file_name = None, None
+        try:
+            if "file_name" in case_doc.keys() and "citations" in case_doc.keys():
+                file_name = case_doc["file_name"].strip()
+                case_cite = case_doc["citations"][0]["cite"]
+        except Exception:
+            case_cite, file_name = None, None
+        cites = list()
+        try:
+            for citation in case_doc["cites_to"]:
+                cites.append(citation["cite"])
+        except Exception:
+            pass
+        return id, name, case_cite, file_name, cites
+
+    @classmethod
+    def metadata_batch(cls, batch: list[tuple]) -> list[dict]:
+        """
+        Return the metadata dicts of the given case_parts tuples, with
+        one CiteParser.parse_batch call for the case urls and one for all
+        of their cites_to urls.
+        """
+        with_cite = [parts for parts in batch if parts[2] is not None]
+        case_urls = CiteParser.parse_batch(
+            [parts[2] for parts in with_cite], [parts[3] for parts in with_cite]
+        )
+        case_urls = iter(case_urls)
+        cited = iter(
+            CiteParser.parse_batch([cite for parts in batch for cite in parts[4]])
+        )
+        metadata_list = list()
+        for id, name, case_cite, file_name, cites in batch:
+            metadata = dict()
+            metadata["id"] = id
+            metadata["name_abbreviation"] = name
+            url = next(case_urls) if case_cite is not None else None
+            metadata["__case_url"] = url if url is not None else "?"
+            urls = [next(cited) for cite in cites]
+            metadata["__citations"] = [url for url in urls if url is not None]
+            metadata_list.append(metadata)
+        return metadata_list
+
+    def map_ranges(self, func, path: str, range_args=None) -> list:
+        """
+        Return the results of func(path, start, end, *args) for each range,
+        in order, where args is the tuple of range_args(ranges) for the range.
+        """
+        ranges = self.byte_ranges(path, self.workers * self.ranges_per_worker)
+        if range_args is None:
+            args_list = [tuple() for r in ranges]
+        else:
+            args_list = range_args(ranges)
+        if self.workers == 1 or len(ranges) < 2:
+            return [
+                func(path, start, end, *args)
+                for (start, end), args in zip(ranges, args_list)
+            ]
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = [
+                executor.submit(func, path, start, end, *args)
+                for (start, end), args in zip(ranges, args_list)
+            ]
+            return [future.result() for future in futures]
+
+    def range_limits(self, path: str, max_data_lines: int) -> list:
+        """
+        Return the maximum number of data lines to parse in each range,
+        so that the first max_data_lines of the file are parsed.
+        """
+        counts = self.map_ranges(count_range, path)
+        limits, remaining = list(), max(max_data_lines, 0)
+        for count in counts:
+            limits.append(min(count, remaining))
+            remaining = remaining - limits[-1]
+        return limits
+
+    def scan(self, path: str, seed_ids=None, max_data_lines: int | None = None) -> dict:
+        """
+        Scan the given cases file and return the merged dict of the
+        metadata of each case keyed by id, the seed documents, counts,
+        and the byte-offset index of the file (see class CaseFileIndex).
+        The JSON of all data lines is parsed unless max_data_lines is given;
+        the data lines past it are counted and indexed but not parsed.
+        """
+        seed_ids = list() if seed_ids is None else list(seed_ids)
+
+        def range_args(ranges):
+            if max_data_lines is None:
+                return [(seed_ids,) for r in ranges]
+            limits = self.range_limits(path, max_data_lines)
+            return [(seed_ids, limit) for limit in limits]
+
+        merged = dict()
+        merged["cases"] = dict()
+        merged["seed_docs"] = dict()
+        merged["data_lines_read"] = 0
+        merged["json_parse_ok"] = 0
+        merged["json_parse_fail"] = 0
+        index_columns = list()
+        for result in self.map_ranges(scan_range, path, range_args):
+            index_columns.append(result["index_columns"])
+            merged["cases"].update(result["cases"])
+            merged["seed_docs"].update(result["seed_docs"])
+            for key in ["data_lines_read", "json_parse_ok", "json_parse_fail"]:
+                merged[key] = merged[key] + result[key]
+        merged["index"] = self.merge_index_columns(index_columns)
+        return merged
+
+    @classmethod
+    def merge_index_columns(cls, columns: list[tuple]) -> np.ndarray:
+        """Return the index array of the given per-range index columns."""
+        if len(columns) == 0:
+            return CaseFileIndex.build([], [], [])
+        return CaseFileIndex.build(
+            *[np.concatenate([c[n] for c in columns]) for n in range(3)]
+        )
+
+    def index(self, path: str) -> np.ndarray:
+        """Return the byte-offset index of the given cases file."""
+        return self.merge_index_columns(self.map_ranges(index_range, path))
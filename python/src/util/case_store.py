@@ -0,0 +1,140 @@
+import numpy as np
+
+from src.util.columnar_store import ColumnarStore
+from src.util.fs import FS
+
+# This class is the columnar intermediate store of the legal cases
+# wrangling steps; it replaces the pretty-printed case_id_name_dict.json
+# and case_url_dict.json files, which held the same metadata twice.
+# There is one row per case, with its id and name_abbreviation str columns,
+# and its case url and citations as int32 codes into the interned "urls"
+# str column.  The case_id_name_dict and case_url_dict JSON files can
+# still be exported from the store for human inspection.  The result of
+# each step 2 iteration is also a columnar store, of the case rows reached
+# from the seeds with their depth and citations_gathered flag; it may be
+# exported as the former iteration_<n>.json file.
+
+DEFAULT_DIRECTORY = "tmp/case_store"
+
+ITERATION_DIRECTORY = "tmp/iteration_{}"
+
+
+class CaseStore:
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY):
+        self.store = ColumnarStore(directory)
+
+    @classmethod
+    def write(cls, case_id_name_dict: dict, directory: str = DEFAULT_DIRECTORY):
+        """Write the given step 1 metadata dict, keyed by case id, to a new store."""
+        url_codes = dict()  # key is the url, value is its code
+
+        def intern(url: str) -> int:
+            code = url_codes.get(url)
+            if code is None:
+                code = len(url_codes)
+                url_codes[url] = code
+            return code
+
+        ids, names, urls, citations = list(), list(), list(), list()
+        for id, meta in case_id_name_dict.items():
+            ids.append(str(id))
+            names.append(meta["name_abbreviation"])
+            urls.append(intern(meta["__case_url"]))
+            citations.append([intern(url) for url in meta["__citations"]])
+        store = ColumnarStore.create(directory)
+        store.write_strs("id", ids)
+        store.write_strs("name_abbreviation", names)
+        store.write_array("url", np.asarray(urls, dtype=np.int32))
+        store.write_lists("citations", citations)
+        store.write_strs("urls", list(url_codes.keys()))
+        store.manifest["row_count"] = len(ids)
+        store.save()
+        return CaseStore(directory)
+
+    def row_count(self) -> int:
+        return self.store.manifest.get("row_count", 0)
+
+    def find_rows(self, ids) -> list[int]:
+        """Return the rows of the given case ids, in order; missing ids are ignored."""
+        rows = {id: row for row, id in enumerate(self.store.strs("id").to_list())}
+        return [rows[id] for id in ids if id in rows]
+
+    def case_metadata(self, rows, urls: list[str] | None = None) -> list[dict]:
+        """
+        Return the list of the step 1 metadata dicts of the given rows;
+        only these rows of the columns are read.
+        """
+        if urls is None:
+            urls = self.store.strs("urls")  # only the urls of the rows are decoded
+        ids = self.store.strs("id")
+        names = self.store.strs("name_abbreviation")
+        url_codes = self.store.array("url")
+        citations = self.store.lists("citations")
+        cases = list()
+        for row in rows:
+            row = int(row)
+            metadata = dict()
+            metadata["id"] = ids[row]
+            metadata["name_abbreviation"] = names[row]
+            metadata["__case_url"] = urls[url_codes[row]]
+            metadata["__citations"] = [urls[code] for code in citations[row].tolist()]
+            cases.append(metadata)
+        return cases
+
+    def case_ids(self, rows) -> list[str]:
+        """Return the case ids of the given rows."""
+        ids = self.store.strs("id")
+        return [ids[int(row)] for row in rows]
+
+    def case_id_name_dict(self) -> dict:
+        case_id_name_dict = dict()
+        urls = self.store.strs("urls").to_list()
+        for metadata in self.case_metadata(range(self.row_count()), urls):
+            case_id_name_dict[metadata["id"]] = metadata
+        return case_id_name_dict
+
+    def export_json(self, directory: str = "tmp") -> None:
+        """Write the case_id_name_dict.json and case_url_dict.json files of the store."""
+        case_id_name_dict = self.case_id_name_dict()
+        FS.write_json(case_id_name_dict, "{}/case_id_name_dict.json".format(directory))
+        case_url_dict = dict()
+        for metadata in case_id_name_dict.values():
+            case_url_dict[metadata["__case_url"]] = metadata
+        FS.write_json(case_url_dict, "{}/case_url_dict.json".format(directory))
+
+    @classmethod
+    def write_iteration(cls, directory: str, rows, depths, gathered) -> ColumnarStore:
+        """
+        Write the given step 2 iteration result to a new store; the case
+        rows, their depth from the seeds, and their citations_gathered flag.
+        """
+        store = ColumnarStore.create(directory)
+        store.write_array("row", np.asarray(rows, dtype=np.int64))
+        store.write_array("depth", np.asarray(depths, dtype=np.int32))
+        store.write_array("citations_gathered", np.asarray(gathered, dtype=np.int8))
+        store.manifest["row_count"] = len(rows)
+        store.save()
+        return store
+
+    def iteration_metadata(self, directory: str) -> dict:
+        """
+        Return the metadata of the cases of the given iteration store,
+        keyed by case url, as in the former iteration_<n>.json files.
+        """
+        iteration = ColumnarStore(directory)
+        rows = iteration.array("row")
+        depths = iteration.array("depth").tolist()
+        gathered = iteration.array("citations_gathered").tolist()
+        collected_metadata = dict()
+        for idx, metadata in enumerate(self.case_metadata(rows)):
+            metadata["iteration"] = depths[idx]
+            metadata["citations_gathered"] = gathered[idx]
+            collected_metadata[metadata["__case_url"]] = metadata
+        return collected_metadata
+
+    def export_iteration_json(self, directory: str) -> str:
+        """Write the given iteration store to <directory>.json, and return its name."""
+        outfile = "{}.json".format(directory.rstrip("/"))
+        FS.write_json(self.iteration_metadata(directory), outfile)
+        return outfile
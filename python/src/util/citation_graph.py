@@ -0,0 +1,163 @@
+import numpy as np
+
+# This class implements the citation graph of the legal cases as a compact
+# CSR (compressed sparse row) adjacency.  The case urls are interned to
+# int32 node ids, and the citations of node n are the slice
+# targets[offsets[n] : offsets[n + 1]], so the whole graph is held in a
+# few NumPy arrays rather than in nested dicts of urls.  The graph is built
+# from the columns of class CaseStore, with vectorized NumPy operations.
+# The expand method is a frontier-based breadth-first search from the seed
+# cases, where each hop costs only the size of its frontier; it supports
+# max depth, max nodes, and per-node fan-out limits.
+
+
+def gather_indices(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    Return the concatenated ranges [start, start + length) of the given
+    arrays, without a python loop.
+    """
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    shifts = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return shifts + np.arange(total)
+
+
+class CitationGraph:
+
+    def __init__(
+        self,
+        urls,
+        url_codes: np.ndarray,
+        citation_offsets: np.ndarray,
+        citation_codes: np.ndarray,
+    ):
+        """
+        Build the graph from the case columns; urls is the list, or the
+        StrColumn, of the interned urls; only the urls of the reached nodes
+        are decoded from a StrColumn.  url_codes is the code of each case's
+        url, and the codes of the urls cited by case row r are
+        citation_codes[citation_offsets[r] : citation_offsets[r + 1]].
+        The node ids are the url codes.  If several cases have the same
+        url, the last one represents the url, and the urls without a case
+        are never reached.
+        """
+        self.urls = urls
+        self.url_codes = np.asarray(url_codes, dtype=np.int32)
+        self.citation_offsets = np.asarray(citation_offsets, dtype=np.int64)
+        self.citation_codes = np.asarray(citation_codes, dtype=np.int32)
+        node_count = len(urls)
+
+        # the (last) case row of each node, or -1
+        reversed_codes = self.url_codes[::-1]
+        nodes, last = np.unique(reversed_codes, return_index=True)
+        self.node_rows = np.full(node_count, -1, dtype=np.int64)
+        self.node_rows[nodes] = len(self.url_codes) - 1 - last
+        has_case = self.node_rows >= 0
+
+        # the cited nodes of each node's case row, less the nodes without a case
+        rows = np.maximum(self.node_rows, 0)
+        starts = self.citation_offsets[rows]
+        lengths = np.where(has_case, self.citation_offsets[rows + 1] - starts, 0)
+        cited = self.citation_codes[gather_indices(starts, lengths)]
+        sources = np.repeat(np.arange(node_count), lengths)
+        known = has_case[cited]
+        self.targets = cited[known]
+        self.offsets = np.zeros(node_count + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(sources[known], minlength=node_count), out=self.offsets[1:]
+        )
+        self.has_case = has_case
+
+    @classmethod
+    def from_case_store(cls, case_store) -> "CitationGraph":
+        store = case_store.store
+        citations = store.lists("citations")
+        return CitationGraph(
+            store.strs("urls"),
+            store.array("url"),
+            citations.offsets,
+            citations.values,
+        )
+
+    @classmethod
+    def from_case_id_name_dict(cls, case_id_name_dict: dict) -> "CitationGraph":
+        """Build the graph from the step 1 metadata dict, keyed by case id."""
+        url_ids = dict()
+        for meta in case_id_name_dict.values():
+            url_ids.setdefault(meta["__case_url"], len(url_ids))
+            for url in meta["__citations"]:
+                url_ids.setdefault(url, len(url_ids))
+        metas = list(case_id_name_dict.values())
+        codes = [url_ids[url] for meta in metas for url in meta["__citations"]]
+        lengths = [len(meta["__citations"]) for meta in metas]
+        offsets = np.zeros(len(metas) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return CitationGraph(
+            list(url_ids.keys()),
+            np.asarray([url_ids[m["__case_url"]] for m in metas], dtype=np.int32),
+            offsets,
+            np.asarray(codes, dtype=np.int32),
+        )
+
+    def node_count(self) -> int:
+        """Return the number of nodes with a case."""
+        return int(self.has_case.sum())
+
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    def row_citations(self, row: int) -> np.ndarray:
+        """Return the cited nodes, with a case, of the given case row."""
+        start, end = self.citation_offsets[row], self.citation_offsets[row + 1]
+        cited = self.citation_codes[start:end]
+        return cited[self.has_case[cited]]
+
+    def neighbors(self, frontier: np.ndarray, max_fanout: int | None) -> np.ndarray:
+        """Return the concatenated cited nodes of the given frontier nodes."""
+        starts = self.offsets[frontier]
+        ends = self.offsets[frontier + 1]
+        if max_fanout is not None:
+            ends = np.minimum(ends, starts + max_fanout)
+        return self.targets[gather_indices(starts, ends - starts)]
+
+    def expand(
+        self,
+        seed_rows: list[int],
+        max_depth: int,
+        max_nodes: int | None = None,
+        max_fanout: int | None = None,
+    ) -> tuple:
+        """
+        Return the (nodes, depths) arrays of the cases reached from the
+        given seed case rows in at most max_depth hops, in discovery order.
+        The seeds are at depth 0.
+        """
+        visited = np.zeros(len(self.urls), dtype=bool)
+        nodes, depths = list(), list()
+        remaining = [max_nodes if max_nodes is not None else len(self.urls)]
+
+        def visit(candidates: np.ndarray, depth: int) -> np.ndarray:
+            # the first occurrence of each unvisited candidate, in order
+            unique, first = np.unique(candidates, return_index=True)
+            new = unique[np.argsort(first, kind="stable")]
+            new = new[~visited[new]][: max(remaining[0], 0)]
+            remaining[0] = remaining[0] - len(new)
+            visited[new] = True
+            nodes.append(new)
+            depths.append(np.full(len(new), depth, dtype=np.int32))
+            return new
+
+        frontier = visit(self.url_codes[np.asarray(seed_rows, dtype=np.int64)], 0)
+        for depth in range(1, max_depth + 1):
+            if depth == 1:
+                # the seeds expand their own citations, rather than those of their url
+                candidates = [self.row_citations(row)[:max_fanout] for row in seed_rows]
+                candidates.append(np.empty(0, dtype=np.int32))
+                candidates = np.concatenate(candidates)
+            else:
+                candidates = self.neighbors(frontier, max_fanout)
+            frontier = visit(candidates, depth)
+            if len(frontier) == 0:
+                break
+        return np.concatenate(nodes), np.concatenate(depths)
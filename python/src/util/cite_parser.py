@@ -1,7 +1,20 @@
-# This class implements a simple key-based counter, often used
-# for data exploration and wrangling.
+# This class parses the legal case citations, like "41 Wn. (2d) 224",
+# into the case URLs at https://static.case.law/.  The citations are
+# matched with a single precompiled regular expression, and the parsed
+# parts of each distinct citation are memoized in an LRU cache, since
+# popular precedents are cited thousands of times.  The diagnostics that
+# describe the data are bounded; a histogram of the citation pattern
+# classes, plus up to DEFAULT_SAMPLE_SIZE sample values of each class.
+# The parse_batch method resolves a whole column of cites at once; the
+# distinct cites are parsed with vectorized NumPy string operations.
 # Chris Joakim, Microsoft
 
+import re
+
+from functools import lru_cache
+
+import numpy as np
+
 from src.util.counter import Counter
 
 # STATES is used to filter the many citations to a managable set
@@ -17,94 +30,222 @@ STATES = {
     "wn": "wash",
 }
 
+# the three or four single-space separated tokens of a scrubbed cite;
+# "<volume> <state> <page>" or "<volume> <state> <district> <page>"
+CITE_PATTERN = re.compile(r"([^ ]*) ([^ ]*) (?:([^ ]*) )?([^ ]*)")
+
+SCRUB_TABLE = str.maketrans("", "", ".()")
+
+DEFAULT_CACHE_SIZE = 1 << 16
+DEFAULT_SAMPLE_SIZE = 10
+
+
+def scrub(cite: str) -> str:
+    return cite.lower().translate(SCRUB_TABLE).strip()
+
+
+def tokens_column(values: np.ndarray) -> tuple:
+    """Return the stripped (first token, rest) columns of the given str column."""
+    parts = np.char.partition(values, " ")
+    return np.char.strip(parts[:, 0]), parts[:, 2]
+
+
+def zero_pad_with_01_suffix(file: str) -> str:
+    """
+    Zero-pad the given number so that it has four digits,
+    and append '-01' to the end.
+    """
+    if 0 < len(file) < 4:
+        return "{}-01".format(file.rjust(4, "0"))
+    return "{}-01".format(file)
+
+
+@lru_cache(maxsize=DEFAULT_CACHE_SIZE)
+def parse_cite(cite: str) -> tuple:
+    """
+    Return the (scrubbed cite, token count, url prefix, zero-padded file)
+    of the given cite str; the url prefix is None if it isn't a cite of
+    one of the STATES.
+    """
+    scrubbed = scrub(cite)
+    match = CITE_PATTERN.fullmatch(scrubbed)
+    if match is None:
+        return scrubbed, len(scrubbed.split(" ")), None, None
+    dir, state, dist, file = match.groups()
+    count = 3 if dist is None else 4
+    state = STATES.get(state.strip())
+    if state is None:
+        return scrubbed, count, None, None
+    if dist is None:
+        prefix = "https://static.case.law/{}/{}/cases/".format(state, dir.strip())
+    else:
+        prefix = "https://static.case.law/{}-{}/{}/cases/".format(
+            state, dist.strip(), dir.strip()
+        )
+    return scrubbed, count, prefix, zero_pad_with_01_suffix(file.strip())
+
 
 class CiteParser:
 
-    values_counter = (
-        Counter()
-    )  # used to observe facts about the data for __case_url logic
+    # the bounded diagnostics, used to observe facts about the data for
+    # the __case_url logic; see set_diagnostics
+    diagnostics_enabled = True
+    sample_size = DEFAULT_SAMPLE_SIZE
+    values_counter = Counter()  # the count of each pattern class
+    values_samples = dict()  # sample "cite^file_name | url" values of each class
 
     def __init__(self):
         self.scrubbed_cite = None
 
+    @classmethod
+    def set_diagnostics(cls, enabled: bool, sample_size: int = DEFAULT_SAMPLE_SIZE):
+        """Enable or disable the diagnostics, and reset them."""
+        cls.diagnostics_enabled = enabled
+        cls.sample_size = sample_size
+        cls.values_counter = Counter()
+        cls.values_samples = dict()
+
+    @classmethod
+    def cache_info(cls):
+        return parse_cite.cache_info()
+
     def parse(self, cite: str, file_name: str = None) -> str:
         """Parse the given values into a URL string at https://static.case.law/"""
-        concat_raw_values = "{}^{}".format(cite, file_name)
-        self.increment(concat_raw_values)
-        self.scrubbed_cite = self.scrub_cite(str(cite))
+        self.scrubbed_cite, count, prefix, file = parse_cite(str(cite))
         url = None  # the return value for this method
-
-        tokens = self.scrubbed_cite.split(" ")
-
-        if len(tokens) == 3:
-            dir = tokens[0].strip()
-            state = self.translate_filter_state(tokens[1].strip())
-            if state is not None:
-                file = self.zero_pad_with_01_suffix(tokens[2].strip())
-                if file_name is not None:
-                    if "-" in file_name:  # it has an -01, -02, ... suffix
-                        pass
-                    else:
-                        file_name = "{}-01".format(file_name)
-                    url = "https://static.case.law/{}/{}/cases/{}.json".format(
-                        state, dir, file_name
-                    )
+        if prefix is not None:
+            if file_name is not None:
+                if "-" in file_name:  # it has an -01, -02, ... suffix
+                    url = "{}{}.json".format(prefix, file_name)
                 else:
-                    url = "https://static.case.law/{}/{}/cases/{}.json".format(
-                        state, dir, file
-                    )
+                    url = "{}{}-01.json".format(prefix, file_name)
+            else:
+                url = "{}{}.json".format(prefix, file)
+        if CiteParser.diagnostics_enabled:
+            self.observe(cite, file_name, count, url)
+        return url
+
+    @classmethod
+    def parse_batch(cls, cites, file_names=None, interned: bool = False):
+        """
+        Parse the given column of cites, and the optional column of
+        file_names, like method parse.  Return the list of urls, with None
+        for the unparsed cites, or if interned is True, a tuple of the list
+        of distinct urls and an int32 array of url codes, with -1 for None.
+        """
+        values = [str(cite) for cite in cites]
+        if len(values) == 0:
+            return (list(), np.empty(0, dtype=np.int32)) if interned else list()
+        # only the distinct cites are copied into the fixed-width array
+        positions = {cite: idx for idx, cite in enumerate(dict.fromkeys(values))}
+        unique = np.asarray(list(positions.keys()), dtype=str)
+        inverse = np.fromiter(
+            (positions[cite] for cite in values), dtype=np.intp, count=len(values)
+        )
+        scrubbed = np.char.strip(np.char.translate(np.char.lower(unique), SCRUB_TABLE))
+
+        # the tokens of the "<volume> <state> [<district>] <page>" cites
+        spaces = np.char.count(scrubbed, " ")
+        dir, rest = tokens_column(scrubbed)
+        state, rest = tokens_column(rest)
+        dist, page = tokens_column(rest)
+        four = spaces == 3
+        page = np.where(four, np.char.strip(page), dist)
+        dist = np.where(four, dist, "")
+        states = np.asarray([STATES.get(s, "") for s in state.tolist()], dtype=str)
+        parsed = ((spaces == 2) | four) & (np.char.str_len(states) > 0)
+
+        states = np.where(four, np.char.add(np.char.add(states, "-"), dist), states)
+        prefix = np.char.add(
+            np.char.add(np.char.add("https://static.case.law/", states), "/"),
+            np.char.add(dir, "/cases/"),
+        )
+        padded = np.where(
+            (np.char.str_len(page) > 0) & (np.char.str_len(page) < 4),
+            np.char.rjust(page, 4, "0"),
+            page,
+        )
+        file = np.char.add(padded, "-01")
+        if file_names is None:
+            urls = np.char.add(np.char.add(prefix, file), ".json")[inverse]
+        else:
+            names = np.asarray(
+                ["" if name is None else name for name in file_names], dtype=str
+            )
+            has_name = np.asarray([name is not None for name in file_names], dtype=bool)
+            names = np.where(
+                np.char.find(names, "-") >= 0, names, np.char.add(names, "-01")
+            )
+            file = np.where(has_name, names, file[inverse])
+            urls = np.char.add(np.char.add(prefix[inverse], file), ".json")
+        parsed = parsed[inverse]
+
+        if CiteParser.diagnostics_enabled:
+            counts = np.where(spaces == 2, 3, np.where(four, 4, 0))[inverse]
+            cls.observe_batch(cites, file_names, counts, parsed, urls)
 
-        elif len(tokens) == 4:
-            # example url: https://static.case.law/wash-2d/58/cases/0569-01.json
-            dir = tokens[0].strip()
-            state = self.translate_filter_state(tokens[1].strip())
-            if state is not None:
-                dist = tokens[2].strip()
-                file = self.zero_pad_with_01_suffix(tokens[3].strip())
-                if file_name is not None:
-                    if "-" in file_name:  # it has an -01, -02, ... suffix
-                        pass
-                    else:
-                        file_name = "{}-01".format(file_name)
-                    url = "https://static.case.law/{}-{}/{}/cases/{}.json".format(
-                        state, dist, dir, file_name
+        if interned:
+            codes = np.full(len(values), -1, dtype=np.int32)
+            if parsed.any():
+                url_list, url_codes = np.unique(urls[parsed], return_inverse=True)
+                codes[parsed] = url_codes.reshape(-1)
+                return url_list.tolist(), codes
+            return list(), codes
+        return [url if ok else None for url, ok in zip(urls.tolist(), parsed.tolist())]
+
+    @classmethod
+    def observe_batch(cls, cites, file_names, counts, parsed, urls) -> None:
+        """Count the pattern classes of the parsed batch, and sample their values."""
+        has_name = np.zeros(len(counts), dtype=bool)
+        if file_names is not None:
+            has_name = np.asarray([name is not None for name in file_names], dtype=bool)
+        for count in [3, 4, 0]:
+            for url in [True, False]:
+                for name in [True, False]:
+                    mask = (counts == count) & (parsed == url) & (has_name == name)
+                    n = int(mask.sum())
+                    if n == 0:
+                        continue
+                    pattern_class = "{} tokens | {} | {}".format(
+                        count if count > 0 else "other",
+                        "url" if url else "no url",
+                        "file_name" if name else "no file_name",
                     )
-                else:
-                    url = "https://static.case.law/{}-{}/{}/cases/{}.json".format(
-                        state, dist, dir, file
+                    CiteParser.values_counter.update({pattern_class: n})
+                    samples = CiteParser.values_samples.setdefault(
+                        pattern_class, list()
                     )
-        else:
-            pass  # unknown format
+                    for idx in np.flatnonzero(mask)[: cls.sample_size - len(samples)]:
+                        samples.append(
+                            "{}^{} | {}".format(
+                                cites[idx],
+                                None if file_names is None else file_names[idx],
+                                urls[idx] if url else None,
+                            )
+                        )
 
-        # capture the raw data and parsed url for analysis, then return the url
-        self.increment("parsed | {} | {}".format(concat_raw_values, url))
-        return url
+    def observe(self, cite, file_name, count: int, url) -> None:
+        """Count the pattern class of the parsed cite, and sample its values."""
+        pattern_class = "{} tokens | {} | {}".format(
+            count if count in (3, 4) else "other",
+            "url" if url is not None else "no url",
+            "file_name" if file_name is not None else "no file_name",
+        )
+        CiteParser.values_counter.increment(pattern_class)
+        samples = CiteParser.values_samples.setdefault(pattern_class, list())
+        if len(samples) < CiteParser.sample_size:
+            samples.append("{}^{} | {}".format(cite, file_name, url))
 
     def scrub_cite(self, cite):
         """
         Scrub the cite string to remove extraneous characters
         and normalize to lowercase and stripped.
         """
-        return cite.lower().replace(".", "").replace("(", "").replace(")", "").strip()
-
-    def increment(self, key):
-        CiteParser.values_counter.increment(key)
+        return scrub(cite)
 
     def translate_filter_state(self, state):
         if state is not None:
-            if state in STATES.keys():
-                return STATES[state]
+            return STATES.get(state)
 
     def zero_pad_with_01_suffix(self, file):
-        """
-        Zero-pad the given number so that it has four digits,
-        and append '-01' to the end.
-        """
-        if len(file) == 3:
-            return "0{}-01".format(file)
-        elif len(file) == 2:
-            return "00{}-01".format(file)
-        elif len(file) == 1:
-            return "000{}-01".format(file)
-        else:
-            return "{}-01".format(file)
+        return zero_pad_with_01_suffix(file)
@@ -0,0 +1,143 @@
+import os
+
+import numpy as np
+
+from src.util.fs import FS
+
+# This class implements a simple columnar store for intermediate data,
+# such as the artifacts of the legal cases wrangling steps.  A store is a
+# directory with one NumPy .npy file per array and a manifest.json file.
+# The column layouts follow Apache Arrow; a str column is a uint8 array of
+# the concatenated UTF-8 values plus an int64 offsets array, and a list
+# column is an int32 values array plus an int64 offsets array.  Columns are
+# loaded with np.load(mmap_mode="r"), so opening a store is fast and only
+# the columns, and the rows, that a step uses are read from disk.
+
+MANIFEST_FILE = "manifest.json"
+
+KIND_ARRAY = "array"
+KIND_STR = "str"
+KIND_LIST = "list"
+
+
+class StrColumn:
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx: int) -> str:
+        start, end = int(self.offsets[idx]), int(self.offsets[idx + 1])
+        return self.data[start:end].tobytes().decode("utf-8")
+
+    def to_list(self) -> list[str]:
+        raw = self.data.tobytes()
+        offsets = self.offsets.tolist()
+        if raw.isascii():  # the byte offsets are also the str offsets
+            data = raw.decode("ascii")
+            return [data[offsets[i] : offsets[i + 1]] for i in range(len(self))]
+        return [
+            raw[offsets[i] : offsets[i + 1]].decode("utf-8") for i in range(len(self))
+        ]
+
+
+class ListColumn:
+
+    def __init__(self, values: np.ndarray, offsets: np.ndarray):
+        self.values = values
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx: int) -> np.ndarray:
+        return self.values[int(self.offsets[idx]) : int(self.offsets[idx + 1])]
+
+
+class ColumnarStore:
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        manifest_file = os.path.join(directory, MANIFEST_FILE)
+        self.manifest = FS.read_json(manifest_file) or {"columns": dict()}
+
+    @classmethod
+    def offsets_of(cls, lengths) -> np.ndarray:
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return offsets
+
+    def columns(self) -> dict:
+        """Return the dict of the column names and kinds in this store."""
+        return self.manifest["columns"]
+
+    def array_file(self, name: str) -> str:
+        return os.path.join(self.directory, "{}.npy".format(name))
+
+    def save_array(self, name: str, array: np.ndarray) -> None:
+        with open(self.array_file(name), "wb") as f:
+            np.save(f, array, allow_pickle=False)
+
+    def load_array(self, name: str) -> np.ndarray:
+        return np.load(self.array_file(name), mmap_mode="r", allow_pickle=False)
+
+    def write_array(self, name: str, array) -> None:
+        self.save_array(name, np.asarray(array))
+        self.columns()[name] = KIND_ARRAY
+
+    def write_strs(self, name: str, values: list[str]) -> None:
+        encoded = [value.encode("utf-8") for value in values]
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        self.save_array(name + ".data", data)
+        self.save_array(name + ".offsets", self.offsets_of([len(e) for e in encoded]))
+        self.columns()[name] = KIND_STR
+
+    def write_lists(self, name: str, lists: list[list[int]]) -> None:
+        values = np.fromiter(
+            (value for values in lists for value in values), dtype=np.int32
+        )
+        self.save_array(name + ".values", values)
+        self.save_array(name + ".offsets", self.offsets_of([len(v) for v in lists]))
+        self.columns()[name] = KIND_LIST
+
+    def array(self, name: str) -> np.ndarray:
+        return self.load_array(name)
+
+    def strs(self, name: str) -> StrColumn:
+        return StrColumn(
+            self.load_array(name + ".data"), self.load_array(name + ".offsets")
+        )
+
+    def lists(self, name: str) -> ListColumn:
+        return ListColumn(
+            self.load_array(name + ".values"), self.load_array(name + ".offsets")
+        )
+
+    def column(self, name: str):
+        kind = self.columns()[name]
+        if kind == KIND_STR:
+            return self.strs(name)
+        if kind == KIND_LIST:
+            return self.lists(name)
+        return self.array(name)
+
+    def save(self) -> None:
+        """Write the manifest; call this after the columns are written."""
+        FS.write_json(
+            self.manifest,
+            os.path.join(self.directory, MANIFEST_FILE),
+            pretty=True,
+            verbose=False,
+        )
+
+    @classmethod
+    def create(cls, directory: str) -> "ColumnarStore":
+        """Return a new empty store in the given directory, replacing any store there."""
+        os.makedirs(directory, exist_ok=True)
+        manifest_file = os.path.join(directory, MANIFEST_FILE)
+        if os.path.isfile(manifest_file):
+            os.remove(manifest_file)
+        return ColumnarStore(directory)
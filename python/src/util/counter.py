@@ -2,37 +2,108 @@
 # for data exploration and wrangling.
 # Chris Joakim, Microsoft
 
+import heapq
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
+
 
 class Counter:
     """
     This class implements a simple int counter with an underlying dict object.
+    If a capacity is given, it is a Space-Saving sketch which tracks at most
+    capacity keys; when a new key arrives at capacity, the key with the
+    lowest count is evicted and the new key inherits its count, so the
+    counts of the retained keys are upper bounds, over by at most the
+    value of get_error(key).  Counters serialize to compact bytes, so that
+    the counters of parallel worker processes can be merged; a merge adds
+    the evicted bound of the other counter to the keys it lacks, so the
+    bounds also hold for merged counters.
     """
 
-    def __init__(self):
+    def __init__(self, capacity: int | None = None):
         self.data = {}
+        self.capacity = capacity
+        self.errors = {}  # the overestimation of each key, with a capacity
+        self.heap = []  # the lazy min-heap of (count, key), with a capacity
+        self.evicted = 0  # the upper bound of the value of any evicted key
 
     def increment(self, key: str) -> None:
         """Increment the given key by 1."""
-        keys = self.data.keys()
-        if key in keys:
-            self.data[key] = self.data[key] + 1
+        if self.capacity is None:
+            self.data[key] = self.data.get(key, 0) + 1
         else:
-            self.data[key] = 1
+            self.add(key, 1)
 
     def decrement(self, key: str) -> None:
-        """Decrement the given key by 1."""
-        keys = self.data.keys()
-        if key in keys:
+        """Decrement the given key by 1; with a capacity, only a retained key."""
+        if self.capacity is None:
+            self.data[key] = self.data.get(key, 0) - 1
+        elif key in self.data:
             self.data[key] = self.data[key] - 1
+            heapq.heappush(self.heap, (self.data[key], key))
+
+    def update(self, values) -> None:
+        """
+        Increment the keys in the given iterable by 1 each, or the keys
+        of the given dict or Counter by their values.
+        """
+        if isinstance(values, Counter):
+            values = values.get_data()
+        data = self.data
+        if self.capacity is not None:
+            items = (
+                values.items() if isinstance(values, dict) else ((v, 1) for v in values)
+            )
+            for key, n in items:
+                self.add(key, n)
+        elif isinstance(values, dict):
+            for key, n in values.items():
+                data[key] = data.get(key, 0) + n
         else:
-            self.data[key] = -1
+            get = data.get
+            for key in values:
+                data[key] = get(key, 0) + 1
+
+    def add(self, key: str, n: int) -> None:
+        """Add n to the given key, evicting the lowest key at capacity."""
+        data = self.data
+        if key in data:
+            data[key] = data[key] + n
+            return
+        if len(data) < self.capacity:
+            data[key] = n
+            heapq.heappush(self.heap, (n, key))
+            return
+        min_count, min_key = self.pop_min()
+        del data[min_key]
+        self.errors.pop(min_key, None)
+        if min_count > self.evicted:
+            self.evicted = min_count
+        data[key] = min_count + n
+        self.errors[key] = min_count
+        heapq.heappush(self.heap, (data[key], key))
+
+    def pop_min(self) -> tuple:
+        """Pop the (count, key) of the lowest key from the lazy heap."""
+        while True:
+            count, key = heapq.heappop(self.heap)
+            current = self.data.get(key)
+            if current == count:
+                return count, key
+            if current is not None:  # a stale entry; the count has changed
+                heapq.heappush(self.heap, (current, key))
 
     def get_value(self, key: str) -> int:
         """Get the int value of the given key."""
-        keys = self.data.keys()
-        if key in keys:
-            return self.data[key]
-        return 0
+        return self.data.get(key, 0)
+
+    def get_error(self, key: str) -> int:
+        """Get the maximum overestimation of the value of the given key."""
+        return self.errors.get(key, 0)
 
     def get_data(self) -> dict:
         """Return the underlying dict object."""
@@ -40,17 +111,93 @@ class Counter:
 
     def most_frequent(self) -> str:
         """Return the most frequent key in the counter."""
-        top_value, top_word = -1, None
-        for key in self.data.keys():
-            if self.data[key] > top_value:
-                top_value = self.data[key]
-                top_word = key
-        return top_word
+        if len(self.data) == 0:
+            return None
+        top_word = max(self.data, key=self.data.get)
+        if self.data[top_word] > -1:
+            return top_word
+        return None
+
+    def most_common(self, k: int) -> list[tuple]:
+        """Return the list of the k most frequent (key, value) tuples."""
+        return heapq.nlargest(k, self.data.items(), key=lambda item: item[1])
 
     def merge(self, another_counter) -> None:
-        """Merge the values in the given counter with this counter."""
+        """
+        Merge the values in the given counter with this counter.  A key
+        missing from either counter may have been evicted from it, so that
+        counter's evicted bound is added to both the value and the error
+        of the key, keeping the values upper bounds.
+        """
         if another_counter is not None:
-            for key in another_counter.get_data().keys():
-                another_count = another_counter.get_value(key)
-                merged_count = self.get_value(key) + another_count
-                self.data[key] = merged_count
+            data, errors = self.data, self.errors
+            another_data = another_counter.get_data()
+            evicted = self.evicted
+            another_evicted = getattr(another_counter, "evicted", 0)
+            if evicted > 0:
+                for key in another_data:
+                    if key not in data:
+                        data[key] = evicted
+                        errors[key] = evicted
+            if another_evicted > 0:
+                for key in data:
+                    if key not in another_data:
+                        data[key] = data[key] + another_evicted
+                        errors[key] = errors.get(key, 0) + another_evicted
+            for key, another_count in another_data.items():
+                data[key] = data.get(key, 0) + another_count
+            for key, error in getattr(another_counter, "errors", {}).items():
+                errors[key] = errors.get(key, 0) + error
+            self.evicted = evicted + another_evicted
+            if self.capacity is not None:
+                self.trim()
+
+    def trim(self) -> None:
+        """Retain the capacity keys with the highest values, and rebuild the heap."""
+        if len(self.data) > self.capacity:
+            retained = dict(self.most_common(self.capacity))
+            for key, count in self.data.items():
+                if key not in retained and count > self.evicted:
+                    self.evicted = count
+            self.errors = {k: v for k, v in self.errors.items() if k in retained}
+            self.data = retained
+        self.heap = [(count, key) for key, count in self.data.items()]
+        heapq.heapify(self.heap)
+
+    def serialize(self) -> bytes:
+        """Return the compact bytes of this counter, for method deserialize."""
+        state = {
+            "capacity": self.capacity,
+            "data": self.data,
+            "errors": self.errors,
+            "evicted": self.evicted,
+        }
+        if orjson is not None:
+            return orjson.dumps(state)
+        return json.dumps(state, separators=(",", ":")).encode("utf-8")
+
+    @classmethod
+    def deserialize(cls, serialized: bytes) -> "Counter":
+        state = (
+            orjson.loads(serialized) if orjson is not None else json.loads(serialized)
+        )
+        counter = Counter(state["capacity"])
+        counter.data = state["data"]
+        counter.errors = state["errors"]
+        counter.evicted = state.get("evicted", 0)
+        if counter.capacity is not None:
+            counter.trim()
+        return counter
+
+    @classmethod
+    def merge_all(cls, counters, capacity: int | None = None) -> "Counter":
+        """
+        Return a new counter with the merged values of the given counters,
+        or their serialized bytes, such as the shards of worker processes.
+        """
+        merged = Counter(capacity)
+        for counter in counters:
+            if isinstance(counter, (bytes, bytearray)):
+                counter = Counter.deserialize(counter)
+            merged.merge(counter)
+        return merged
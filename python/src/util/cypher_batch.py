@@ -0,0 +1,136 @@
+import json
+
+from typing import Iterator
+
+from psycopg import sql
+
+from src.util.library_graph import EDGE_LABELS
+
+# This class generates the batched Apache AGE Cypher statements of the
+# libraries graph.  Each statement creates a batch of vertices or edges by
+# UNWINDing a list of maps, either an agtype parameter of the cypher()
+# function or an inline Cypher list literal, so hundreds of edges are
+# created per round trip rather than one per statement.
+#
+# It also generates the label table indexes that the edge MATCH clauses
+# need; AGE doesn't index the properties of its label tables, so without
+# them each MATCH is a sequential scan of the label.  The GIN index serves
+# the {name: ...} property map containment (@>) predicates, the expression
+# index serves a.name = ... comparisons, and the id index serves the joins.
+
+DEFAULT_BATCH_SIZE = 500
+
+VERTEX_PROPERTIES = {
+    "Library": ["name", "libtype", "license", "keywords", "release_count"],
+    "Developer": ["name"],
+}
+
+
+class CypherBatch:
+
+    @classmethod
+    def batches(cls, items, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[list]:
+        """Yield the given iterable of items as lists of up to batch_size items."""
+        batch_size = max(batch_size, 1)
+        batch = list()
+        for item in items:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = list()
+        if len(batch) > 0:
+            yield batch
+
+    @classmethod
+    def literal(cls, value) -> str:
+        """Return the given str, int, float, bool, list or dict as a Cypher literal."""
+        if value is None:
+            return "null"
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if isinstance(value, (int, float)):
+            return str(value)
+        if isinstance(value, dict):
+            pairs = ["{}: {}".format(k, cls.literal(v)) for k, v in value.items()]
+            return "{" + ", ".join(pairs) + "}"
+        if isinstance(value, (list, tuple)):
+            return "[" + ", ".join([cls.literal(v) for v in value]) + "]"
+        s = str(value).replace("\\", "\\\\").replace("'", "\\'")
+        return "'" + s + "'"
+
+    @classmethod
+    def index_statements(cls, graphname: str, label: str) -> list[str]:
+        """Return the CREATE INDEX statements for the given vertex label table."""
+        table = sql.Identifier(graphname, label).as_string(None)
+        prefix = "idx_{}_{}".format(graphname, label.lower())
+        statements = list()
+        statements.append(
+            "CREATE INDEX IF NOT EXISTS {}_id ON {} USING btree (id);".format(
+                prefix, table
+            )
+        )
+        statements.append(
+            "CREATE INDEX IF NOT EXISTS {}_properties ON {} USING gin (properties);".format(
+                prefix, table
+            )
+        )
+        statements.append(
+            "CREATE INDEX IF NOT EXISTS {}_name ON {} USING btree ".format(
+                prefix, table
+            )
+            + "(ag_catalog.agtype_access_operator(VARIADIC ARRAY[properties, '\"name\"'::agtype]));"
+        )
+        return statements
+
+    @classmethod
+    def vertex_cypher(cls, label: str, rows: str = "$rows") -> str:
+        """Return the Cypher to create the vertices of the UNWIND list."""
+        props = ", ".join(["{}: r.{}".format(p, p) for p in VERTEX_PROPERTIES[label]])
+        return "UNWIND {} AS r CREATE (:{} {{{}}})".format(rows, label, props)
+
+    @classmethod
+    def edge_cypher(cls, relname: str, pairs: str = "$pairs") -> str:
+        """
+        Return the Cypher to create the edges of the UNWIND list of
+        {a: start name, b: end name} maps.
+        """
+        start_label, end_label = EDGE_LABELS[relname]
+        return (
+            "UNWIND {} AS e ".format(pairs)
+            + "MATCH (a:{} {{name: e.a}}), (b:{} {{name: e.b}}) ".format(
+                start_label, end_label
+            )
+            + "CREATE (a)-[:{}]->(b)".format(relname)
+        )
+
+    @classmethod
+    def parameterized_sql(cls, graphname: str, cypher: str) -> str:
+        """
+        Return the SQL to execute the given Cypher with a single agtype
+        parameter; AGE requires it to be a bound parameter, like $1.
+        """
+        return (
+            "SELECT * FROM ag_catalog.cypher({}, $$ {} $$, %s) as (r agtype);".format(
+                sql.Literal(graphname).as_string(None), cypher
+            )
+        )
+
+    @classmethod
+    def params(cls, name: str, batch: list) -> tuple:
+        """Return the params tuple, one agtype map, for a parameterized_sql batch."""
+        return (json.dumps({name: batch}),)
+
+    @classmethod
+    def literal_sql(cls, graphname: str, cypher: str) -> str:
+        """Return the SQL to execute the given Cypher, with inline literals."""
+        return "SELECT * FROM cypher('{}', $$ {} $$) as (r agtype);".format(
+            graphname, cypher
+        )
+
+    @classmethod
+    def vertex_literal_sql(cls, graphname: str, label: str, batch: list) -> str:
+        return cls.literal_sql(graphname, cls.vertex_cypher(label, cls.literal(batch)))
+
+    @classmethod
+    def edge_literal_sql(cls, graphname: str, relname: str, batch: list) -> str:
+        return cls.literal_sql(graphname, cls.edge_cypher(relname, cls.literal(batch)))
@@ -0,0 +1,40 @@
+import math
+
+# This class summarizes lists of latency measurements, in milliseconds,
+# for the benchmark functions in this project.
+
+
+class LatencyStats:
+
+    @classmethod
+    def percentile(cls, sorted_values: list[float], pct: float) -> float:
+        """
+        Return the given percentile (0 to 100) of the given sorted list
+        of values, using the nearest-rank method.
+        """
+        if len(sorted_values) == 0:
+            return 0.0
+        rank = int(math.ceil((pct / 100.0) * len(sorted_values)))
+        rank = min(max(rank, 1), len(sorted_values))
+        return sorted_values[rank - 1]
+
+    @classmethod
+    def summary(cls, values_ms: list[float]) -> dict:
+        """
+        Return a dict with the count, min, max, mean, p50, p95 and p99
+        of the given list of millisecond values.
+        """
+        values = sorted(values_ms)
+        summary = dict()
+        summary["count"] = len(values)
+        if len(values) == 0:
+            for key in ["min", "max", "mean", "p50", "p95", "p99"]:
+                summary[key] = 0.0
+            return summary
+        summary["min"] = round(values[0], 3)
+        summary["max"] = round(values[-1], 3)
+        summary["mean"] = round(sum(values) / len(values), 3)
+        summary["p50"] = round(cls.percentile(values, 50), 3)
+        summary["p95"] = round(cls.percentile(values, 95), 3)
+        summary["p99"] = round(cls.percentile(values, 99), 3)
+        return summary
@@ -0,0 +1,124 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
+
+from src.util.vector_adapter import Vector
+
+# This class transforms the wrangled PyPI library JSON documents into rows
+# of the libraries table.  The str values are pruned to the column lengths
+# of sql/libraries_ddl.sql, and the embedding is wrapped in class Vector so
+# that it is written in the pgvector binary format by COPY.
+
+OMIT_LIBS = "geohash,myst-docutils,natto-py,cobs".split(",")  # problematic data
+
+COPY_COLUMNS = [
+    "name",
+    "libtype",
+    "description",
+    "keywords",
+    "license",
+    "release_count",
+    "package_url",
+    "project_url",
+    "embedding",
+    "metadata",
+]
+
+# the PostgreSQL types of the COPY_COLUMNS, for COPY (FORMAT BINARY)
+COPY_TYPES = [
+    "varchar",
+    "varchar",
+    "varchar",
+    "varchar",
+    "varchar",
+    "int4",
+    "varchar",
+    "varchar",
+    "vector",
+    "jsonb",
+]
+
+METADATA_ATTRIBUTES = [
+    "name",
+    "description",
+    "keywords",
+    "license",
+    "release_count",
+    "package_url",
+    "project_url",
+]
+
+
+class LibraryDocs:
+
+    @classmethod
+    def read_doc(cls, path: str) -> dict | None:
+        """Read and parse the given JSON document file."""
+        with open(path, "rb") as f:
+            data = f.read()
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+
+    @classmethod
+    def is_valid(cls, doc) -> bool:
+        if not isinstance(doc, dict):
+            return False
+        name = doc.get("name")
+        if name is None or len(str(name).strip()) == 0:
+            return False
+        return str(name).strip().lower() not in OMIT_LIBS
+
+    @classmethod
+    def truncate_scrub(cls, s, max_len: int) -> str:
+        if s is None:
+            return ""
+        s = str(s).replace("\r", " ").replace("\n", " ").replace("\t", " ")
+        return s[0:max_len]
+
+    @classmethod
+    def release_count(cls, doc: dict) -> int:
+        try:
+            return int(str(doc.get("release_count", "0")).strip())
+        except Exception:
+            return 0
+
+    @classmethod
+    def to_copy_row(cls, doc: dict) -> tuple | None:
+        """
+        Return the tuple of COPY_COLUMNS values for the given document,
+        or None if the document isn't a valid library.
+        """
+        if not cls.is_valid(doc):
+            return None
+        values = dict()
+        values["name"] = cls.truncate_scrub(doc.get("name"), 30)
+        values["description"] = cls.truncate_scrub(doc.get("description"), 1000)
+        values["keywords"] = cls.truncate_scrub(doc.get("keywords"), 250)
+        values["license"] = cls.truncate_scrub(doc.get("license"), 250)
+        values["release_count"] = cls.release_count(doc)
+        values["package_url"] = cls.truncate_scrub(doc.get("package_url"), 99)
+        values["project_url"] = cls.truncate_scrub(doc.get("project_url"), 99)
+        embedding = doc.get("embedding")
+        if isinstance(embedding, list) and len(embedding) > 0:
+            embedding = Vector(embedding)
+        else:
+            embedding = None
+        metadata = dict()  # this is the jsonb value, a subset of the doc
+        for attr in METADATA_ATTRIBUTES:
+            metadata[attr] = values[attr]
+        return (
+            values["name"],
+            cls.truncate_scrub(doc.get("libtype", "pypi"), 30),
+            values["description"],
+            values["keywords"],
+            values["license"],
+            values["release_count"],
+            values["package_url"],
+            values["project_url"],
+            embedding,
+            metadata,
+        )
@@ -0,0 +1,176 @@
+import json
+
+from typing import Iterator
+
+# This class builds the Apache AGE graph of the PyPI libraries, their
+# developers, and their dependencies in memory, as rows for direct COPY
+# into the AGE label tables rather than as one Cypher statement per vertex
+# and edge.  Each vertex is identified by its label and its 0-based index
+# within the label; edge endpoints are resolved from these name -> index
+# maps, so no MATCH label scans are needed.  The vertex graphids are
+# computed from the label id and a reserved block of the label sequence.
+#
+# An AGE graphid is a 64-bit integer; the upper 16 bits are the label id
+# and the lower 48 bits are the entry id, from the label's id sequence.
+# See https://github.com/apache/age/blob/master/src/include/utils/graphid.h
+
+ENTRY_ID_BITS = 48
+ENTRY_ID_MAX = (1 << ENTRY_ID_BITS) - 1
+
+# the document fields used to build the graph
+GRAPH_LIBRARY_FIELDS = [
+    "name",
+    "libtype",
+    "license",
+    "keywords",
+    "release_count",
+    "dependency_ids",
+    "developers",
+]
+
+VERTEX_LABELS = ("Library", "Developer")
+
+# edge label -> (start vertex label, end vertex label)
+EDGE_LABELS = {
+    "uses_lib": ("Library", "Library"),
+    "used_by_lib": ("Library", "Library"),
+    "developer_of": ("Developer", "Library"),
+    "developed_by": ("Library", "Developer"),
+}
+
+
+class LibraryGraph:
+
+    @classmethod
+    def graphid(cls, label_id: int, entry_id: int) -> int:
+        if entry_id < 1 or entry_id > ENTRY_ID_MAX:
+            raise ValueError("invalid graphid entry id: {}".format(entry_id))
+        return (label_id << ENTRY_ID_BITS) | entry_id
+
+    @classmethod
+    def properties_text(cls, properties: dict) -> str:
+        """Return the agtype text input, a JSON object, of the given properties."""
+        return json.dumps(properties, ensure_ascii=False)
+
+    @classmethod
+    def release_count(cls, doc: dict) -> int:
+        try:
+            return int(str(doc["release_count"]).strip())
+        except Exception:
+            return 0
+
+    def __init__(self):
+        self.vertices = dict()  # label -> list of properties dicts
+        self.vertex_indexes = dict()  # label -> dict of name -> index
+        for label in VERTEX_LABELS:
+            self.vertices[label] = list()
+            self.vertex_indexes[label] = dict()
+        self.dependencies = list()  # (library index, dependency name) tuples
+        self.developer_links = list()  # (library index, developer index) tuples
+        self.duplicate_count = 0
+
+    def add_vertex(self, label: str, properties: dict) -> int:
+        """Add the vertex, if its name is new within the label; return its index."""
+        indexes = self.vertex_indexes[label]
+        name = properties["name"]
+        if name in indexes:
+            return indexes[name]
+        index = len(self.vertices[label])
+        indexes[name] = index
+        self.vertices[label].append(properties)
+        return index
+
+    def add_doc(self, doc: dict) -> None:
+        """Add the given library document, and its developers and dependencies."""
+        properties = dict()
+        properties["name"] = str(doc["name"]).strip()
+        properties["libtype"] = str(doc.get("libtype") or "pypi").strip()
+        properties["license"] = str(doc.get("license") or "").strip()[0:40]
+        properties["keywords"] = str(doc.get("keywords") or "").strip()
+        properties["release_count"] = self.release_count(doc)
+        if properties["name"] in self.vertex_indexes["Library"]:
+            self.duplicate_count = self.duplicate_count + 1
+            return
+        lib_index = self.add_vertex("Library", properties)
+        for dep_libtype_libname in doc.get("dependency_ids") or list():
+            # the dependency ids are prefixed with their libtype, like "pypi:flask"
+            self.dependencies.append((lib_index, str(dep_libtype_libname)[5:]))
+        for dev in doc.get("developers") or list():
+            dev_index = self.add_vertex("Developer", {"name": str(dev)})
+            self.developer_links.append((lib_index, dev_index))
+
+    def vertex_count(self, label: str) -> int:
+        return len(self.vertices[label])
+
+    def resolved_dependencies(self) -> Iterator[tuple[int, int]]:
+        """Yield the (library index, dependency index) of the loaded dependencies."""
+        indexes = self.vertex_indexes["Library"]
+        for lib_index, dep_name in self.dependencies:
+            dep_index = indexes.get(dep_name)
+            if dep_index is not None:
+                yield lib_index, dep_index
+
+    def edge_pairs(self, label: str) -> Iterator[tuple[int, int]]:
+        """Yield the (start vertex index, end vertex index) of the given edge label."""
+        if label == "uses_lib":
+            yield from self.resolved_dependencies()
+        elif label == "used_by_lib":
+            for lib_index, dep_index in self.resolved_dependencies():
+                yield dep_index, lib_index
+        elif label == "developer_of":
+            for lib_index, dev_index in self.developer_links:
+                yield dev_index, lib_index
+        elif label == "developed_by":
+            yield from self.developer_links
+        else:
+            raise ValueError("invalid edge label: {}".format(label))
+
+    def edge_name_pairs(self, label: str) -> Iterator[dict]:
+        """Yield the {a: start vertex name, b: end vertex name} of the given edge label."""
+        start_label, end_label = EDGE_LABELS[label]
+        start_vertices = self.vertices[start_label]
+        end_vertices = self.vertices[end_label]
+        for start_index, end_index in self.edge_pairs(label):
+            yield {
+                "a": start_vertices[start_index]["name"],
+                "b": end_vertices[end_index]["name"],
+            }
+
+    def edge_count(self, label: str) -> int:
+        return sum(1 for _ in self.edge_pairs(label))
+
+    def vertex_rows(
+        self, label: str, label_id: int, first_entry_id: int
+    ) -> Iterator[tuple[int, str]]:
+        """Yield the (id, properties) COPY rows of the given vertex label."""
+        for idx, properties in enumerate(self.vertices[label]):
+            yield (
+                self.graphid(label_id, first_entry_id + idx),
+                self.properties_text(properties),
+            )
+
+    def edge_rows(
+        self,
+        label: str,
+        label_id: int,
+        first_entry_id: int,
+        vertex_label_ids: dict,
+        vertex_first_entry_ids: dict,
+    ) -> Iterator[tuple[int, int, int, str]]:
+        """
+        Yield the (id, start_id, end_id, properties) COPY rows of the given
+        edge label.  The vertex dicts are keyed by vertex label, and contain
+        the label ids and first entry ids used for the vertex rows.
+        """
+        start_label, end_label = EDGE_LABELS[label]
+        start_label_id = vertex_label_ids[start_label]
+        start_first = vertex_first_entry_ids[start_label]
+        end_label_id = vertex_label_ids[end_label]
+        end_first = vertex_first_entry_ids[end_label]
+        for idx, (start_index, end_index) in enumerate(self.edge_pairs(label)):
+            yield (
+                self.graphid(label_id, first_entry_id + idx),
+                self.graphid(start_label_id, start_first + start_index),
+                self.graphid(end_label_id, end_first + end_index),
+                "{}",
+            )
@@ -0,0 +1,160 @@
+import logging
+import os
+import time
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator
+
+from src.util.fs import FS
+from src.util.library_docs import LibraryDocs
+
+# This class is the shared ingestion stage for the wrangled PyPI library
+# JSON documents, used by the TSV, Cypher, and COPY loaders.  The files are
+# parsed in chunks by a ProcessPoolExecutor, so parsing scales across cores,
+# and each worker returns only the fields, or the transformed value, that
+# the consumer needs rather than the full document with its 1536-float
+# embedding.  The results are yielded in file order by a generator, with at
+# most max_pending chunks in flight, so peak memory is bounded by
+# chunk_size * max_pending documents regardless of the size of the corpus.
+
+DEFAULT_CHUNK_SIZE = 64
+
+
+def read_docs_chunk(
+    paths: list[str], fields: list[str] | None = None, transform: Callable = None
+) -> tuple:
+    """
+    Read the given document files; this is the ProcessPoolExecutor worker.
+    Return a tuple of (list of values for the valid documents, bytes read,
+    count of invalid documents, list of error strs).  Each value is the
+    transform of the document if a transform is given, else the dict of
+    the given fields, else the whole document.
+    """
+    values, bytes_read, invalid_count, errors = list(), 0, 0, list()
+    for path in paths:
+        try:
+            bytes_read = bytes_read + os.path.getsize(path)
+            doc = LibraryDocs.read_doc(path)
+            if not LibraryDocs.is_valid(doc):
+                invalid_count = invalid_count + 1
+                continue
+            if transform is not None:
+                value = transform(doc)
+            elif fields is not None:
+                value = {field: doc.get(field) for field in fields}
+            else:
+                value = doc
+            if value is None:
+                invalid_count = invalid_count + 1
+            else:
+                values.append(value)
+        except Exception as e:
+            errors.append("{}: {}".format(path, str(e)))
+    return values, bytes_read, invalid_count, errors
+
+
+class LibraryIngest:
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_pending: int | None = None,
+    ):
+        """
+        workers is the number of processes, by default the number of CPUs,
+        and max_pending is the maximum number of chunks in flight, by
+        default 2 * workers.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.workers = max(workers, 1)
+        self.chunk_size = max(chunk_size, 1)
+        if max_pending is None:
+            max_pending = 2 * self.workers
+        self.max_pending = max(max_pending, 1)
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.files_read = 0
+        self.bytes_read = 0
+        self.docs_read = 0
+        self.invalid_count = 0
+        self.errors = 0
+        self.start_time = time.time()
+
+    @classmethod
+    def list_files(cls, data_dir: str, max_files: int | None = None) -> list[str]:
+        """Return the sorted list of the first max_files JSON files in data_dir."""
+        files = FS.list_files_in_dir(data_dir)
+        if files is None:
+            raise FileNotFoundError("data_dir not found: {}".format(data_dir))
+        names = sorted([f for f in files if f.endswith(".json")])
+        if max_files is not None:
+            names = names[0:max_files]
+        return [os.path.join(data_dir, name) for name in names]
+
+    def chunks(self, paths: list[str]) -> Iterator[list[str]]:
+        for idx in range(0, len(paths), self.chunk_size):
+            yield paths[idx : idx + self.chunk_size]
+
+    def record_chunk(self, paths: list[str], result: tuple) -> list:
+        """Update the statistics with the given chunk result; return its values."""
+        values, bytes_read, invalid_count, errors = result
+        self.files_read = self.files_read + len(paths)
+        self.bytes_read = self.bytes_read + bytes_read
+        self.docs_read = self.docs_read + len(values)
+        self.invalid_count = self.invalid_count + invalid_count
+        self.errors = self.errors + len(errors)
+        for error in errors:
+            logging.error("LibraryIngest, error reading {}".format(error))
+        return values
+
+    def iter_docs(
+        self,
+        data_dir: str,
+        fields: list[str] | None = None,
+        max_files: int | None = None,
+        transform: Callable = None,
+    ) -> Iterator:
+        """
+        Generator which yields the valid documents in the given directory,
+        in file order, as described in read_docs_chunk().  A transform must
+        be picklable, such as a module-level function or a classmethod.
+        """
+        self.reset_stats()
+        paths = self.list_files(data_dir, max_files)
+        logging.info(
+            "LibraryIngest#iter_docs, data_dir: {} files: {} workers: {}".format(
+                data_dir, len(paths), self.workers
+            )
+        )
+        pending = deque()
+        executor = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            for chunk in self.chunks(paths):
+                pending.append(
+                    (chunk, executor.submit(read_docs_chunk, chunk, fields, transform))
+                )
+                if len(pending) >= self.max_pending:
+                    chunk, future = pending.popleft()
+                    yield from self.record_chunk(chunk, future.result())
+            while len(pending) > 0:
+                chunk, future = pending.popleft()
+                yield from self.record_chunk(chunk, future.result())
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        logging.info("LibraryIngest#iter_docs, stats: {}".format(self.get_stats()))
+
+    def get_stats(self) -> dict:
+        elapsed = max(time.time() - self.start_time, 0.000001)
+        stats = dict()
+        stats["files_read"] = self.files_read
+        stats["docs_read"] = self.docs_read
+        stats["invalid_count"] = self.invalid_count
+        stats["errors"] = self.errors
+        stats["mb_read"] = round(self.bytes_read / (1024 * 1024), 3)
+        stats["elapsed"] = round(elapsed, 3)
+        stats["files_per_second"] = round(self.files_read / elapsed, 1)
+        return stats
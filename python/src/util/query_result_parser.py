@@ -1,11 +1,10 @@
-# This class implements a simple key-based counter, often used
-# for data exploration and wrangling.
+# This class parses the result rows of PostgreSQL and Apache AGE queries.
 # Chris Joakim, Microsoft
 
-import json
 import logging
 import traceback
-import sys
+
+from src.util.agtype_parser import AgtypeParser
 
 
 class QueryResultParser:
@@ -21,43 +20,40 @@ class QueryResultParser:
         """
         psycopg cursor.execute() returns a tuple of tuples, which
         this method parses into a list of objects.
-        The Apache AGE tuples contain odd strings that contain
-        string values like '::vertex' and '::edge' that are handled here.
+        The Apache AGE tuples contain agtype strings with suffixes like
+        '::vertex', '::edge', '::path' and '::numeric', which are
+        decoded by class AgtypeParser.
         """
-        print("parse() {} {}".format(query_result, str(type(query_result))))
         try:
             if isinstance(query_result, tuple):
                 if len(query_result) == 1:
                     elem = query_result[0]
-                    print("1elem: {} {}".format(elem, str(type(elem))))
-                    if isinstance(elem, str):
-                        colon_pair_count = elem.count("::")
-                        if colon_pair_count == 1:
-                            return self.parse_single_colonpair_result(elem)
-                        else:
-                            return elem
-                    else:
-                        return elem
+                    if isinstance(elem, str) and "::" in elem:
+                        return self.parse_agtype(elem)
+                    return elem
                 else:
-                    return list(query_result)
+                    return [self.parse_value(elem) for elem in query_result]
         except Exception as e:
-            logging.error("AgeResultParser - exception:", str(e))
+            logging.error("QueryResultParser - exception: {}".format(str(e)))
             logging.error(traceback.format_exc())
         return None
 
-    def parse_single_colonpair_result(self, s):
-        tokens = s.strip().split("::")
-        leftpart = tokens[0]
-        jstr = leftpart
-        # if leftpart.startswith('{'):
-        #     jstr = leftpart + '}'
-        # elif leftpart.startswith('['):
-        #     jstr = leftpart + ']'
-        print("jstr: {}".format(jstr))
+    def parse_value(self, elem):
+        """Decode the given column value if it is an agtype str."""
+        if isinstance(elem, str):
+            if AgtypeParser.has_agtype_suffix(elem):
+                return self.parse_agtype(elem)
+        return elem
+
+    def parse_agtype(self, s):
         try:
-            return json.loads(jstr)
+            return AgtypeParser.parse(s)
         except Exception as e:
-            return dict
+            logging.warning("QueryResultParser - unparsable agtype: {}".format(s))
+            return s
+
+    def parse_single_colonpair_result(self, s):
+        return self.parse_agtype(s)
 
 
 # row: (14258, 'plpgsql', '1.0') 3 <class 'tuple'>
@@ -0,0 +1,52 @@
+# This class merges several ranked result lists, such as the full-text and
+# the vector search results of a hybrid search, with Reciprocal Rank Fusion.
+# Each row scores the sum of 1 / (k + rank) over the lists that contain it,
+# so only the ranks matter; the incomparable ts_rank scores and vector
+# distances are never combined.  k, conventionally 60, dampens the weight
+# of the top few ranks.
+# See https://plg.uwaterloo.ca/~gvcormac/cormacksigir09-rrf.pdf
+
+DEFAULT_RRF_K = 60
+
+
+class RankFusion:
+
+    @classmethod
+    def reciprocal_rank_fusion(
+        cls,
+        ranked_lists: dict[str, list[dict]],
+        key: str = "name",
+        k: int = DEFAULT_RRF_K,
+        limit: int | None = None,
+    ) -> list[dict]:
+        """
+        Fuse the given named lists of row dicts, each in rank order, into one
+        list in descending order of RRF score.  Rows are matched by the given
+        key attribute.  Each returned row contains the attributes of all of
+        its occurrences, plus its "rrf_score" and its 1-based "ranks" in each list.
+        """
+        fused = dict()  # key value -> fused row
+        for list_name, rows in ranked_lists.items():
+            for idx, row in enumerate(rows):
+                value = row[key]
+                if value not in fused:
+                    fused_row = dict(row)
+                    fused_row["rrf_score"] = 0.0
+                    fused_row["ranks"] = dict()
+                    fused[value] = fused_row
+                fused_row = fused[value]
+                if list_name in fused_row["ranks"]:
+                    continue  # a duplicate within the same list
+                for attr, attr_value in row.items():
+                    if attr not in fused_row:
+                        fused_row[attr] = attr_value
+                rank = idx + 1
+                fused_row["ranks"][list_name] = rank
+                fused_row["rrf_score"] = fused_row["rrf_score"] + (1.0 / (k + rank))
+        results = sorted(
+            fused.values(),
+            key=lambda row: (-row["rrf_score"], min(row["ranks"].values())),
+        )
+        if limit is not None:
+            return results[0:limit]
+        return results
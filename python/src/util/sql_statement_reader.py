@@ -0,0 +1,159 @@
+import io
+import re
+import zipfile
+
+from typing import Iterator
+
+# This class streams the SQL statements of a plain or zipped .sql file,
+# such as the generated Cypher load files of this project, without
+# extracting the zip file to disk or reading the whole file into memory.
+# Statements are terminated by a semicolon outside of quoted strings,
+# quoted identifiers, dollar-quoted bodies (like the $$ ... $$ Cypher of
+# the cypher() function), and -- and /* */ comments, which are removed.
+# It also classifies statements into the phases of a graph load by the
+# leading clause of their Cypher, so that all of the vertices are created
+# before the edges that MATCH them, and returns the graph labels that the
+# Cypher of a statement references.
+
+PHASE_SESSION = "session"
+PHASE_DDL = "ddl"
+PHASE_VERTEX = "vertex"
+PHASE_EDGE = "edge"
+
+# the graph name, and the first word of the dollar-quoted Cypher body,
+# of a cypher('graph', $$ ... $$) call
+CYPHER_PATTERN = re.compile(
+    r"cypher\s*\(\s*'([^']*)'\s*,\s*(\$\w*\$)\s*(\w*)(.*?)\2", re.I | re.S
+)
+
+# the labels of the (v:Label) node and [e:Label] relationship patterns
+LABEL_PATTERN = re.compile(r"[(\[]\s*\w*\s*:\s*(\w+|`[^`]+`)")
+
+# the leading Cypher clauses of the statements that MATCH existing vertices
+EDGE_CLAUSES = ("MATCH", "OPTIONAL")
+
+
+class SqlStatementReader:
+
+    @classmethod
+    def open_lines(cls, path: str) -> Iterator[str]:
+        """
+        Yield the lines of the given file; each member of a .zip file is
+        decompressed as a stream, in the order of the zip directory.
+        """
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as zf:
+                for info in zf.infolist():
+                    if info.is_dir():
+                        continue
+                    with zf.open(info) as f:
+                        yield from io.TextIOWrapper(f, encoding="utf-8")
+                    yield "\n"
+        else:
+            with open(path, encoding="utf-8", mode="rt") as f:
+                yield from f
+
+    @classmethod
+    def split_statements(cls, lines) -> Iterator[str]:
+        """Yield the semicolon-terminated statements of the given lines."""
+        buffer = list()
+        quote = None  # the open quote char or dollar-quote tag, if any
+        comment_depth = 0  # the nesting depth of the open /* */ comments
+        for line in lines:
+            i, n, start = 0, len(line), 0
+            while i < n:
+                c = line[i]
+                if comment_depth > 0:
+                    if c == "*" and line.startswith("*/", i):
+                        comment_depth = comment_depth - 1
+                        i = i + 1
+                        if comment_depth == 0:
+                            buffer.append(" ")
+                            start = i + 1
+                    elif c == "/" and line.startswith("/*", i):
+                        comment_depth = comment_depth + 1
+                        i = i + 1
+                elif quote is not None:
+                    if quote in ("'", '"'):
+                        if c == quote:
+                            quote = None
+                    elif line.startswith(quote, i):
+                        i = i + len(quote) - 1
+                        quote = None
+                elif c == "'" or c == '"':
+                    quote = c
+                elif c == "$":
+                    end = line.find("$", i + 1)
+                    tag = line[i : end + 1] if end > 0 else ""
+                    if len(tag) > 1 and (tag[1:-1].isidentifier() or tag == "$$"):
+                        quote = tag
+                        i = end
+                elif c == "-" and line.startswith("--", i):
+                    buffer.append(line[start:i])
+                    buffer.append("\n")  # the comment ends the line
+                    start = n
+                    break
+                elif c == "/" and line.startswith("/*", i):
+                    buffer.append(line[start:i])
+                    comment_depth = 1
+                    i = i + 1
+                elif c == ";":
+                    buffer.append(line[start : i + 1])
+                    statement = "".join(buffer).strip()
+                    if len(statement) > 1:
+                        yield statement
+                    buffer = list()
+                    start = i + 1
+                i = i + 1
+            if start < n and comment_depth == 0:
+                buffer.append(line[start:])
+        statement = "".join(buffer).strip()
+        if len(statement) > 0:
+            yield statement
+
+    @classmethod
+    def read_statements(cls, path: str) -> Iterator[str]:
+        yield from cls.split_statements(cls.open_lines(path))
+
+    @classmethod
+    def phase(cls, statement: str) -> str:
+        """
+        Return the load phase of the given statement; session settings,
+        DDL, vertex (and other) statements, or the edge statements whose
+        Cypher begins with a MATCH of the existing vertices.
+        """
+        upper = statement.lstrip().upper()
+        if upper.startswith("SET ") or upper.startswith("LOAD "):
+            return PHASE_SESSION
+        if upper.startswith(("CREATE ", "ALTER ", "DROP ")):
+            return PHASE_DDL
+        match = CYPHER_PATTERN.search(statement)
+        if match is not None and match.group(3).upper() in EDGE_CLAUSES:
+            return PHASE_EDGE
+        return PHASE_VERTEX
+
+    @classmethod
+    def labels(cls, statement: str) -> set[tuple]:
+        """
+        Return the set of the (graph, label) tuples referenced by the
+        node and relationship patterns of the Cypher of the given statement.
+        """
+        labels = set()
+        for match in CYPHER_PATTERN.finditer(statement):
+            body = match.group(3) + match.group(4)
+            for label in LABEL_PATTERN.findall(body):
+                labels.add((match.group(1), label.strip("`")))
+        return labels
+
+    @classmethod
+    def local_session_statement(cls, statement: str) -> str:
+        """
+        Return the given SET statement as SET LOCAL, so that it applies to
+        the current transaction only rather than to the pooled connection.
+        """
+        stripped = statement.lstrip()
+        if stripped.upper().startswith("SET ") and not stripped.upper().startswith(
+            "SET LOCAL "
+        ):
+            return "SET LOCAL " + stripped[4:]
+        return statement
@@ -0,0 +1,113 @@
+import logging
+import struct
+
+from psycopg.adapt import Dumper, Loader
+from psycopg.pq import Format
+from psycopg.types import TypeInfo
+
+# These classes adapt pgvector 'vector' values to and from Python lists of
+# floats for psycopg.  Query parameters are wrapped in class Vector and are
+# sent in the pgvector binary format; an int16 dimension count, an unused
+# int16, then one big-endian float4 per dimension.  A 1536-dimension
+# embedding is thus 6148 bytes, rather than about 20 KB of decimal text
+# within the SQL statement.  Result columns of type vector are returned as
+# lists of floats in either the text or binary result format.
+#
+# The oid of the vector type varies by database, so VectorAdapter.register()
+# looks it up when DbService configures each new pooled connection.
+
+
+class Vector:
+    """A pgvector query parameter value; wraps a list of floats."""
+
+    __slots__ = ("values",)
+
+    def __init__(self, values):
+        if isinstance(values, str):
+            values = VectorAdapter.from_text(values)
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return "Vector({} dimensions)".format(len(self.values))
+
+
+class VectorBinaryDumper(Dumper):
+    format = Format.BINARY
+
+    def dump(self, obj: Vector) -> bytes:
+        return VectorAdapter.to_binary(obj.values)
+
+
+class VectorTextDumper(Dumper):
+    format = Format.TEXT
+
+    def dump(self, obj: Vector) -> bytes:
+        return VectorAdapter.to_text(obj.values).encode("utf-8")
+
+
+class VectorBinaryLoader(Loader):
+    format = Format.BINARY
+
+    def load(self, data) -> list[float]:
+        return VectorAdapter.from_binary(data)
+
+
+class VectorTextLoader(Loader):
+    format = Format.TEXT
+
+    def load(self, data) -> list[float]:
+        return VectorAdapter.from_text(bytes(data).decode("utf-8"))
+
+
+class VectorAdapter:
+
+    @classmethod
+    def to_binary(cls, values) -> bytes:
+        dim = len(values)
+        return struct.pack(">HH{}f".format(dim), dim, 0, *values)
+
+    @classmethod
+    def from_binary(cls, data) -> list[float]:
+        dim, unused = struct.unpack_from(">HH", data)
+        return list(struct.unpack_from(">{}f".format(dim), data, 4))
+
+    @classmethod
+    def to_text(cls, values) -> str:
+        return "[" + ",".join([repr(float(v)) for v in values]) + "]"
+
+    @classmethod
+    def from_text(cls, s: str) -> list[float]:
+        s = s.strip()[1:-1]
+        if len(s.strip()) == 0:
+            return list()
+        return [float(v) for v in s.split(",")]
+
+    @classmethod
+    def register_oid(cls, context, oid: int) -> None:
+        """
+        Register the Vector dumpers, and the vector loaders for the given
+        oid, on the given psycopg connection or cursor.
+        """
+        adapters = context.adapters
+        for base in [VectorTextDumper, VectorBinaryDumper]:
+            adapters.register_dumper(Vector, type(base.__name__, (base,), {"oid": oid}))
+        adapters.register_loader(oid, VectorTextLoader)
+        adapters.register_loader(oid, VectorBinaryLoader)
+
+    @classmethod
+    async def register(cls, conn) -> bool:
+        """
+        Look up the vector type in the database of the given async connection,
+        and register the adapters on it.  Return False if the pgvector
+        extension isn't installed.
+        """
+        info = await TypeInfo.fetch(conn, "vector")
+        if info is None:
+            logging.warning("VectorAdapter#register, vector type not found")
+            return False
+        info.register(conn)  # so that "vector" resolves in copy.set_types()
+        cls.register_oid(conn, info.oid)
+        return True
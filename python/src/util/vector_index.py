@@ -0,0 +1,226 @@
+import math
+import re
+
+# This class contains the pure logic for managing the pgvector IVFFlat and
+# HNSW indexes of this project; the operator class matching the distance
+# metric of the queries, the index build parameters derived from the row
+# count, the session settings for the build and the searches, and the
+# check that an EXPLAIN plan actually uses the index, and the recall and
+# search parameter sweeps of the vector search benchmark.  An index is only
+# used by a query whose ORDER BY operator matches its operator class, for
+# example vector_l2_ops for the '<->' operator used throughout this project.
+# See https://github.com/pgvector/pgvector#indexing
+
+METRIC_OPERATORS = {"l2": "<->", "ip": "<#>", "cosine": "<=>"}
+
+METRIC_OPCLASSES = {
+    "l2": "vector_l2_ops",
+    "ip": "vector_ip_ops",
+    "cosine": "vector_cosine_ops",
+}
+
+INDEX_METHODS = ("ivfflat", "hnsw")
+
+SEARCH_PARAMS = {"ivfflat": "ivfflat.probes", "hnsw": "hnsw.ef_search"}
+
+HNSW_EF_SEARCH_MAX = 1000
+
+IVFFLAT_DEFAULT_LISTS = 100  # the pgvector default, without a lists parameter
+
+LISTS_PATTERN = re.compile(r"lists\s*=\s*'?(\d+)")
+
+
+class VectorIndex:
+
+    @classmethod
+    def validate(cls, method: str, metric: str) -> None:
+        if method not in INDEX_METHODS:
+            raise ValueError("invalid index method: {}".format(method))
+        if metric not in METRIC_OPCLASSES:
+            raise ValueError("invalid distance metric: {}".format(metric))
+
+    @classmethod
+    def opclass(cls, metric: str) -> str:
+        return METRIC_OPCLASSES[metric]
+
+    @classmethod
+    def operator(cls, metric: str) -> str:
+        return METRIC_OPERATORS[metric]
+
+    @classmethod
+    def metric_for_operator(cls, operator: str) -> str | None:
+        for metric, op in METRIC_OPERATORS.items():
+            if op == operator:
+                return metric
+        return None
+
+    @classmethod
+    def index_name(cls, table: str, column: str, method: str, metric: str) -> str:
+        return "idx_{}_{}_{}_{}".format(table, column, method, metric)
+
+    @classmethod
+    def ivfflat_lists(cls, row_count: int) -> int:
+        """
+        Return the number of IVFFlat lists; rows / 1000 up to one million
+        rows, and sqrt(rows) beyond that, per the pgvector guidance.
+        """
+        if row_count > 1000000:
+            return int(math.sqrt(row_count))
+        return max(int(row_count / 1000), 1)
+
+    @classmethod
+    def ivfflat_probes(cls, lists: int) -> int:
+        """Return the recommended starting ivfflat.probes value, sqrt(lists)."""
+        return max(int(round(math.sqrt(lists))), 1)
+
+    @classmethod
+    def hnsw_params(cls, row_count: int) -> tuple[int, int]:
+        """
+        Return the HNSW (m, ef_construction) build parameters for the given
+        row count.  The pgvector defaults of (16, 64) suit small tables;
+        larger tables get a denser graph for better recall.
+        """
+        if row_count <= 100000:
+            return 16, 64
+        if row_count <= 1000000:
+            return 16, 128
+        return 24, 200
+
+    @classmethod
+    def hnsw_ef_search(cls, limit: int) -> int:
+        """ef_search must be at least the query LIMIT; the pgvector default is 40."""
+        return max(40, limit)
+
+    @classmethod
+    def maintenance_work_mem_mb(cls, row_count: int, dimensions: int) -> int:
+        """
+        Return a maintenance_work_mem value, in MB, large enough to hold the
+        vectors plus the HNSW graph overhead in memory during the build;
+        a build that overflows it is much slower.  Bounded to 64MB..8GB.
+        """
+        vector_bytes = (dimensions * 4) + 8
+        estimated = row_count * vector_bytes * 2
+        mb = int(math.ceil(estimated / (1024 * 1024)))
+        return min(max(mb, 64), 8192)
+
+    @classmethod
+    def build_settings(
+        cls, row_count: int, dimensions: int, parallel_workers: int
+    ) -> dict:
+        """
+        Return the session settings (GUCs) for the index build; the
+        statement_timeout of the pooled connections is lifted for it.
+        """
+        settings = dict()
+        settings["statement_timeout"] = "0"
+        settings["maintenance_work_mem"] = "{}MB".format(
+            cls.maintenance_work_mem_mb(row_count, dimensions)
+        )
+        settings["max_parallel_maintenance_workers"] = str(max(parallel_workers, 0))
+        return settings
+
+    @classmethod
+    def search_settings(cls, method: str, row_count: int, limit: int = 10) -> dict:
+        """Return the session settings (GUCs) for searches using the index."""
+        settings = dict()
+        if method == "ivfflat":
+            lists = cls.ivfflat_lists(row_count)
+            settings["ivfflat.probes"] = str(cls.ivfflat_probes(lists))
+        else:
+            settings["hnsw.ef_search"] = str(cls.hnsw_ef_search(limit))
+        return settings
+
+    @classmethod
+    def create_index_sql(
+        cls,
+        table: str,
+        column: str,
+        method: str,
+        metric: str,
+        row_count: int,
+    ) -> str:
+        """Return the CREATE INDEX DDL for the given method, metric and row count."""
+        cls.validate(method, metric)
+        if method == "ivfflat":
+            with_clause = "lists = {}".format(cls.ivfflat_lists(row_count))
+        else:
+            m, ef_construction = cls.hnsw_params(row_count)
+            with_clause = "m = {}, ef_construction = {}".format(m, ef_construction)
+        return "CREATE INDEX {} ON {} USING {} ({} {}) WITH ({});".format(
+            cls.index_name(table, column, method, metric),
+            table,
+            method,
+            column,
+            cls.opclass(metric),
+            with_clause,
+        )
+
+    @classmethod
+    def explain_uses_index(cls, plan_lines: list[str], index_name: str) -> bool:
+        """Return True if the given EXPLAIN plan text scans the given index."""
+        for line in plan_lines:
+            if "Index Scan using {}".format(index_name) in line:
+                return True
+        return False
+
+    @classmethod
+    def method_of_indexdef(cls, indexdef: str) -> str | None:
+        """Return the vector index method of the given pg_indexes indexdef, if any."""
+        indexdef = indexdef.lower()
+        for method in INDEX_METHODS:
+            if "using {} ".format(method) in indexdef:
+                return method
+        return None
+
+    @classmethod
+    def is_vector_index_on(cls, indexdef: str, column: str) -> bool:
+        """Return True if the given indexdef is a vector index on the given column."""
+        if cls.method_of_indexdef(indexdef) is None:
+            return False
+        return "({} ".format(column.lower()) in indexdef.lower()
+
+    @classmethod
+    def lists_of_indexdef(cls, indexdef: str) -> int:
+        """Return the lists parameter of the given IVFFlat indexdef, or its default."""
+        match = LISTS_PATTERN.search(indexdef.lower())
+        if match is None:
+            return IVFFLAT_DEFAULT_LISTS
+        return int(match.group(1))
+
+    @classmethod
+    def search_param(cls, method: str) -> str:
+        return SEARCH_PARAMS[method]
+
+    @classmethod
+    def sweep_values(cls, method: str, lists: int, k: int) -> list[int]:
+        """
+        Return the ivfflat.probes or hnsw.ef_search values to benchmark;
+        powers of two up to the given lists of the IVFFlat index (where
+        probes equal to lists is an exact search), or from k up to 1000
+        for HNSW.  See method lists_of_indexdef.
+        """
+        values = list()
+        if method == "ivfflat":
+            lists = max(lists, 1)
+            value = 1
+            while value < lists:
+                values.append(value)
+                value = value * 2
+            values.append(lists)
+        else:
+            for value in [10, 20, 40, 80, 160, 320, 640, HNSW_EF_SEARCH_MAX]:
+                value = max(value, k)
+                if value <= HNSW_EF_SEARCH_MAX and value not in values:
+                    values.append(value)
+        return values
+
+    @classmethod
+    def recall_at_k(cls, truth_ids: list, result_ids: list, k: int) -> float:
+        """
+        Return the fraction of the exact k nearest neighbors (truth_ids)
+        which are present in the first k approximate results.
+        """
+        truth = set(truth_ids[0:k])
+        if len(truth) == 0:
+            return 1.0
+        return len(truth.intersection(result_ids[0:k])) / len(truth)
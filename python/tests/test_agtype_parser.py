@@ -0,0 +1,116 @@
+import pytest
+
+from decimal import Decimal
+
+from src.util.agtype_parser import AgtypeParser, Vertex, Edge, Path
+from src.util.fs import FS
+
+# pytest -v tests/test_agtype_parser.py
+
+VERTEX = '{"id": 844424930131969, "label": "Developer", "properties": {"name": "info@2captcha.com"}}::vertex'
+EDGE = '{"id": 1407374883553290, "label": "uses_lib", "end_id": 1125899906851581, "start_id": 1125899906842630, "properties": {}}::edge'
+PATH = '[{"id": 1, "label": "Library", "properties": {"name": "flask"}}::vertex, {"id": 3, "label": "uses_lib", "end_id": 2, "start_id": 1, "properties": {}}::edge, {"id": 2, "label": "Library", "properties": {"name": "werkzeug"}}::vertex]::path'
+
+
+def test_parse_vertex():
+    obj = AgtypeParser.parse(VERTEX)
+    assert obj["id"] == 844424930131969
+    assert obj["label"] == "Developer"
+    assert obj["properties"]["name"] == "info@2captcha.com"
+    assert AgtypeParser.is_vertex(obj) == True
+    assert AgtypeParser.is_edge(obj) == False
+
+
+def test_parse_edge_list():
+    obj = AgtypeParser.parse("[{}, {}]".format(EDGE, EDGE))
+    assert len(obj) == 2
+    assert obj[1]["start_id"] == 1125899906842630
+    assert AgtypeParser.is_edge(obj[0]) == True
+
+
+def test_parse_path():
+    obj = AgtypeParser.parse(PATH)
+    assert len(obj) == 3
+    assert obj[0]["properties"]["name"] == "flask"
+    assert obj[1]["label"] == "uses_lib"
+
+    typed = AgtypeParser.parse_typed(PATH)
+    assert isinstance(typed, Path)
+    assert isinstance(typed.elements[0], Vertex)
+    assert isinstance(typed.elements[1], Edge)
+    assert typed.elements[2].properties["name"] == "werkzeug"
+    assert typed.elements[1].start_id == 1
+
+
+def test_parse_typed_vertex_and_edge():
+    v = AgtypeParser.parse_typed(VERTEX)
+    assert v == Vertex(844424930131969, "Developer", {"name": "info@2captcha.com"})
+    e = AgtypeParser.parse_typed(EDGE)
+    assert e.label == "uses_lib"
+    assert e.end_id == 1125899906851581
+
+
+def test_parse_numeric_and_nested_values():
+    assert AgtypeParser.parse("12345.6789::numeric") == 12345.6789
+    obj = AgtypeParser.parse(
+        '{"n": 3.14::numeric, "list": [1::numeric, {"v": ' + VERTEX + "}]}"
+    )
+    assert obj["n"] == 3.14
+    assert isinstance(obj["n"], float)
+    assert obj["list"][0] == 1
+    assert obj["list"][1]["v"]["label"] == "Developer"
+
+
+def test_parse_numeric_as_decimal():
+    value = AgtypeParser.parse("12345.6789::numeric", numeric_as_decimal=True)
+    assert value == Decimal("12345.6789")
+    value = AgtypeParser.parse(
+        "3.141592653589793238462643383279::numeric", numeric_as_decimal=True
+    )
+    assert value == Decimal("3.141592653589793238462643383279")
+    obj = AgtypeParser.parse_typed(
+        '{"n": 3.14::numeric, "v": ' + VERTEX + "}", numeric_as_decimal=True
+    )
+    assert obj["n"] == Decimal("3.14")
+    assert obj["v"].label == "Developer"
+
+
+def test_suffix_text_within_strings_is_preserved():
+    s = '{"id": 1, "label": "Library", "properties": {"note": "c::edge"}}::vertex'
+    assert AgtypeParser.parse(s)["properties"]["note"] == "c::edge"
+    s = '{"id": 1, "label": "Library", "properties": {"note": "a \\"q\\" }::vertex, b"}}::vertex'
+    jstr = AgtypeParser.strip_suffixes_outside_strings(s)
+    assert jstr.endswith('"a \\"q\\" }::vertex, b"}}')
+
+
+def test_suffix_sequences_within_strings_are_preserved():
+    for note in ["x}::vertex", "[1]::path", "{}::edge, 2::numeric"]:
+        s = (
+            '{"id": 1, "label": "Library", "properties": {"note": "'
+            + note
+            + '"}}::vertex'
+        )
+        assert AgtypeParser.parse(s)["properties"]["note"] == note
+        assert AgtypeParser.parse_typed(s).properties["note"] == note
+        assert AgtypeParser.strip_suffixes(s).endswith('"' + note + '"}}')
+    obj = AgtypeParser.parse('{"a":"[1]::path"}')
+    assert obj == {"a": "[1]::path"}
+    obj = AgtypeParser.parse('[{"note":"x}::vertex"}, ' + VERTEX + "]")
+    assert obj[0]["note"] == "x}::vertex"
+    assert obj[1]["label"] == "Developer"
+
+
+def test_nan_and_infinity():
+    obj = AgtypeParser.parse(
+        '[NaN, Infinity, {"id": 1, "label": "x", "properties": {}}::vertex]'
+    )
+    assert obj[0] != obj[0]
+    assert obj[1] == float("inf")
+    assert obj[2]["id"] == 1
+
+
+def test_captured_rows_corpus():
+    lines = FS.read_lines("data/age/agtype_rows.txt")
+    assert len(lines) > 40
+    for line in lines:
+        assert AgtypeParser.parse(line.strip()) is not None
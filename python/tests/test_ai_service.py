@@ -1,5 +1,8 @@
+import asyncio
+import http.server
 import json
 import os
+import threading
 import time
 import pytest
 import faker
@@ -7,6 +10,7 @@ import faker
 from src.services.ai_completion import AiCompletion
 from src.services.ai_conversation import AiConversation
 from src.services.ai_service import AiService
+from src.services.embedding_cache import EmbeddingCache
 from src.util.fs import FS
 
 # pytest -v tests/test_ai_service.py
@@ -29,3 +33,123 @@ def test_generate_embeddings():
     assert resp is not None
     assert "CreateEmbeddingResponse" in str(type(resp))
     assert len(resp.data[0].embedding) == 1536
+
+
+@pytest.fixture(autouse=True)
+def no_embedding_cache(monkeypatch):
+    monkeypatch.setenv("AIG4PG_EMBEDDING_CACHE_ENABLED", "false")
+    EmbeddingCache.shared_instance = None
+
+
+class FakeEmbeddingsHandler(http.server.BaseHTTPRequestHandler):
+    """
+    A local stand-in for the Azure OpenAI embeddings endpoint.  The first
+    request is rejected with HTTP 429 to exercise the retry logic.
+    """
+
+    requests = list()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        FakeEmbeddingsHandler.requests.append(body["input"])
+        if len(FakeEmbeddingsHandler.requests) == 1:
+            self.respond(
+                429, {"error": {"message": "rate limited"}}, {"Retry-After": "0"}
+            )
+            return
+        data = list()
+        for idx, text in reversed(list(enumerate(body["input"]))):
+            data.append(
+                {"object": "embedding", "index": idx, "embedding": [float(len(text))]}
+            )
+        resp = {
+            "object": "list",
+            "data": data,
+            "model": "embeddings",
+            "usage": {"prompt_tokens": 1, "total_tokens": 1},
+        }
+        self.respond(200, resp, {})
+
+    def respond(self, status, obj, headers):
+        payload = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fake_aoai(monkeypatch):
+    FakeEmbeddingsHandler.requests = list()
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FakeEmbeddingsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv(
+        "AIG4PG_OPENAI_URL", "http://127.0.0.1:{}/".format(server.server_port)
+    )
+    monkeypatch.setenv("AIG4PG_OPENAI_KEY", "test")
+    monkeypatch.setenv("AIG4PG_ENCRYPTION_SYMMETRIC_KEY", "")
+    monkeypatch.setenv("AIG4PG_OPENAI_EMBEDDINGS_BATCH_SIZE", "2")
+    monkeypatch.setenv("AIG4PG_OPENAI_EMBEDDINGS_CONCURRENCY", "2")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_embedding_batches(monkeypatch):
+    monkeypatch.setenv("AIG4PG_OPENAI_EMBEDDINGS_BATCH_SIZE", "3")
+    monkeypatch.setenv("AIG4PG_OPENAI_EMBEDDINGS_BATCH_MAX_TOKENS", "100")
+    ai_svc = AiService()
+    long_text = "word " * 150
+    texts = ["a", "b", "c", "d", long_text, "e"]
+    batches = ai_svc.embedding_batches(texts)
+    assert batches[0] == ["a", "b", "c"]
+    assert batches[1] == ["d"]
+    assert batches[2] == [long_text]  # exceeds the max tokens with "d"
+    assert batches[3] == ["e"]
+    assert ai_svc.embedding_batches([]) == []
+
+
+def test_retry_delay_seconds():
+    ai_svc = AiService()
+    assert ai_svc.retry_delay_seconds(Exception("no response"), 1) == 1.0
+    assert ai_svc.retry_delay_seconds(Exception("no response"), 10) == 30.0
+
+
+def test_generate_embeddings_batch(fake_aoai):
+    ai_svc = AiService()
+    texts = ["alpha", "bb", "alpha", "cccc", "d", "bb"]
+    embeddings = asyncio.run(ai_svc.generate_embeddings_batch(texts))
+    assert embeddings == [[5.0], [2.0], [5.0], [4.0], [1.0], [2.0]]
+
+    # one rejected request and its retry, then the remaining batch
+    requests = FakeEmbeddingsHandler.requests
+    assert len(requests) == 3
+    sent = sorted([text for batch in requests[1:] for text in batch])
+    assert sent == ["alpha", "bb", "cccc", "d"]
+    for batch in requests:
+        assert len(batch) <= 2
+
+
+def test_generate_embeddings_batch_uses_cache(fake_aoai, monkeypatch):
+    monkeypatch.setenv("AIG4PG_EMBEDDING_CACHE_ENABLED", "true")
+    monkeypatch.setenv("AIG4PG_EMBEDDING_CACHE_FILE", "")
+    ai_svc = AiService()
+    ai_svc.embedding_cache.put(ai_svc.embeddings_deployment, "alpha", [9.0])
+    embeddings = asyncio.run(ai_svc.generate_embeddings_batch(["alpha", "bb"]))
+    assert embeddings == [[9.0], [2.0]]
+    sent = [text for batch in FakeEmbeddingsHandler.requests for text in batch]
+    assert "alpha" not in sent
+
+    # the sync API now finds "bb" in the cache, without an HTTP request
+    count = len(FakeEmbeddingsHandler.requests)
+    resp = ai_svc.generate_embeddings("bb")
+    assert resp.data[0].embedding == [2.0]
+    assert len(FakeEmbeddingsHandler.requests) == count
+    EmbeddingCache.shared_instance = None
@@ -0,0 +1,151 @@
+import asyncio
+import http.server
+import json
+import threading
+import time
+
+import pytest
+
+from src.services.ai_service import AiService
+from src.services.async_ai_service import AsyncAiService
+from src.services.embedding_cache import EmbeddingCache
+
+# pytest -v tests/test_async_ai_service.py
+
+
+class SlowOpenAIHandler(http.server.BaseHTTPRequestHandler):
+    """
+    A local stand-in for the Azure OpenAI embeddings and chat completions
+    endpoints, which takes delay seconds to respond to each request.
+    """
+
+    delay = 0.25
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(SlowOpenAIHandler.delay)
+        if self.path.split("?")[0].endswith("/embeddings"):
+            resp = {
+                "object": "list",
+                "data": [{"object": "embedding", "index": 0, "embedding": [0.5, 0.25]}],
+                "model": "embeddings",
+                "usage": {"prompt_tokens": 1, "total_tokens": 1},
+            }
+        else:
+            resp = {
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt4",
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {
+                            "role": "assistant",
+                            "content": body["messages"][-1]["content"].upper(),
+                        },
+                    }
+                ],
+            }
+        payload = json.dumps(resp).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def slow_aoai(monkeypatch):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), SlowOpenAIHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv(
+        "AIG4PG_OPENAI_URL", "http://127.0.0.1:{}/".format(server.server_port)
+    )
+    monkeypatch.setenv("AIG4PG_OPENAI_KEY", "test")
+    monkeypatch.setenv("AIG4PG_ENCRYPTION_SYMMETRIC_KEY", "")
+    monkeypatch.setenv("AIG4PG_EMBEDDING_CACHE_ENABLED", "false")
+    monkeypatch.setenv("AIG4PG_OPENAI_TIMEOUT", "5")
+    EmbeddingCache.shared_instance = None
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_concurrent_embeddings(slow_aoai):
+    async def search_concurrently(ai_svc, count):
+        texts = ["text {}".format(n) for n in range(count)]
+        return await asyncio.gather(*[ai_svc.agenerate_embeddings(t) for t in texts])
+
+    ai_svc = AsyncAiService()
+    start_time = time.time()
+    responses = asyncio.run(search_concurrently(ai_svc, 8))
+    elapsed = time.time() - start_time
+    assert len(responses) == 8
+    for resp in responses:
+        assert resp.data[0].embedding == [0.5, 0.25]
+    # eight requests of 0.25s each, executed concurrently rather than serially
+    assert elapsed < 1.5
+
+
+def test_generate_completion(slow_aoai):
+    async def complete(ai_svc):
+        try:
+            return await ai_svc.generate_completion("hello", system_prompt="be loud")
+        finally:
+            await ai_svc.close()
+
+    ai_svc = AsyncAiService()
+    resp = asyncio.run(complete(ai_svc))
+    assert resp.choices[0].message.content == "HELLO"
+    assert ai_svc.async_aoai_client is None
+
+
+def test_timeout(slow_aoai):
+    ai_svc = AsyncAiService()
+    resp = asyncio.run(ai_svc.agenerate_embeddings("slow", timeout=0.05))
+    assert resp is None
+
+
+def test_generate_embeddings_is_not_overridden():
+    # the sync AiService method keeps its contract in the subclass
+    assert AsyncAiService.generate_embeddings is AiService.generate_embeddings
+    assert asyncio.iscoroutinefunction(AsyncAiService.agenerate_embeddings)
+
+
+class ThreadRecordingCache:
+    """An in-memory stand-in for EmbeddingCache, recording the calling threads."""
+
+    def __init__(self):
+        self.embeddings = dict()
+        self.threads = list()
+
+    def get(self, deployment, text):
+        self.threads.append(threading.get_ident())
+        return self.embeddings.get((deployment, text))
+
+    def put(self, deployment, text, embedding):
+        self.threads.append(threading.get_ident())
+        self.embeddings[(deployment, text)] = embedding
+
+
+def test_embedding_cache_runs_off_the_event_loop(slow_aoai):
+    async def generate_twice(ai_svc):
+        loop_thread = threading.get_ident()
+        first = await ai_svc.agenerate_embeddings("text")
+        second = await ai_svc.agenerate_embeddings("text")
+        return loop_thread, first, second
+
+    ai_svc = AsyncAiService()
+    cache = ThreadRecordingCache()
+    ai_svc.embedding_cache = cache
+    loop_thread, first, second = asyncio.run(generate_twice(ai_svc))
+    assert first.data[0].embedding == [0.5, 0.25]
+    assert second.data[0].embedding == [0.5, 0.25]
+    assert len(cache.threads) == 3  # get, put, then the cached get
+    assert loop_thread not in cache.threads
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from src.util.case_file_index import CaseFileIndex
+
+# pytest -v tests/test_case_file_index.py
+
+
+def write_cases(tmp_path) -> tuple:
+    lines = ["30\t{}\t[]", "10\t{}\t[]", "  20\t{}\t[]  ", "10\t{dup}\t[]"]
+    ids, offsets, lengths, offset = list(), list(), list(), 0
+    for line in lines:
+        ids.append(int(line.split("\t")[0]))
+        offsets.append(offset)
+        lengths.append(len(line))
+        offset = offset + len(line) + 1
+    path = os.path.join(tmp_path, "cases.sql")
+    with open(path, "wt") as f:
+        f.write("\n".join(lines) + "\n")
+    return path, CaseFileIndex.build(ids, offsets, lengths)
+
+
+def test_build_save_load(tmp_path):
+    path, index = write_cases(tmp_path)
+    assert list(index["id"]) == [10, 10, 20, 30]
+    assert list(index["offset"]) == [9, 31, 18, 0]
+    index_file = os.path.join(tmp_path, "cases.idx.npy")
+    CaseFileIndex.save(index, index_file)
+    loaded = CaseFileIndex.load(index_file)
+    assert (loaded == index).all()
+    assert CaseFileIndex.index_file("/data/cases.sql") == "tmp/cases.sql.idx.npy"
+
+
+def test_lookup_and_read_records(tmp_path):
+    path, index = write_cases(tmp_path)
+    records = CaseFileIndex.lookup(index, ["20", "10", "99", "10"])
+    assert list(records["id"]) == [10, 20, 10]  # in file order
+    lines = list(CaseFileIndex.read_records(path, records))
+    assert lines == [b"10\t{}\t[]", b"20\t{}\t[]", b"10\t{dup}\t[]"]
+    assert len(CaseFileIndex.lookup(index, [])) == 0
+    assert len(CaseFileIndex.lookup(index, ["99"])) == 0
+
+
+def test_stale_index(tmp_path):
+    path, index = write_cases(tmp_path)
+    with open(path, "wt") as f:
+        f.write("31\t{}\t[]\n")
+    records = CaseFileIndex.lookup(index, ["30"])
+    with pytest.raises(ValueError):
+        list(CaseFileIndex.read_records(path, records))
@@ -0,0 +1,110 @@
+import json
+import os
+
+from src.util.case_file_scanner import CaseFileScanner
+
+# pytest -v tests/test_case_file_scanner.py
+
+
+def case_line(idx: int) -> str:
+    doc = dict()
+    doc["id"] = 1000 + idx
+    doc["name_abbreviation"] = "Case {} v. Café".format(idx)
+    doc["file_name"] = "{:04d}".format(idx + 1)
+    doc["citations"] = [{"cite": "{} Wash. {}".format(100 + idx, 500 + idx)}]
+    doc["cites_to"] = [{"cite": "45 Wn. (2d) 71"}, {"cite": "12 Unknown 3"}]
+    doc["casebody"] = {"opinions": ["x" * (idx * 37 % 500)]}
+    return "{}\t{}\t[0.1, 0.2]".format(doc["id"], json.dumps(doc, ensure_ascii=False))
+
+
+def write_cases(tmp_path, count: int) -> str:
+    lines = ["COPY public.cases (id, json, embedding) FROM stdin;"]
+    for idx in range(count):
+        lines.append(case_line(idx))
+        if idx == 5:
+            lines.append("1\t{not json}\t[]")
+            lines.append("")
+    lines.append("\\.")
+    path = os.path.join(tmp_path, "cases.sql")
+    with open(path, "wt", encoding="ISO-8859-1") as f:
+        f.write("\n".join(lines))
+    return path
+
+
+def test_byte_ranges(tmp_path):
+    path = write_cases(tmp_path, 40)
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    for parts in [1, 3, 7, 100]:
+        ranges = CaseFileScanner.byte_ranges(path, parts)
+        assert ranges[0][0] == 0
+        assert ranges[-1][1] == size
+        assert len(ranges) <= parts
+        for (start1, end1), (start2, end2) in zip(ranges, ranges[1:]):
+            assert end1 == start2
+            assert data[end1 - 1 : end1] == b"\n"
+
+
+def test_scan(tmp_path):
+    path = write_cases(tmp_path, 40)
+    sequential = CaseFileScanner(workers=1).scan(path, ["1003"])
+    parallel = CaseFileScanner(workers=2, ranges_per_worker=3).scan(path, ["1003"])
+    assert (parallel.pop("index") == sequential.pop("index")).all()
+    assert parallel == sequential
+    assert sequential["data_lines_read"] == 41
+    assert sequential["json_parse_ok"] == 40
+    assert sequential["json_parse_fail"] == 1
+    assert list(sequential["cases"].keys())[0] == "1000"
+    meta = sequential["cases"]["1002"]
+    assert meta["name_abbreviation"] == "Case 2 v. Café"
+    assert meta["__case_url"] == "https://static.case.law/wash/102/cases/0003-01.json"
+    assert meta["__citations"] == [
+        "https://static.case.law/wash-2d/45/cases/0071-01.json"
+    ]
+    assert list(sequential["seed_docs"].keys()) == ["1003"]
+    assert sequential["seed_docs"]["1003"]["casebody"] is not None
+
+
+def test_scan_max_data_lines(tmp_path):
+    path = write_cases(tmp_path, 40)
+    unbounded = CaseFileScanner(workers=1).scan(path, ["1003"])
+    for workers in [1, 3]:
+        scanner = CaseFileScanner(workers=workers, ranges_per_worker=3)
+        capped = scanner.scan(path, ["1003", "1020"], 10)
+        # the first 10 data lines include the invalid json line
+        assert list(capped["cases"].keys()) == [str(1000 + i) for i in range(9)]
+        assert capped["json_parse_ok"] == 9
+        assert capped["json_parse_fail"] == 1
+        assert list(capped["seed_docs"].keys()) == ["1003"]
+        # all of the data lines are still counted and indexed
+        assert capped["data_lines_read"] == 41
+        assert (capped.pop("index") == unbounded["index"]).all()
+        assert scanner.scan(path, None, 0)["cases"] == dict()
+        uncapped = scanner.scan(path, ["1003"], 1000)
+        uncapped.pop("index")
+        assert uncapped == {k: v for k, v in unbounded.items() if k != "index"}
+
+
+def test_index(tmp_path):
+    path = write_cases(tmp_path, 40)
+    scanned = CaseFileScanner(workers=1).scan(path)["index"]
+    indexed = CaseFileScanner(workers=2, ranges_per_worker=3).index(path)
+    assert (scanned == indexed).all()
+    assert list(indexed["id"][0:3]) == [1, 1000, 1001]
+    with open(path, "rb") as f:
+        data = f.read()
+    offset, length = int(indexed["offset"][2]), int(indexed["length"][2])
+    assert data[offset : offset + length].decode("ISO-8859-1") == case_line(1)
+
+
+def test_metadata_batch():
+    docs = [json.loads(case_line(idx).split("\t")[1]) for idx in range(5)]
+    docs[1]["file_name"] = 7  # the url can't be calculated
+    docs[2]["cites_to"].insert(1, {"case_ids": [1]})  # the cites stop here
+    docs[3].pop("citations")
+    batch = [CaseFileScanner.case_parts(doc) for doc in docs]
+    expected = [CaseFileScanner.case_metadata(doc) for doc in docs]
+    assert CaseFileScanner.metadata_batch(batch) == expected
+    assert expected[1]["__case_url"] == "?"
+    assert len(expected[2]["__citations"]) == 1
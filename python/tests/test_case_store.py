@@ -0,0 +1,77 @@
+import json
+import os
+
+from src.util.case_store import CaseStore
+from src.util.citation_graph import CitationGraph
+from src.util.columnar_store import StrColumn
+
+# pytest -v tests/test_case_store.py
+
+
+def case_id_name_dict() -> dict:
+    data = dict()
+    for id, url, citations in [
+        ("10", "a", ["b", "x"]),
+        ("20", "b", ["a"]),
+        ("30", "?", []),
+        ("40", "a", ["b"]),
+    ]:
+        data[id] = {
+            "id": id,
+            "name_abbreviation": "Case {} v. Café".format(id),
+            "__case_url": url,
+            "__citations": citations,
+        }
+    return data
+
+
+def test_write_and_read(tmp_path):
+    directory = os.path.join(tmp_path, "case_store")
+    CaseStore.write(case_id_name_dict(), directory)
+    store = CaseStore(directory)
+    assert store.row_count() == 4
+    assert store.find_rows(["40", "99", "10"]) == [3, 0]
+    assert store.case_metadata([1]) == [case_id_name_dict()["20"]]
+    assert store.case_id_name_dict() == case_id_name_dict()
+    assert store.store.strs("urls").to_list() == ["a", "b", "x", "?"]
+
+
+def test_citation_graph(tmp_path):
+    store = CaseStore.write(case_id_name_dict(), str(tmp_path))
+    graph = CitationGraph.from_case_store(store)
+    expected = CitationGraph.from_case_id_name_dict(case_id_name_dict())
+    assert isinstance(graph.urls, StrColumn)  # decoded only for the reached rows
+    assert graph.urls.to_list() == expected.urls
+    nodes, depths = graph.expand([0], 2)
+    assert [graph.urls[n] for n in nodes] == ["a", "b"]
+    assert graph.offsets.tolist() == expected.offsets.tolist()
+    assert graph.targets.tolist() == expected.targets.tolist()
+    assert graph.node_rows.tolist() == [3, 1, -1, 2]
+
+
+def test_export_json(tmp_path):
+    store = CaseStore.write(case_id_name_dict(), os.path.join(tmp_path, "store"))
+    store.export_json(str(tmp_path))
+    with open(os.path.join(tmp_path, "case_id_name_dict.json")) as f:
+        assert json.load(f) == case_id_name_dict()
+    with open(os.path.join(tmp_path, "case_url_dict.json")) as f:
+        case_url_dict = json.load(f)
+    assert sorted(case_url_dict.keys()) == ["?", "a", "b"]
+    assert case_url_dict["a"]["id"] == "40"
+
+
+def test_iteration(tmp_path):
+    store = CaseStore.write(case_id_name_dict(), os.path.join(tmp_path, "store"))
+    directory = os.path.join(tmp_path, "iteration_1")
+    CaseStore.write_iteration(directory, [3, 1], [0, 1], [True, False])
+    assert store.case_ids([3, 1]) == ["40", "20"]
+    metadata = store.iteration_metadata(directory)
+    assert list(metadata.keys()) == ["a", "b"]
+    assert metadata["a"]["id"] == "40"
+    assert metadata["a"]["iteration"] == 0
+    assert metadata["a"]["citations_gathered"] == 1
+    assert metadata["b"]["citations_gathered"] == 0
+    outfile = store.export_iteration_json(directory)
+    assert outfile == directory + ".json"
+    with open(outfile) as f:
+        assert json.load(f) == metadata
@@ -0,0 +1,79 @@
+from src.util.citation_graph import CitationGraph
+
+# pytest -v tests/test_citation_graph.py
+
+
+def case(id: str, url: str, citations: list[str]) -> dict:
+    meta = dict()
+    meta["id"] = id
+    meta["name_abbreviation"] = "case " + id
+    meta["__case_url"] = url
+    meta["__citations"] = citations
+    return meta
+
+
+def cases() -> dict:
+    # a -> b, c ; b -> d, unknown ; c -> d, a ; d -> e ; e -> f
+    data = dict()
+    data["1"] = case("1", "a", ["b", "c"])
+    data["2"] = case("2", "b", ["d", "unknown"])
+    data["3"] = case("3", "c", ["d", "a"])
+    data["4"] = case("4", "d", ["e"])
+    data["5"] = case("5", "e", ["f"])
+    data["6"] = case("6", "f", [])
+    data["7"] = case("7", "g", ["a"])
+    return data
+
+
+def rows(data: dict, *ids) -> list[int]:
+    return [list(data.keys()).index(id) for id in ids]
+
+
+def urls(graph: CitationGraph, nodes) -> list[str]:
+    return [graph.urls[n] for n in nodes]
+
+
+def test_csr():
+    graph = CitationGraph.from_case_id_name_dict(cases())
+    assert graph.urls == ["a", "b", "c", "d", "unknown", "e", "f", "g"]
+    assert graph.node_count() == 7
+    assert graph.edge_count() == 8  # the citation of "unknown" is dropped
+    assert graph.offsets.tolist() == [0, 2, 3, 5, 6, 6, 7, 7, 8]
+    assert graph.targets.tolist() == [1, 2, 3, 3, 0, 5, 6, 0]
+    assert graph.targets.dtype.name == "int32"
+    assert graph.node_rows.tolist() == [0, 1, 2, 3, -1, 4, 5, 6]
+
+
+def test_expand():
+    data = cases()
+    graph = CitationGraph.from_case_id_name_dict(data)
+    nodes, depths = graph.expand(rows(data, "1"), 10)
+    assert urls(graph, nodes) == ["a", "b", "c", "d", "e", "f"]
+    assert depths.tolist() == [0, 1, 1, 2, 3, 4]
+    nodes, depths = graph.expand(rows(data, "1"), 2)
+    assert urls(graph, nodes) == ["a", "b", "c", "d"]
+    nodes, depths = graph.expand(rows(data, "1"), 0)
+    assert urls(graph, nodes) == ["a"]
+    nodes, depths = graph.expand([], 3)
+    assert len(nodes) == 0
+
+
+def test_expand_limits():
+    data = cases()
+    graph = CitationGraph.from_case_id_name_dict(data)
+    nodes, depths = graph.expand(rows(data, "1"), 10, max_fanout=1)
+    assert urls(graph, nodes) == ["a", "b", "d", "e", "f"]
+    nodes, depths = graph.expand(rows(data, "1"), 10, max_nodes=3)
+    assert urls(graph, nodes) == ["a", "b", "c"]
+    assert depths.tolist() == [0, 1, 1]
+
+
+def test_duplicate_urls():
+    data = cases()
+    data["8"] = case("8", "a", ["g"])  # the last case with url "a" represents it
+    graph = CitationGraph.from_case_id_name_dict(data)
+    assert graph.node_rows[0] == 7
+    nodes, depths = graph.expand(rows(data, "7"), 2)
+    assert urls(graph, nodes) == ["g", "a"]
+    nodes, depths = graph.expand(rows(data, "1"), 1)  # the seed's own citations
+    assert urls(graph, nodes) == ["a", "b", "c"]
@@ -50,9 +50,32 @@ def test_parsing_reasonable_values():
     assert parser.scrubbed_cite == "45 wn 2d 71"
     assert url == "https://static.case.law/wash-2d/45/cases/0071-01.json"
 
+
+def test_bounded_diagnostics():
+    CiteParser.set_diagnostics(True, sample_size=2)
+    parser = CiteParser()
+    for n in range(100):
+        parser.parse("{} Wn. (2d) 71".format(n), "0071")
+        parser.parse("45 Wash. 71", None)
+        parser.parse("45 Unknown 71", None)
     data = CiteParser.values_counter.get_data()
-    expected_key = "parsed | 45 Wn. (2d) 71^0071 | https://static.case.law/wash-2d/45/cases/0071-01.json"
-    assert expected_key in data.keys()
+    assert data == {
+        "4 tokens | url | file_name": 100,
+        "3 tokens | url | no file_name": 100,
+        "3 tokens | no url | no file_name": 100,
+    }
+    samples = CiteParser.values_samples["4 tokens | url | file_name"]
+    assert samples == [
+        "0 Wn. (2d) 71^0071 | https://static.case.law/wash-2d/0/cases/0071-01.json",
+        "1 Wn. (2d) 71^0071 | https://static.case.law/wash-2d/1/cases/0071-01.json",
+    ]
+    assert CiteParser.cache_info().currsize > 0
+
+    CiteParser.set_diagnostics(False)
+    url = parser.parse("45 Wn. (2d) 71", None)
+    assert url == "https://static.case.law/wash-2d/45/cases/0071-01.json"
+    assert CiteParser.values_counter.get_data() == {}
+    CiteParser.set_diagnostics(True)
 
 
 def test_parsing_unexpected_and_odd_values():
@@ -71,3 +94,37 @@ def test_parsing_unexpected_and_odd_values():
     )
     assert parser.scrubbed_cite == "this value is unexpected and really makes no sense"
     assert url == None
+
+
+def test_parse_batch():
+    cites = [
+        "41 Wn. (2d) 224",
+        "99 Wash. App. 575",
+        "1 Wash. 110",
+        "41 Wn. (2d) 224",
+        None,
+        "12 Ca. 3",
+        "a b c d e",
+    ]
+    parser = CiteParser()
+    expected = [parser.parse(cite, None) for cite in cites]
+    assert CiteParser.parse_batch(cites) == expected
+    assert expected[0] == "https://static.case.law/wash-2d/41/cases/0224-01.json"
+
+    file_names = ["0224", "0575-02", None, "0224", "1", "0003", None]
+    expected = [parser.parse(c, f) for c, f in zip(cites, file_names)]
+    assert CiteParser.parse_batch(cites, file_names) == expected
+    assert expected[1] == "https://static.case.law/wash-app/99/cases/0575-02.json"
+
+    urls, codes = CiteParser.parse_batch(cites, interned=True)
+    assert len(urls) == 4
+    assert codes.tolist()[0] == codes.tolist()[3]
+    assert codes.tolist()[4:] == [-1, codes.tolist()[5], -1]
+    assert urls[codes[5]] == "https://static.case.law/ca/12/cases/0003-01.json"
+    assert CiteParser.parse_batch([]) == []
+
+    signed = ["45 Wn. -5", "12 Wash. +12", "3 Wash. (2d) -12", "7 Wash. 0"]
+    expected = [parser.parse(cite, None) for cite in signed]
+    assert CiteParser.parse_batch(signed) == expected
+    assert expected[0] == "https://static.case.law/wash/45/cases/00-5-01.json"
+    assert expected[1] == "https://static.case.law/wash/12/cases/0+12-01.json"
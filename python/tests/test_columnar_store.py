@@ -0,0 +1,47 @@
+import os
+
+import numpy as np
+
+from src.util.columnar_store import ColumnarStore
+
+# pytest -v tests/test_columnar_store.py
+
+
+def test_write_and_read(tmp_path):
+    directory = os.path.join(tmp_path, "store")
+    store = ColumnarStore.create(directory)
+    store.write_strs("names", ["alpha", "", "Café", "z"])
+    store.write_strs("ascii", ["a", "bb", ""])
+    store.write_lists("lists", [[1, 2], [], [3]])
+    store.write_array("counts", np.arange(4, dtype=np.int32))
+    store.manifest["row_count"] = 4
+    store.save()
+
+    store = ColumnarStore(directory)
+    assert store.columns() == {
+        "names": "str",
+        "ascii": "str",
+        "lists": "list",
+        "counts": "array",
+    }
+    assert store.manifest["row_count"] == 4
+    names = store.column("names")
+    assert len(names) == 4
+    assert names[2] == "Café"
+    assert names.to_list() == ["alpha", "", "Café", "z"]
+    assert store.column("ascii").to_list() == ["a", "bb", ""]
+    lists = store.column("lists")
+    assert [lists[i].tolist() for i in range(len(lists))] == [[1, 2], [], [3]]
+    counts = store.column("counts")
+    assert isinstance(counts, np.memmap)
+    assert counts.tolist() == [0, 1, 2, 3]
+
+
+def test_empty_columns(tmp_path):
+    store = ColumnarStore.create(str(tmp_path))
+    store.write_strs("names", [])
+    store.write_lists("lists", [])
+    store.save()
+    store = ColumnarStore(str(tmp_path))
+    assert store.strs("names").to_list() == []
+    assert len(store.lists("lists")) == 0
@@ -71,8 +71,8 @@ def test_defined_and_sample_environment_variables():
     samples = ConfigService.sample_environment_variable_values()
     assert "AIG4PG_LOG_LEVEL" in defined.keys()
     assert "AIG4PG_LOG_LEVEL" in samples.keys()
-    assert len(defined.keys()) == 16
-    assert len(samples.keys()) == 13
+    assert len(defined.keys()) == 37
+    assert len(samples.keys()) == 34
 
 
 def test_log_defined_env_vars():
@@ -0,0 +1,107 @@
+import pickle
+import random
+
+from src.util.counter import Counter
+
+# pytest -v tests/test_counter.py
+
+
+def test_legacy_api():
+    c = Counter()
+    for key in ["a", "b", "a", "c", "a", "b"]:
+        c.increment(key)
+    c.decrement("c")
+    c.decrement("d")
+    assert c.get_data() == {"a": 3, "b": 2, "c": 0, "d": -1}
+    assert c.get_value("a") == 3
+    assert c.get_value("x") == 0
+    assert c.most_frequent() == "a"
+    assert Counter().most_frequent() is None
+    other = Counter()
+    other.increment("b")
+    other.increment("e")
+    c.merge(other)
+    c.merge(None)
+    assert c.get_data() == {"a": 3, "b": 3, "c": 0, "d": -1, "e": 1}
+    assert c.most_frequent() == "a"  # the first of the tied keys
+
+
+def test_update_and_most_common():
+    c = Counter()
+    c.update(["x", "y", "x", "z", "x", "y"])
+    c.update({"z": 5, "w": 1})
+    assert c.get_data() == {"x": 3, "y": 2, "z": 6, "w": 1}
+    assert c.most_common(2) == [("z", 6), ("x", 3)]
+    assert c.most_common(10)[-1] == ("w", 1)
+    assert c.most_common(0) == []
+
+
+def test_space_saving():
+    random.seed(7)
+    stream = [str(int(random.paretovariate(1.0))) for n in range(20000)]
+    exact = Counter()
+    exact.update(stream)
+    sketch = Counter(capacity=20)
+    for key in stream:
+        sketch.increment(key)
+    assert len(sketch.get_data()) == 20
+    assert len(sketch.heap) <= 2 * 20
+    top_exact = [key for key, n in exact.most_common(5)]
+    top_sketch = [key for key, n in sketch.most_common(5)]
+    assert top_sketch == top_exact
+    for key, n in sketch.get_data().items():
+        assert exact.get_value(key) <= n <= exact.get_value(key) + sketch.get_error(key)
+
+
+def test_serialize_and_merge_shards():
+    keys = [str(n % 37) for n in range(1000)]
+    shards = list()
+    for idx in range(4):
+        shard = Counter()
+        shard.update(keys[idx::4])
+        shards.append(shard.serialize())
+    merged = Counter.merge_all(shards)
+    expected = Counter()
+    expected.update(keys)
+    assert merged.get_data() == expected.get_data()
+    assert pickle.loads(pickle.dumps(merged)).get_data() == expected.get_data()
+
+    bounded = Counter.merge_all([Counter.deserialize(s) for s in shards], 5)
+    assert len(bounded.get_data()) == 5
+    assert bounded.capacity == 5
+    assert Counter.deserialize(bounded.serialize()).get_data() == bounded.get_data()
+
+
+def test_merge_credits_evicted_counts():
+    shards = list()
+    for text in ["aabc", "bbb"]:
+        shard = Counter(capacity=2)
+        shard.update(list(text))
+        shards.append(shard)
+    merged = Counter.merge_all(shards, 2)
+    assert merged.get_value("b") == 4  # b was evicted from the first shard
+    assert merged.get_error("b") == 1
+    assert len(merged.get_data()) == 2
+    assert merged.evicted == 2
+
+
+def test_merge_all_bounds():
+    random.seed(11)
+    for trial in range(20):
+        capacity = random.randint(2, 12)
+        exact = Counter()
+        shards = list()
+        for idx in range(random.randint(2, 6)):
+            stream = [
+                str(int(random.paretovariate(0.8)))
+                for n in range(random.randint(0, 400))
+            ]
+            exact.update(stream)
+            shard = Counter(capacity=random.randint(2, 12))
+            shard.update(stream)
+            shards.append(shard.serialize())
+        merged = Counter.merge_all(shards, capacity)
+        assert len(merged.get_data()) <= capacity
+        for key, n in merged.get_data().items():
+            true = exact.get_value(key)
+            assert true <= n <= true + merged.get_error(key)
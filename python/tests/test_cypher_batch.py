@@ -0,0 +1,55 @@
+import json
+
+from src.util.cypher_batch import CypherBatch
+
+# pytest -v tests/test_cypher_batch.py
+
+
+def test_batches():
+    assert list(CypherBatch.batches(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(CypherBatch.batches([], 2)) == []
+    assert list(CypherBatch.batches(range(2), 0)) == [[0], [1]]
+
+
+def test_literal():
+    assert CypherBatch.literal(None) == "null"
+    assert CypherBatch.literal(True) == "true"
+    assert CypherBatch.literal(12) == "12"
+    assert CypherBatch.literal("o'reilly") == "'o\\'reilly'"
+    value = [{"a": "flask", "b": "jinja2"}]
+    assert CypherBatch.literal(value) == "[{a: 'flask', b: 'jinja2'}]"
+
+
+def test_index_statements():
+    statements = CypherBatch.index_statements("libraries1", "Library")
+    assert len(statements) == 3
+    assert (
+        statements[1]
+        == 'CREATE INDEX IF NOT EXISTS idx_libraries1_library_properties ON "libraries1"."Library" USING gin (properties);'
+    )
+    assert "agtype_access_operator" in statements[2]
+
+
+def test_edge_sql():
+    cypher = CypherBatch.edge_cypher("developer_of")
+    assert cypher == (
+        "UNWIND $pairs AS e MATCH (a:Developer {name: e.a}), "
+        + "(b:Library {name: e.b}) CREATE (a)-[:developer_of]->(b)"
+    )
+    sql = CypherBatch.parameterized_sql("libraries1", cypher)
+    assert sql.startswith("SELECT * FROM ag_catalog.cypher('libraries1', $$ UNWIND")
+    assert sql.endswith("$$, %s) as (r agtype);")
+    params = CypherBatch.params("pairs", [{"a": "x", "b": "y"}])
+    assert json.loads(params[0]) == {"pairs": [{"a": "x", "b": "y"}]}
+    sql = CypherBatch.edge_literal_sql("g", "uses_lib", [{"a": "x", "b": "y"}])
+    assert "UNWIND [{a: 'x', b: 'y'}] AS e" in sql
+
+
+def test_vertex_sql():
+    cypher = CypherBatch.vertex_cypher("Developer")
+    assert cypher == "UNWIND $rows AS r CREATE (:Developer {name: r.name})"
+    sql = CypherBatch.vertex_literal_sql("g", "Developer", [{"name": "x"}])
+    assert sql == (
+        "SELECT * FROM cypher('g', $$ UNWIND [{name: 'x'}] AS r "
+        + "CREATE (:Developer {name: r.name}) $$) as (r agtype);"
+    )
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import os
+
+from contextlib import asynccontextmanager
+
+from src.services.cypher_loader import CypherLoader
+from src.services.db_service import DbService
+
+# pytest -v tests/test_cypher_loader.py
+
+
+class FakePipeline:
+    def __init__(self):
+        self.syncs = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def sync(self):
+        self.syncs = self.syncs + 1
+
+
+class FakeCursor:
+    def __init__(self):
+        self.executed = list()
+        self.result = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def execute(self, sql, params=None, prepare=None):
+        sql = sql if isinstance(sql, str) else sql.as_string(None)
+        self.executed.append((sql, params))
+        if "from ag_catalog.ag_graph where" in sql:
+            self.result = [(1,)]
+        elif "from ag_catalog.ag_label" in sql:
+            self.result = [
+                (name, idx + 3, name + "_id_seq")
+                for idx, name in enumerate(
+                    [
+                        "Library",
+                        "Developer",
+                        "uses_lib",
+                        "used_by_lib",
+                        "developer_of",
+                        "developed_by",
+                    ]
+                )
+            ]
+
+    async def fetchone(self):
+        return self.result[0]
+
+    async def fetchall(self):
+        return self.result
+
+
+class FakeTransaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self.fake_cursor = cursor
+        self.fake_pipeline = FakePipeline()
+
+    def transaction(self):
+        return FakeTransaction()
+
+    def cursor(self):
+        return self.fake_cursor
+
+    def pipeline(self):
+        return self.fake_pipeline
+
+
+def test_load(tmp_path, monkeypatch):
+    for idx in range(7):
+        doc = {"name": "lib{}".format(idx), "developers": ["dev{}".format(idx)]}
+        if idx > 0:
+            doc["dependency_ids"] = ["pypi:lib0"]
+        with open(os.path.join(tmp_path, "{}.json".format(idx)), "wt") as f:
+            f.write(json.dumps(doc))
+    cursor = FakeCursor()
+    conn = FakeConnection(cursor)
+
+    @asynccontextmanager
+    async def fake_connection(timeout=None):
+        yield conn
+
+    monkeypatch.setattr(DbService, "connection", fake_connection)
+    loader = CypherLoader("libraries1", workers=1, batch_size=2, pipeline_depth=2)
+    stats = asyncio.run(loader.load(str(tmp_path)))
+    assert stats["Library"]["count"] == 7
+    assert stats["Library"]["batches"] == 4
+    assert stats["uses_lib"]["count"] == 6
+    assert stats["uses_lib"]["batch_ms"]["count"] == 3
+    assert stats["developed_by"]["count"] == 7
+
+    sqls = [sql for sql, _ in cursor.executed]
+    index_idx = [i for i, s in enumerate(sqls) if s.startswith("CREATE INDEX")]
+    edge_idx = [i for i, s in enumerate(sqls) if "CREATE (a)-[:" in s]
+    assert len(index_idx) == 6
+    assert max(index_idx) < min(edge_idx)
+    edge_params = [p for s, p in cursor.executed if "[:uses_lib]" in s]
+    assert json.loads(edge_params[0][0]) == {
+        "pairs": [{"a": "lib1", "b": "lib0"}, {"a": "lib2", "b": "lib0"}]
+    }
+    # 4 + 4 vertex batches and 3 + 3 + 4 + 4 edge batches, 2 per sync
+    assert conn.fake_pipeline.syncs == 2 + 2 + 2 + 2 + 2 + 2
@@ -0,0 +1,136 @@
+import asyncio
+import os
+import pytest
+
+from src.services.config_service import ConfigService
+from src.services.db_service import DbService
+
+# pytest -v tests/test_db_service.py
+
+
+def test_connection_string():
+    ConfigService.set_standard_unit_test_env_vars()
+    os.environ["AIG4PG_ENCRYPTION_SYMMETRIC_KEY"] = ""
+    conn_str = DbService.connection_string()
+    assert conn_str.startswith("host=gbbcj.postgres.database.azure.com port=5432")
+    assert "dbname=aig user=cj password=topSECRET!" in conn_str
+
+
+def test_pool_kwargs_defaults():
+    for name in [
+        "AIG4PG_PG_POOL_MIN_SIZE",
+        "AIG4PG_PG_POOL_MAX_SIZE",
+        "AIG4PG_PG_POOL_MAX_LIFETIME",
+        "AIG4PG_PG_POOL_MAX_IDLE",
+        "AIG4PG_PG_POOL_TIMEOUT",
+    ]:
+        if name in os.environ:
+            del os.environ[name]
+    kwargs = DbService.pool_kwargs()
+    assert kwargs["min_size"] == 2
+    assert kwargs["max_size"] == 10
+    assert kwargs["max_lifetime"] == 3600.0
+    assert kwargs["max_idle"] == 600.0
+    assert kwargs["timeout"] == 30.0
+    assert kwargs["kwargs"]["autocommit"] == True
+
+
+def test_pool_kwargs_from_env_vars():
+    os.environ["AIG4PG_PG_POOL_MIN_SIZE"] = "4"
+    os.environ["AIG4PG_PG_POOL_MAX_SIZE"] = "3"  # less than min_size
+    os.environ["AIG4PG_PG_POOL_MAX_LIFETIME"] = "120"
+    os.environ["AIG4PG_PG_POOL_MAX_IDLE"] = "60.5"
+    os.environ["AIG4PG_PG_POOL_TIMEOUT"] = "5"
+    kwargs = DbService.pool_kwargs()
+    assert kwargs["min_size"] == 4
+    assert kwargs["max_size"] == 4
+    assert kwargs["max_lifetime"] == 120.0
+    assert kwargs["max_idle"] == 60.5
+    assert kwargs["timeout"] == 5.0
+    for name in [
+        "AIG4PG_PG_POOL_MIN_SIZE",
+        "AIG4PG_PG_POOL_MAX_SIZE",
+        "AIG4PG_PG_POOL_MAX_LIFETIME",
+        "AIG4PG_PG_POOL_MAX_IDLE",
+        "AIG4PG_PG_POOL_TIMEOUT",
+    ]:
+        del os.environ[name]
+
+
+def test_checkout_stats():
+    DbService.reset_stats()
+    stats = DbService.get_stats()
+    assert stats["checkouts"] == 0
+    assert stats["checkout_avg_ms"] == 0.0
+
+    DbService.record_checkout(2.0)
+    DbService.record_checkout(6.0)
+    DbService.record_checkout(1.0)
+    stats = DbService.get_stats()
+    assert stats["checkouts"] == 3
+    assert stats["checkout_avg_ms"] == 3.0
+    assert stats["checkout_max_ms"] == 6.0
+    assert stats["checkout_last_ms"] == 1.0
+    DbService.reset_stats()
+
+
+def test_session_statements():
+    os.environ["AIG4PG_PG_LOAD_AGE"] = "true"
+    os.environ["AIG4PG_PG_SESSION_GUCS"] = "work_mem=64MB; statement_timeout=30s;bad"
+    statements = DbService.session_statements()
+    assert statements[0] == ("LOAD 'age';", None)
+    assert statements[1][0] == 'SET search_path = "$user", ag_catalog, public;'
+    assert statements[2][1] == ("statement_timeout", "30s")
+    assert statements[3][1] == ("work_mem", "64MB")
+    assert len(statements) == 4
+
+    os.environ["AIG4PG_PG_LOAD_AGE"] = "false"
+    os.environ["AIG4PG_PG_SESSION_GUCS"] = ""
+    statements = DbService.session_statements()
+    assert len(statements) == 1
+    assert "search_path" in statements[0][0]
+    del os.environ["AIG4PG_PG_LOAD_AGE"]
+    del os.environ["AIG4PG_PG_SESSION_GUCS"]
+
+
+def test_pool_kwargs_configure_hook():
+    kwargs = DbService.pool_kwargs()
+    assert kwargs["configure"] == DbService.configure_connection
+
+
+class FakeCursor:
+    def __init__(self, executed):
+        self.executed = executed
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def execute(self, sql, params=None):
+        if sql.startswith("LOAD"):
+            raise Exception("permission denied to load age")
+        self.executed.append((sql, params))
+
+
+class FakeConnection:
+    def __init__(self):
+        self.executed = list()
+
+    def cursor(self):
+        return FakeCursor(self.executed)
+
+
+def test_configure_connection_tolerates_failed_load():
+    os.environ["AIG4PG_PG_LOAD_AGE"] = "true"
+    os.environ["AIG4PG_PG_SESSION_GUCS"] = "statement_timeout=30s"
+    conn = FakeConnection()
+    count = DbService.configured_connections
+    asyncio.run(DbService.configure_connection(conn))
+    assert DbService.configured_connections == count + 1
+    assert len(conn.executed) == 2
+    assert "search_path" in conn.executed[0][0]
+    assert conn.executed[1][1] == ("statement_timeout", "30s")
+    del os.environ["AIG4PG_PG_LOAD_AGE"]
+    del os.environ["AIG4PG_PG_SESSION_GUCS"]
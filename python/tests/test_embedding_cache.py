@@ -0,0 +1,102 @@
+import time
+
+import pytest
+
+from src.services.embedding_cache import EmbeddingCache
+
+# pytest -v tests/test_embedding_cache.py
+
+
+def test_normalize_text_and_cache_key():
+    assert EmbeddingCache.normalize_text("  python \t fastapi\n") == "python fastapi"
+    k1 = EmbeddingCache.cache_key("embeddings", "python  fastapi")
+    k2 = EmbeddingCache.cache_key("embeddings", " python fastapi ")
+    k3 = EmbeddingCache.cache_key("embeddings3", "python fastapi")
+    k4 = EmbeddingCache.cache_key("embeddings", "Python fastapi")
+    assert k1 == k2
+    assert k1 != k3
+    assert k1 != k4
+    assert len(k1) == 64
+
+
+def test_memory_tier_lru():
+    cache = EmbeddingCache(db_file="", lru_size=2, max_entries=10, ttl_seconds=0)
+    cache.put("d", "a", [1.0])
+    cache.put("d", "b", [2.0])
+    assert cache.get("d", "a") == [1.0]  # a is now the most recently used
+    cache.put("d", "c", [3.0])
+    assert cache.get("d", "b") is None
+    assert cache.get("d", "a") == [1.0]
+    assert cache.get("d", "c") == [3.0]
+    stats = cache.get_stats()
+    assert stats["memory_hits"] == 3
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.75
+    assert stats["memory_entries"] == 2
+    assert stats["persistent_entries"] == 0
+
+
+def test_persistent_tier_is_opt_in(monkeypatch):
+    monkeypatch.delenv("AIG4PG_EMBEDDING_CACHE_FILE", raising=False)
+    cache = EmbeddingCache(lru_size=2, max_entries=10, ttl_seconds=0)
+    assert cache.db_file == ""
+    assert cache.conn is None
+
+
+def test_persistent_tier(tmp_path):
+    db_file = str(tmp_path / "cache" / "embeddings.sqlite")
+    cache = EmbeddingCache(db_file=db_file, lru_size=10, max_entries=10, ttl_seconds=0)
+    cache.put("d", "python fastapi", [0.5, -0.25, 1.0])
+    cache.close()
+
+    # a new process finds the embedding in the SQLite file
+    cache = EmbeddingCache(db_file=db_file, lru_size=10, max_entries=10, ttl_seconds=0)
+    assert cache.get("d", "python  fastapi") == [0.5, -0.25, 1.0]
+    assert cache.get("d", "python fastapi") == [0.5, -0.25, 1.0]
+    stats = cache.get_stats()
+    assert stats["persistent_hits"] == 1
+    assert stats["memory_hits"] == 1
+    assert stats["persistent_entries"] == 1
+    cache.close()
+
+
+def test_persistent_tier_eviction(tmp_path):
+    db_file = str(tmp_path / "embeddings.sqlite")
+    cache = EmbeddingCache(db_file=db_file, lru_size=0, max_entries=2, ttl_seconds=0)
+    cache.put("d", "a", [1.0])
+    cache.put("d", "b", [2.0])
+    assert cache.get("d", "a") == [1.0]  # b is now the least recently accessed
+    cache.put("d", "c", [3.0])
+    assert cache.get("d", "b") is None
+    assert cache.get("d", "a") == [1.0]
+    assert cache.get("d", "c") == [3.0]
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1
+    assert stats["persistent_entries"] == 2
+    cache.close()
+
+
+def test_ttl_expiration(tmp_path):
+    db_file = str(tmp_path / "embeddings.sqlite")
+    cache = EmbeddingCache(db_file=db_file, lru_size=10, max_entries=10, ttl_seconds=60)
+    cache.put("d", "a", [1.0])
+    assert cache.get("d", "a") == [1.0]
+    cache.ttl_seconds = 1
+    time.sleep(1.1)
+    assert cache.get("d", "a") is None
+    stats = cache.get_stats()
+    assert stats["expirations"] == 2  # one in each tier
+    assert stats["persistent_entries"] == 0
+    cache.close()
+
+
+def test_get_shared(monkeypatch):
+    EmbeddingCache.shared_instance = None
+    monkeypatch.setenv("AIG4PG_EMBEDDING_CACHE_ENABLED", "false")
+    assert EmbeddingCache.get_shared() is None
+    monkeypatch.setenv("AIG4PG_EMBEDDING_CACHE_ENABLED", "true")
+    monkeypatch.setenv("AIG4PG_EMBEDDING_CACHE_FILE", "")
+    cache = EmbeddingCache.get_shared()
+    assert cache is not None
+    assert EmbeddingCache.get_shared() is cache
+    EmbeddingCache.shared_instance = None
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import os
+
+from contextlib import asynccontextmanager
+
+from src.services.db_service import DbService
+from src.services.graph_loader import GraphLoader
+from src.util.library_graph import LibraryGraph
+
+# pytest -v tests/test_graph_loader.py
+
+
+class FakeCopy:
+    def __init__(self, statement, copies):
+        self.statement = statement
+        self.rows = list()
+        copies.append(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def write_row(self, row):
+        self.rows.append(row)
+
+
+class FakeCursor:
+    def __init__(self):
+        self.executed = list()
+        self.copies = list()
+        self.labels = list()
+        self.sequences = dict()
+        self.result = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def execute(self, sql, params=None, prepare=None):
+        sql = sql if isinstance(sql, str) else sql.as_string(None)
+        self.executed.append((sql, params))
+        if "from ag_catalog.ag_graph where" in sql:
+            self.result = [(0,)]
+        elif "create_vlabel" in sql or "create_elabel" in sql:
+            name = params[1]
+            self.labels.append((name, len(self.labels) + 3, name + "_id_seq"))
+        elif "from ag_catalog.ag_label" in sql:
+            self.result = list(self.labels)
+        elif "setval" in sql:
+            seq, count = params[0], params[2]
+            last = self.sequences.get(seq, 0) + count
+            self.sequences[seq] = last
+            self.result = [(last,)]
+
+    async def fetchone(self):
+        return self.result[0]
+
+    async def fetchall(self):
+        return self.result
+
+    def copy(self, statement):
+        return FakeCopy(statement.as_string(None), self.copies)
+
+
+class FakeTransaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self.fake_cursor = cursor
+
+    def transaction(self):
+        return FakeTransaction()
+
+    def cursor(self):
+        return self.fake_cursor
+
+
+def test_load(tmp_path, monkeypatch):
+    docs = [
+        {"name": "flask", "dependency_ids": ["pypi:jinja2"], "developers": ["a"]},
+        {"name": "jinja2", "developers": ["a", "b"]},
+    ]
+    for idx, doc in enumerate(docs):
+        with open(os.path.join(tmp_path, "{}.json".format(idx)), "wt") as f:
+            f.write(json.dumps(doc))
+    cursor = FakeCursor()
+
+    @asynccontextmanager
+    async def fake_connection(timeout=None):
+        yield FakeConnection(cursor)
+
+    monkeypatch.setattr(DbService, "connection", fake_connection)
+    stats = asyncio.run(GraphLoader("libraries1", workers=1).load(str(tmp_path)))
+    assert stats["vertices"] == 4
+    assert stats["edges"] == 8
+    assert stats["developer_of_edges"] == 3
+    assert "edges_per_second" in stats
+
+    sqls = [sql for sql, _ in cursor.executed]
+    assert "select ag_catalog.create_graph(%s)" in sqls
+    assert 'LOCK TABLE "libraries1"."Library" IN EXCLUSIVE MODE' in sqls
+    copies = {c.statement: c.rows for c in cursor.copies}
+    library_rows = copies['COPY "libraries1"."Library" (id, properties) FROM STDIN']
+    assert library_rows[0][0] == LibraryGraph.graphid(3, 1)
+    uses_rows = copies[
+        'COPY "libraries1"."uses_lib" (id, start_id, end_id, properties) FROM STDIN'
+    ]
+    assert uses_rows == [
+        (
+            LibraryGraph.graphid(5, 1),
+            LibraryGraph.graphid(3, 1),
+            LibraryGraph.graphid(3, 2),
+            "{}",
+        )
+    ]
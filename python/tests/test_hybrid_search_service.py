@@ -0,0 +1,129 @@
+import asyncio
+import pytest
+
+from contextlib import asynccontextmanager
+
+from src.models.webservice_models import HybridSearchRequestModel
+from src.services.db_service import DbService
+from src.services.hybrid_search_service import HybridSearchService
+
+# pytest -v tests/test_hybrid_search_service.py
+
+
+class FakeColumn:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeCursor:
+    def __init__(self):
+        self.executed = list()
+        self.description = [FakeColumn("name"), FakeColumn("fts_rank")]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def execute(self, sql, params=None, prepare=None):
+        self.executed.append((sql, params))
+
+    async def fetchall(self):
+        return [("flask", 0.9), ("quart", 0.4)]
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self.fake_cursor = cursor
+
+    def cursor(self):
+        return self.fake_cursor
+
+
+class FakeAiService:
+    def __init__(self):
+        self.calls = 0
+
+    async def agenerate_embeddings(self, text):
+        self.calls = self.calls + 1
+        return None
+
+
+@pytest.fixture
+def fake_cursor(monkeypatch):
+    cursor = FakeCursor()
+
+    @asynccontextmanager
+    async def fake_connection(timeout=None):
+        yield FakeConnection(cursor)
+
+    monkeypatch.setattr(DbService, "connection", fake_connection)
+    return cursor
+
+
+def test_constructor():
+    svc = HybridSearchService(k=10)
+    assert svc.candidates == 40
+    assert svc.vector_svc.k == 40
+    assert HybridSearchService(k=25).candidates == 100
+    assert HybridSearchService(k=5000).candidates == 1000
+    with pytest.raises(ValueError):
+        HybridSearchService(mode="semantic")
+
+
+def test_effective_mode():
+    assert HybridSearchService.is_keyword_query("flask")
+    assert HybridSearchService.is_keyword_query(" azure-storage-blob ")
+    assert HybridSearchService.is_keyword_query("pydantic v2")
+    assert not HybridSearchService.is_keyword_query("web framework for async apis")
+    svc = HybridSearchService(mode="auto")
+    assert svc.effective_mode("flask") == "keyword"
+    assert svc.effective_mode("a small web framework") == "hybrid"
+    assert HybridSearchService(mode="vector").effective_mode("flask") == "vector"
+
+
+def test_default_mode_identifier_query_skips_embedding(fake_cursor):
+    ai_svc = FakeAiService()
+    req_model = HybridSearchRequestModel(text="azure-storage-blob")
+    assert req_model.mode == "auto"
+    svc = HybridSearchService(ai_svc, k=req_model.k, mode=req_model.mode)
+    result = asyncio.run(svc.search(req_model.text))
+    assert ai_svc.calls == 0
+    assert result["mode"] == "keyword"
+    result = asyncio.run(HybridSearchService(ai_svc).search("flask"))
+    assert ai_svc.calls == 0
+    assert result["mode"] == "keyword"
+
+
+def test_keyword_search_skips_embedding(fake_cursor):
+    ai_svc = FakeAiService()
+    svc = HybridSearchService(ai_svc, k=5, mode="auto")
+    result = asyncio.run(svc.search("flask"))
+    assert ai_svc.calls == 0
+    assert result["mode"] == "keyword"
+    assert result["counts"] == {"fts": 2}
+    assert [row["name"] for row in result["rows"]] == ["flask", "quart"]
+    sql, params = fake_cursor.executed[0]
+    assert "websearch_to_tsquery" in sql
+    assert params == {"text": "flask", "limit": 40}
+
+
+def test_hybrid_search(fake_cursor):
+    svc = HybridSearchService(FakeAiService(), k=2, mode="hybrid")
+
+    async def vector_search(text):
+        return [{"name": "django", "distance": 0.1}, {"name": "flask", "distance": 0.2}]
+
+    svc.vector_search = vector_search
+    result = asyncio.run(svc.search("python web framework"))
+    assert result["mode"] == "hybrid"
+    assert result["counts"] == {"fts": 2, "vector": 2}
+    assert [row["name"] for row in result["rows"]] == ["flask", "django"]
+    assert result["rows"][0]["ranks"] == {"fts": 1, "vector": 2}
+
+
+def test_vector_search_without_embedding(fake_cursor):
+    svc = HybridSearchService(FakeAiService(), mode="vector")
+    with pytest.raises(ValueError):
+        asyncio.run(svc.search("python web framework"))
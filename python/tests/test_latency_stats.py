@@ -0,0 +1,29 @@
+import pytest
+
+from src.util.latency_stats import LatencyStats
+
+# pytest -v tests/test_latency_stats.py
+
+
+def test_empty_summary():
+    summary = LatencyStats.summary([])
+    assert summary["count"] == 0
+    assert summary["p50"] == 0.0
+    assert summary["p99"] == 0.0
+
+
+def test_summary():
+    values = [float(n) for n in range(100, 0, -1)]  # 100 down to 1
+    summary = LatencyStats.summary(values)
+    assert summary["count"] == 100
+    assert summary["min"] == 1.0
+    assert summary["max"] == 100.0
+    assert summary["mean"] == 50.5
+    assert summary["p50"] == 50.0
+    assert summary["p95"] == 95.0
+    assert summary["p99"] == 99.0
+
+
+def test_percentile_single_value():
+    assert LatencyStats.percentile([7.5], 50) == 7.5
+    assert LatencyStats.percentile([7.5], 99) == 7.5
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from src.util.library_graph import ENTRY_ID_MAX, LibraryGraph
+
+# pytest -v tests/test_library_graph.py
+
+
+def build_graph():
+    graph = LibraryGraph()
+    graph.add_doc(
+        {
+            "name": "flask",
+            "license": "BSD",
+            "keywords": "web",
+            "release_count": "42",
+            "dependency_ids": ["pypi:jinja2", "pypi:missing"],
+            "developers": ["armin@example.com"],
+        }
+    )
+    graph.add_doc(
+        {
+            "name": "jinja2",
+            "libtype": "pypi",
+            "release_count": None,
+            "dependency_ids": None,
+            "developers": ["armin@example.com", "pallets@example.com"],
+        }
+    )
+    graph.add_doc({"name": "flask", "release_count": "1"})
+    return graph
+
+
+def test_graphid():
+    assert LibraryGraph.graphid(3, 1) == 844424930131969
+    assert LibraryGraph.graphid(3, 1) >> 48 == 3
+    with pytest.raises(ValueError):
+        LibraryGraph.graphid(3, 0)
+    with pytest.raises(ValueError):
+        LibraryGraph.graphid(3, ENTRY_ID_MAX + 1)
+
+
+def test_add_doc():
+    graph = build_graph()
+    assert graph.vertex_count("Library") == 2
+    assert graph.vertex_count("Developer") == 2
+    assert graph.duplicate_count == 1
+    assert graph.vertices["Library"][0]["release_count"] == 42
+    assert graph.vertices["Library"][1]["release_count"] == 0
+    assert graph.vertices["Library"][1]["license"] == ""
+
+
+def test_edge_pairs():
+    graph = build_graph()
+    assert list(graph.edge_pairs("uses_lib")) == [(0, 1)]
+    assert list(graph.edge_pairs("used_by_lib")) == [(1, 0)]
+    assert list(graph.edge_pairs("developer_of")) == [(0, 0), (0, 1), (1, 1)]
+    assert list(graph.edge_pairs("developed_by")) == [(0, 0), (1, 0), (1, 1)]
+    assert graph.edge_count("developed_by") == 3
+    with pytest.raises(ValueError):
+        list(graph.edge_pairs("knows"))
+
+
+def test_rows():
+    graph = build_graph()
+    rows = list(graph.vertex_rows("Library", 3, 101))
+    assert rows[0][0] == LibraryGraph.graphid(3, 101)
+    assert json.loads(rows[0][1])["name"] == "flask"
+    label_ids = {"Library": 3, "Developer": 4}
+    first_ids = {"Library": 101, "Developer": 7}
+    rows = list(graph.edge_rows("developer_of", 6, 1, label_ids, first_ids))
+    assert rows[2] == (
+        LibraryGraph.graphid(6, 3),
+        LibraryGraph.graphid(4, 8),
+        LibraryGraph.graphid(3, 102),
+        "{}",
+    )
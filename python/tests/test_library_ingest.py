@@ -0,0 +1,66 @@
+import json
+import os
+
+import pytest
+
+from src.util.library_docs import LibraryDocs
+from src.util.library_ingest import LibraryIngest, read_docs_chunk
+
+# pytest -v tests/test_library_ingest.py
+
+
+def write_docs(tmp_path, count):
+    for idx in range(count):
+        doc = dict()
+        doc["name"] = "lib{}".format(idx)
+        doc["license"] = "MIT"
+        doc["release_count"] = str(idx)
+        doc["developers"] = ["dev{}".format(idx % 3)]
+        doc["embedding"] = [0.1] * 1536
+        if idx == 5:
+            doc["name"] = "natto-py"
+        with open(os.path.join(tmp_path, "{:04d}.json".format(idx)), "wt") as f:
+            f.write(json.dumps(doc))
+
+
+def test_read_docs_chunk(tmp_path):
+    write_docs(tmp_path, 8)
+    paths = LibraryIngest.list_files(str(tmp_path))
+    paths.append(os.path.join(tmp_path, "missing.json"))
+    values, bytes_read, invalid_count, errors = read_docs_chunk(paths, ["name"])
+    assert len(values) == 7
+    assert values[0] == {"name": "lib0"}
+    assert bytes_read > 8000
+    assert invalid_count == 1
+    assert len(errors) == 1
+    values, _, _, _ = read_docs_chunk(paths[0:2], None, LibraryDocs.to_copy_row)
+    assert values[1][0] == "lib1"
+
+
+def test_iter_docs(tmp_path):
+    write_docs(tmp_path, 40)
+    ingest = LibraryIngest(workers=2, chunk_size=3, max_pending=2)
+    docs = list(ingest.iter_docs(str(tmp_path), ["name", "developers", "libtype"]))
+    assert [d["name"] for d in docs] == ["lib{}".format(i) for i in range(40) if i != 5]
+    assert docs[0] == {"name": "lib0", "developers": ["dev0"], "libtype": None}
+    stats = ingest.get_stats()
+    assert stats["files_read"] == 40
+    assert stats["docs_read"] == 39
+    assert stats["invalid_count"] == 1
+    assert stats["errors"] == 0
+
+
+def test_iter_docs_max_files_and_close(tmp_path):
+    write_docs(tmp_path, 20)
+    ingest = LibraryIngest(workers=1, chunk_size=2)
+    names = [d["name"] for d in ingest.iter_docs(str(tmp_path), ["name"], 4)]
+    assert names == ["lib0", "lib1", "lib2", "lib3"]
+    gen = ingest.iter_docs(str(tmp_path), ["name"])
+    assert next(gen)["name"] == "lib0"
+    gen.close()
+    assert ingest.files_read < 20
+
+
+def test_iter_docs_missing_dir(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        list(LibraryIngest(workers=1).iter_docs(os.path.join(tmp_path, "nope")))
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import os
+
+from contextlib import asynccontextmanager
+
+from psycopg.types.json import Jsonb
+
+from src.services.db_service import DbService
+from src.services.library_loader import LibraryLoader
+from src.util.library_docs import COPY_COLUMNS, COPY_TYPES, LibraryDocs
+from src.util.library_ingest import LibraryIngest
+from src.util.vector_adapter import Vector
+
+# pytest -v tests/test_library_loader.py
+
+
+class FakeCopy:
+    def __init__(self):
+        self.types = None
+        self.rows = list()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def set_types(self, types):
+        self.types = types
+
+    async def write_row(self, row):
+        self.rows.append(row)
+
+
+class FakeCursor:
+    def __init__(self):
+        self.executed = list()
+        self.copy_statement = None
+        self.fake_copy = FakeCopy()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def execute(self, sql, params=None, prepare=None):
+        self.executed.append((sql, params))
+
+    def copy(self, statement):
+        self.copy_statement = statement
+        return self.fake_copy
+
+
+class FakeTransaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self.fake_cursor = cursor
+
+    def transaction(self):
+        return FakeTransaction()
+
+    def cursor(self):
+        return self.fake_cursor
+
+
+def library_doc(name, **kwargs):
+    doc = dict()
+    doc["name"] = name
+    doc["description"] = "the {} library".format(name)
+    doc["keywords"] = "web\tframework"
+    doc["license"] = "MIT"
+    doc["release_count"] = "12"
+    doc["package_url"] = "https://pypi.org/project/{}/".format(name)
+    doc["project_url"] = "https://pypi.org/project/{}/".format(name)
+    doc["embedding"] = [0.5, -1.0, 2.0]
+    doc.update(kwargs)
+    return doc
+
+
+def write_docs(tmp_path, docs):
+    for idx, doc in enumerate(docs):
+        with open(os.path.join(tmp_path, "{:04d}.json".format(idx)), "wt") as f:
+            f.write(json.dumps(doc))
+    with open(os.path.join(tmp_path, "readme.txt"), "wt") as f:
+        f.write("not a library document")
+
+
+def test_to_copy_row():
+    assert len(COPY_COLUMNS) == len(COPY_TYPES)
+    row = LibraryDocs.to_copy_row(library_doc("flask", description="x" * 2000))
+    assert len(row) == len(COPY_COLUMNS)
+    values = dict(zip(COPY_COLUMNS, row))
+    assert values["name"] == "flask"
+    assert values["libtype"] == "pypi"
+    assert len(values["description"]) == 1000
+    assert values["keywords"] == "web framework"
+    assert values["release_count"] == 12
+    assert isinstance(values["embedding"], Vector)
+    assert values["embedding"].values == [0.5, -1.0, 2.0]
+    assert values["metadata"]["release_count"] == 12
+    assert "embedding" not in values["metadata"]
+
+
+def test_to_copy_row_invalid():
+    assert LibraryDocs.to_copy_row(library_doc("cobs")) is None
+    assert LibraryDocs.to_copy_row(library_doc(" ")) is None
+    assert LibraryDocs.to_copy_row([]) is None
+    row = LibraryDocs.to_copy_row(library_doc("m2", release_count="?", embedding=[]))
+    assert row[5] == 0
+    assert row[8] is None
+
+
+def test_load(tmp_path, monkeypatch):
+    docs = [library_doc("lib{}".format(i)) for i in range(25)]
+    docs[3] = library_doc("geohash")
+    write_docs(tmp_path, docs)
+    with open(os.path.join(tmp_path, "9999.json"), "wt") as f:
+        f.write("{not json")
+
+    cursor = FakeCursor()
+
+    @asynccontextmanager
+    async def fake_connection(timeout=None):
+        yield FakeConnection(cursor)
+
+    monkeypatch.setattr(DbService, "connection", fake_connection)
+    loader = LibraryLoader(concurrency=2, window=3, progress_interval=10, chunk_size=4)
+    stats = asyncio.run(loader.load(str(tmp_path)))
+    assert stats["files_read"] == 26
+    assert stats["rows_written"] == 24
+    assert stats["rows_skipped"] == 1
+    assert stats["errors"] == 1
+    assert stats["mb_read"] > 0
+    assert "statement_timeout" in cursor.executed[0][0]
+    assert cursor.fake_copy.types == COPY_TYPES
+    names = [row[0] for row in cursor.fake_copy.rows]
+    assert names == ["lib{}".format(i) for i in range(25) if i != 3]
+    assert isinstance(cursor.fake_copy.rows[0][-1], Jsonb)
+
+
+def test_load_max_files(tmp_path, monkeypatch):
+    write_docs(tmp_path, [library_doc("lib{}".format(i)) for i in range(10)])
+    assert len(LibraryIngest.list_files(str(tmp_path), 4)) == 4
+    cursor = FakeCursor()
+
+    @asynccontextmanager
+    async def fake_connection(timeout=None):
+        yield FakeConnection(cursor)
+
+    monkeypatch.setattr(DbService, "connection", fake_connection)
+    stats = asyncio.run(LibraryLoader(concurrency=2).load(str(tmp_path), 4))
+    assert stats["rows_written"] == 4
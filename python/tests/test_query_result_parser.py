@@ -1,3 +1,4 @@
+import json
 import os
 import pytest
 
@@ -88,3 +89,38 @@ def test_parse_single_result_vertex():
 # row: ('{"id": 844424930131969, "label": "Developer", "properties": {"name": "info@2captcha.com"}}::vertex',) 1 <class 'tuple'>
 # row: ('{"id": 844424930131970, "label": "Developer", "properties": {"name": "xoviat"}}::vertex',) 1 <class 'tuple'>
 # row: ('[{"id": 1407374883553290, "label": "uses_lib", "end_id": 1125899906851581, "start_id": 1125899906842630, "properties": {}}::edge, {"id": 1407374883587559, "label": "uses_lib", "end_id": 1125899906851227, "start_id": 1125899906851581, "properties": {}}::edge, {"id": 1407374883586028, "label": "uses_lib", "end_id": 1125899906853118, "start_id": 1125899906851227, "properties": {}}::edge, {"id": 1407374883592102, "label": "uses_lib", "end_id": 1125899906851227, "start_id": 1125899906853118, "properties": {}}::edge, {"id": 1407374883586023, "label": "uses_lib", "end_id": 1125899906850362, "start_id": 1125899906851227, "properties": {}}::edge]',) 1 <class 'tuple'>
+
+
+def test_parse_single_result_edge_list():
+    qrp = QueryResultParser()
+    arg = (
+        '[{"id": 1407374883553290, "label": "uses_lib", "end_id": 1125899906851581, "start_id": 1125899906842630, "properties": {}}::edge, {"id": 1407374883587559, "label": "uses_lib", "end_id": 1125899906851227, "start_id": 1125899906851581, "properties": {}}::edge]',
+    )
+    result = qrp.parse(arg)
+    assert len(result) == 2
+    assert result[0]["label"] == "uses_lib"
+    assert result[1]["end_id"] == 1125899906851227
+
+
+def test_parse_multi_column_agtype_tuple():
+    qrp = QueryResultParser()
+    vertex = '{"id": 844424930131970, "label": "Developer", "properties": {"name": "xoviat"}}::vertex'
+    result = qrp.parse((vertex, '"xoviat"', 3))
+    assert result[0]["properties"]["name"] == "xoviat"
+    assert result[1] == '"xoviat"'
+    assert result[2] == 3
+
+
+def test_parse_unparsable_agtype():
+    qrp = QueryResultParser()
+    result = qrp.parse(("not json::vertex",))
+    assert result == "not json::vertex"
+
+
+def test_parse_numeric_agtype_is_json_serializable():
+    qrp = QueryResultParser()
+    result = qrp.parse(('{"n": 3.14::numeric, "list": [2.5::numeric]}',))
+    assert result["n"] == 3.14
+    assert result["list"] == [2.5]
+    jstr = json.dumps(result, sort_keys=False, indent=2)
+    assert json.loads(jstr) == {"n": 3.14, "list": [2.5]}
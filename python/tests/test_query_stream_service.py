@@ -0,0 +1,142 @@
+import asyncio
+import json
+import os
+import pytest
+
+from contextlib import asynccontextmanager
+
+from src.services.db_service import DbService
+from src.services.query_stream_service import QueryStreamService
+
+# pytest -v tests/test_query_stream_service.py
+
+
+class FakeCursor:
+    def __init__(self, rows, name=None):
+        self.rows = list(rows)
+        self.name = name
+        self.description = [("col",)]
+        self.fetch_sizes = list()
+        self.itersize = 100
+        self.executed = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def execute(self, sql, params=None):
+        self.executed = sql
+
+    async def fetchmany(self, size):
+        self.fetch_sizes.append(size)
+        batch, self.rows = self.rows[0:size], self.rows[size:]
+        return batch
+
+
+class FakeTransaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.cursors = list()
+
+    def transaction(self):
+        return FakeTransaction()
+
+    def cursor(self, name=None):
+        cursor = FakeCursor(self.rows, name)
+        self.cursors.append(cursor)
+        return cursor
+
+
+def collect(svc, stmt, conn, monkeypatch):
+    @asynccontextmanager
+    async def fake_connection(timeout=None):
+        yield conn
+
+    monkeypatch.setattr(DbService, "connection", fake_connection)
+
+    async def consume():
+        chunks = list()
+        async for chunk in svc.stream(stmt):
+            chunks.append(chunk)
+        return chunks
+
+    chunks = asyncio.run(consume())
+    lines = b"".join(chunks).decode("utf-8").strip().split("\n")
+    return chunks, [json.loads(line) for line in lines]
+
+
+def test_normalize_and_server_cursor_statements():
+    stmt = QueryStreamService.normalize_statement("select *\r\nfrom libraries;  ")
+    assert stmt == "select * from libraries"
+    assert QueryStreamService.uses_server_cursor(stmt) == True
+    assert QueryStreamService.uses_server_cursor("  WITH x AS (select 1) ...") == True
+    assert QueryStreamService.uses_server_cursor("SET search_path = public") == False
+    assert QueryStreamService.uses_server_cursor("create table t (id int)") == False
+
+
+def test_caps_cannot_exceed_configured_values():
+    os.environ["AIG4PG_QUERY_MAX_ROWS"] = "100"
+    svc = QueryStreamService(max_rows=5000, max_bytes=10)
+    assert svc.max_rows == 100
+    assert svc.max_bytes == 10
+    svc = QueryStreamService(max_rows=7)
+    assert svc.max_rows == 7
+    del os.environ["AIG4PG_QUERY_MAX_ROWS"]
+
+
+def test_stream_with_server_cursor(monkeypatch):
+    rows = [(n, "lib{}".format(n)) for n in range(25)]
+    conn = FakeConnection(rows)
+    svc = QueryStreamService(itersize=10)
+    chunks, objects = collect(svc, "select id, name from libraries;", conn, monkeypatch)
+    cursor = conn.cursors[0]
+    assert cursor.name.startswith("aig4pg_stream_")
+    assert cursor.executed == "select id, name from libraries"
+    assert cursor.fetch_sizes == [10, 10, 10, 10]
+    assert len(chunks) == 4  # three pages of rows, then the summary
+    assert objects[0] == [0, "lib0"]
+    assert objects[24] == [24, "lib24"]
+    summary = objects[-1]["__summary"]
+    assert summary["rows"] == 25
+    assert summary["truncated"] == False
+
+
+def test_stream_row_cap(monkeypatch):
+    rows = [(n, "lib{}".format(n)) for n in range(25)]
+    conn = FakeConnection(rows)
+    svc = QueryStreamService(max_rows=12, itersize=10)
+    chunks, objects = collect(svc, "select id, name from libraries", conn, monkeypatch)
+    assert len(objects) == 13
+    assert conn.cursors[0].fetch_sizes == [10, 10]
+    summary = objects[-1]["__summary"]
+    assert summary["rows"] == 12
+    assert summary["truncated"] == True
+
+
+def test_stream_byte_cap(monkeypatch):
+    rows = [(n, "x" * 100) for n in range(25)]
+    conn = FakeConnection(rows)
+    svc = QueryStreamService(max_bytes=350, itersize=10)
+    chunks, objects = collect(svc, "select id, name from libraries", conn, monkeypatch)
+    summary = objects[-1]["__summary"]
+    assert summary["rows"] == 3
+    assert summary["bytes"] <= 350
+    assert summary["truncated"] == True
+
+
+def test_stream_without_server_cursor(monkeypatch):
+    conn = FakeConnection([])
+    svc = QueryStreamService()
+    chunks, objects = collect(svc, "SET statement_timeout = 0", conn, monkeypatch)
+    assert conn.cursors[0].name == None
+    assert objects[-1]["__summary"]["rows"] == 0
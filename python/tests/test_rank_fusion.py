@@ -0,0 +1,33 @@
+import pytest
+
+from src.util.rank_fusion import RankFusion
+
+# pytest -v tests/test_rank_fusion.py
+
+
+def test_reciprocal_rank_fusion():
+    fts = [{"name": "flask", "fts_rank": 0.9}, {"name": "quart", "fts_rank": 0.5}]
+    vector = [
+        {"name": "django", "distance": 0.1},
+        {"name": "flask", "distance": 0.2},
+        {"name": "bottle", "distance": 0.3},
+    ]
+    rows = RankFusion.reciprocal_rank_fusion({"fts": fts, "vector": vector}, k=60)
+    assert [row["name"] for row in rows] == ["flask", "django", "quart", "bottle"]
+    flask = rows[0]
+    assert flask["ranks"] == {"fts": 1, "vector": 2}
+    assert flask["rrf_score"] == pytest.approx((1.0 / 61) + (1.0 / 62))
+    assert flask["fts_rank"] == 0.9
+    assert flask["distance"] == 0.2  # attributes of both occurrences
+    # django and quart have the same rank, 1 and 2; django is rank 1 in its list
+    assert rows[1]["ranks"] == {"vector": 1}
+
+
+def test_limit_ties_and_duplicates():
+    a = [{"name": "x"}, {"name": "y"}, {"name": "x"}]
+    b = [{"name": "y"}, {"name": "x"}]
+    rows = RankFusion.reciprocal_rank_fusion({"a": a, "b": b}, limit=1)
+    assert len(rows) == 1
+    assert rows[0]["ranks"] in ({"a": 1, "b": 2}, {"a": 2, "b": 1})
+    assert RankFusion.reciprocal_rank_fusion({}) == []
+    assert RankFusion.reciprocal_rank_fusion({"a": []}) == []
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import os
+import re
+
+from contextlib import asynccontextmanager
+
+import pytest
+
+from src.services.db_service import DbService
+from src.services.sql_file_executor import SqlFileExecutor
+
+# pytest -v tests/test_sql_file_executor.py
+
+
+class FakePipeline:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def execute(self, sql, params=None, prepare=None):
+        if "fail" in sql:
+            raise ValueError("statement failed")
+        for label in re.findall(r"[(\[]\w*:(\w+)", sql):
+            self.conn.db.create_label(self.conn, label)
+        self.conn.pending.append(sql)
+
+
+class FakeTransaction:
+    def __init__(self, conn):
+        self.conn = conn
+        self.db = conn.db
+
+    async def __aenter__(self):
+        self.conn.pending = list()
+        self.conn.created_labels = set()
+        self.db.active = self.db.active + 1
+        self.db.max_active = max(self.db.max_active, self.db.active)
+        return self
+
+    async def __aexit__(self, exc_type, *args):
+        await asyncio.sleep(0.01)
+        self.db.active = self.db.active - 1
+        if exc_type is None:
+            self.db.committed.append(list(self.conn.pending))
+            self.db.labels.update(self.conn.created_labels)
+        self.db.creating.difference_update(self.conn.created_labels)
+        return False
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+        self.pending = list()
+        self.created_labels = set()
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def pipeline(self):
+        return FakePipeline()
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.committed = list()
+        self.active = 0
+        self.max_active = 0
+        self.labels = set()  # the committed labels
+        self.creating = set()  # the labels created by the open transactions
+
+    def create_label(self, conn, label):
+        """Create a missing label like Apache AGE; a concurrent creation fails."""
+        if label in self.labels or label in conn.created_labels:
+            return
+        if label in self.creating:
+            raise ValueError("label {} is created concurrently".format(label))
+        self.creating.add(label)
+        conn.created_labels.add(label)
+
+    def statements(self):
+        return [s for group in self.committed for s in group if "LOCAL" not in s]
+
+
+def write_file(tmp_path, lines):
+    path = os.path.join(tmp_path, "load.sql")
+    with open(path, "wt") as f:
+        f.write("\n".join(lines))
+    return path
+
+
+def run(executor, path, db, monkeypatch, resume=True):
+    @asynccontextmanager
+    async def fake_connection(timeout=None):
+        yield FakeConnection(db)
+
+    monkeypatch.setattr(DbService, "connection", fake_connection)
+    return asyncio.run(executor.execute(path, resume))
+
+
+def load_lines(count):
+    lines = ['SET search_path = ag_catalog, "$user", public;']
+    for idx in range(count):
+        lines.append(
+            "SELECT * FROM cypher('g', $$ CREATE (:V {{n: {}}}) $$) as (v agtype);".format(
+                idx
+            )
+        )
+    for idx in range(count):
+        lines.append(
+            "SELECT * FROM cypher('g', $$ MATCH (a:V {{n: {}}}) CREATE (a)-[:E]->(a) $$) as (e agtype);".format(
+                idx
+            )
+        )
+    return lines
+
+
+def test_execute(tmp_path, monkeypatch):
+    path = write_file(tmp_path, load_lines(10))
+    db = FakeDatabase()
+    executor = SqlFileExecutor(connections=3, commit_size=3)
+    stats = run(executor, path, db, monkeypatch)
+    assert stats["statements_executed"] == 20
+    assert stats["groups"] == 8
+    assert stats["phases"] == ["vertex", "edge"]
+    assert db.max_active == 3
+    assert db.committed[0][0] == 'SET LOCAL search_path = ag_catalog, "$user", public;'
+    statements = db.statements()
+    assert sorted(statements) == sorted(load_lines(10)[1:])
+    edge_positions = [i for i, s in enumerate(statements) if "MATCH" in s]
+    assert min(edge_positions) == 10  # all of the vertices before the edges
+    assert executor.committed_prefix == 21
+    assert executor.committed_ranges == []
+
+
+def test_resume(tmp_path, monkeypatch):
+    lines = load_lines(6)
+    lines.insert(9, "SELECT fail;")
+    path = write_file(tmp_path, lines)
+    checkpoint_file = os.path.join(tmp_path, "checkpoint.json")
+    db = FakeDatabase()
+    executor = SqlFileExecutor(1, 2, checkpoint_file)
+    with pytest.raises(ValueError):
+        run(executor, path, db, monkeypatch)
+    assert len(db.statements()) == 8
+    with open(checkpoint_file) as f:
+        assert json.load(f)["committed_prefix"] == 9
+
+    lines[9] = "SELECT 1;"
+    path = write_file(tmp_path, lines)
+    db = FakeDatabase()
+    stats = run(SqlFileExecutor(2, 2, checkpoint_file), path, db, monkeypatch)
+    assert stats["statements_skipped"] == 8
+    assert stats["statements_executed"] == 5
+    assert sorted(db.statements()) == sorted(lines[9:])
+
+    db = FakeDatabase()
+    stats = run(SqlFileExecutor(2, 2, checkpoint_file), path, db, monkeypatch, False)
+    assert stats["statements_executed"] == 13
+
+
+def test_execute_creates_labels_alone(tmp_path, monkeypatch):
+    lines = list()
+    for idx in range(12):
+        label = "Airport" if idx < 8 else "Airline"
+        lines.append(
+            "SELECT * FROM cypher('g', $$ CREATE (:{} {{n: {}}}) $$) as (v agtype);".format(
+                label, idx
+            )
+        )
+    for idx in range(8):
+        lines.append(
+            "SELECT * FROM cypher('g', $$ MATCH (a:Airport {{n: {}}}) CREATE (a)-[:route]->(a) $$) as (e agtype);".format(
+                idx
+            )
+        )
+    path = write_file(tmp_path, lines)
+    db = FakeDatabase()
+    stats = run(SqlFileExecutor(connections=3, commit_size=2), path, db, monkeypatch)
+    assert stats["statements_executed"] == 20
+    assert sorted(db.statements()) == sorted(lines)
+    assert db.labels == {"Airport", "Airline", "route"}
+    assert db.max_active == 3
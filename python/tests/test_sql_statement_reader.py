@@ -0,0 +1,83 @@
+import os
+import zipfile
+
+from src.util.sql_statement_reader import SqlStatementReader
+
+# pytest -v tests/test_sql_statement_reader.py
+
+VERTEX = (
+    "SELECT * FROM cypher('g', $$ CREATE (:Airport {iata: 'ATL'}) $$) as (v agtype);"
+)
+EDGE = "SELECT * FROM cypher('g', $$ MATCH (a:Airport), (b:Airport) WHERE a.iata = 'ATL' CREATE (a)-[e:route]->(b) RETURN e $$) as (e agtype);"
+
+
+def test_split_statements():
+    lines = [
+        "select 'a;b', \"x;y\"; select 1; -- a comment;\n",
+        "select $$ one; two $$, $tag$ three; $tag$\n",
+        "  ;\n",
+        "select 'it''s'; select 'trailing'",
+    ]
+    statements = list(SqlStatementReader.split_statements(lines))
+    assert statements == [
+        "select 'a;b', \"x;y\";",
+        "select 1;",
+        "select $$ one; two $$, $tag$ three; $tag$\n  ;",
+        "select 'it''s';",
+        "select 'trailing'",
+    ]
+
+
+def test_split_statements_comments():
+    lines = [
+        "select 1-- a comment\n",
+        "FROM t; /* a; /* nested; */ b; */ select 2;\n",
+        "select /* spans;\n",
+        "lines; */ 3;",
+    ]
+    statements = list(SqlStatementReader.split_statements(lines))
+    assert statements == ["select 1\nFROM t;", "select 2;", "select   3;"]
+
+
+def test_read_statements_zip(tmp_path):
+    path = os.path.join(tmp_path, "load.zip")
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("load.txt", "\n".join([VERTEX, VERTEX, EDGE]))
+    statements = list(SqlStatementReader.read_statements(path))
+    assert statements == [VERTEX, VERTEX, EDGE]
+    plain = os.path.join(tmp_path, "load.sql")
+    with open(plain, "wt") as f:
+        f.write(VERTEX + "\n" + EDGE + "\n")
+    assert list(SqlStatementReader.read_statements(plain)) == [VERTEX, EDGE]
+
+
+def test_phase():
+    assert (
+        SqlStatementReader.phase('SET search_path = ag_catalog, "$user";') == "session"
+    )
+    assert SqlStatementReader.phase("CREATE INDEX idx ON t (c);") == "ddl"
+    assert SqlStatementReader.phase(VERTEX) == "vertex"
+    assert SqlStatementReader.phase(EDGE) == "edge"
+    assert SqlStatementReader.phase("insert into t values (1);") == "vertex"
+    airline = "SELECT * FROM cypher('g', $$ CREATE (:Airline {name: 'Match Air'}) $$) as (v agtype);"
+    assert SqlStatementReader.phase(airline) == "vertex"
+    optional = "SELECT * FROM cypher('g', $tag$ OPTIONAL MATCH (a:Airport) RETURN a $tag$) as (a agtype);"
+    assert SqlStatementReader.phase(optional) == "edge"
+
+
+def test_labels():
+    assert SqlStatementReader.labels(VERTEX) == {("g", "Airport")}
+    assert SqlStatementReader.labels(EDGE) == {("g", "Airport"), ("g", "route")}
+    assert SqlStatementReader.labels("select 1;") == set()
+
+
+def test_local_session_statement():
+    assert (
+        SqlStatementReader.local_session_statement("set search_path = x;")
+        == "SET LOCAL search_path = x;"
+    )
+    assert (
+        SqlStatementReader.local_session_statement("SET LOCAL a = 1;")
+        == "SET LOCAL a = 1;"
+    )
+    assert SqlStatementReader.local_session_statement("LOAD 'age';") == "LOAD 'age';"
@@ -0,0 +1,64 @@
+import struct
+
+import pytest
+
+from psycopg.adapt import AdaptersMap, Transformer
+from psycopg.pq import Format
+
+from src.util.vector_adapter import Vector, VectorAdapter
+
+# pytest -v tests/test_vector_adapter.py
+
+
+class FakeContext:
+    def __init__(self):
+        self.adapters = AdaptersMap()
+        self.connection = None
+
+
+def test_binary_format():
+    data = VectorAdapter.to_binary([1.0, -2.5, 0.25])
+    assert len(data) == 4 + (3 * 4)
+    assert struct.unpack(">HH", data[0:4]) == (3, 0)
+    assert struct.unpack(">f", data[4:8]) == (1.0,)
+    assert VectorAdapter.from_binary(data) == [1.0, -2.5, 0.25]
+    assert VectorAdapter.from_binary(memoryview(data)) == [1.0, -2.5, 0.25]
+
+
+def test_binary_size_at_1536_dimensions():
+    embedding = [n / 1536.0 for n in range(1536)]
+    data = VectorAdapter.to_binary(embedding)
+    assert len(data) == 6148
+    assert len(data) < len(VectorAdapter.to_text(embedding)) / 2
+    decoded = VectorAdapter.from_binary(data)
+    assert len(decoded) == 1536
+    assert max([abs(a - b) for a, b in zip(embedding, decoded)]) < 1e-6
+
+
+def test_text_format():
+    assert VectorAdapter.to_text([1, 2.5]) == "[1.0,2.5]"
+    assert VectorAdapter.from_text("[1,2.5,-3]") == [1.0, 2.5, -3.0]
+    assert VectorAdapter.from_text(" [] ") == []
+    assert Vector("[0.5,0.25]").values == [0.5, 0.25]
+    assert len(Vector([1.0, 2.0])) == 2
+
+
+def test_register_oid():
+    ctx = FakeContext()
+    VectorAdapter.register_oid(ctx, 99999)
+    tx = Transformer(ctx)
+    vector = Vector([1.0, 2.0])
+
+    dumper = tx.get_dumper(vector, "b")
+    assert dumper.oid == 99999
+    assert dumper.format == Format.BINARY
+    assert dumper.dump(vector) == VectorAdapter.to_binary([1.0, 2.0])
+
+    dumper = tx.get_dumper(vector, "t")
+    assert dumper.oid == 99999
+    assert dumper.dump(vector) == b"[1.0,2.0]"
+
+    loader = tx.get_loader(99999, Format.BINARY)
+    assert loader.load(VectorAdapter.to_binary([3.0])) == [3.0]
+    loader = tx.get_loader(99999, Format.TEXT)
+    assert loader.load(b"[3,4]") == [3.0, 4.0]
@@ -0,0 +1,133 @@
+import pytest
+
+from src.util.vector_index import VectorIndex
+
+# pytest -v tests/test_vector_index.py
+
+
+def test_opclass_matches_operator():
+    for metric in ["l2", "ip", "cosine"]:
+        assert VectorIndex.metric_for_operator(VectorIndex.operator(metric)) == metric
+    assert VectorIndex.opclass("l2") == "vector_l2_ops"
+    assert VectorIndex.operator("l2") == "<->"
+    assert VectorIndex.opclass("cosine") == "vector_cosine_ops"
+    assert VectorIndex.metric_for_operator("<+>") is None
+
+
+def test_validate():
+    VectorIndex.validate("hnsw", "l2")
+    with pytest.raises(ValueError):
+        VectorIndex.validate("btree", "l2")
+    with pytest.raises(ValueError):
+        VectorIndex.validate("ivfflat", "hamming")
+
+
+def test_ivfflat_params():
+    assert VectorIndex.ivfflat_lists(0) == 1
+    assert VectorIndex.ivfflat_lists(10000) == 10
+    assert VectorIndex.ivfflat_lists(1000000) == 1000
+    assert VectorIndex.ivfflat_lists(4000000) == 2000
+    assert VectorIndex.ivfflat_probes(100) == 10
+    assert VectorIndex.ivfflat_probes(1) == 1
+
+
+def test_hnsw_params():
+    assert VectorIndex.hnsw_params(10000) == (16, 64)
+    assert VectorIndex.hnsw_params(500000) == (16, 128)
+    assert VectorIndex.hnsw_params(5000000) == (24, 200)
+    assert VectorIndex.hnsw_ef_search(10) == 40
+    assert VectorIndex.hnsw_ef_search(100) == 100
+
+
+def test_create_index_sql():
+    ddl = VectorIndex.create_index_sql("libraries", "embedding", "ivfflat", "l2", 10000)
+    assert (
+        ddl
+        == "CREATE INDEX idx_libraries_embedding_ivfflat_l2 ON libraries USING ivfflat (embedding vector_l2_ops) WITH (lists = 10);"
+    )
+    ddl = VectorIndex.create_index_sql(
+        "libraries", "embedding", "hnsw", "cosine", 10000
+    )
+    assert "USING hnsw (embedding vector_cosine_ops)" in ddl
+    assert "WITH (m = 16, ef_construction = 64)" in ddl
+
+
+def test_settings():
+    settings = VectorIndex.build_settings(10000, 1536, 4)
+    assert settings["maintenance_work_mem"] == "118MB"
+    assert settings["max_parallel_maintenance_workers"] == "4"
+    assert settings["statement_timeout"] == "0"
+    assert VectorIndex.maintenance_work_mem_mb(10, 1536) == 64
+    assert VectorIndex.maintenance_work_mem_mb(100000000, 1536) == 8192
+    assert VectorIndex.search_settings("ivfflat", 10000) == {"ivfflat.probes": "3"}
+    assert VectorIndex.search_settings("hnsw", 10000) == {"hnsw.ef_search": "40"}
+
+
+def test_explain_uses_index():
+    plan = [
+        "Limit  (cost=...)",
+        "  InitPlan 1 (returns $0)",
+        "    ->  Limit  (cost=...)",
+        "  ->  Index Scan using idx_libraries_embedding_hnsw_l2 on libraries",
+        "        Order By: (embedding <-> $0)",
+    ]
+    assert VectorIndex.explain_uses_index(plan, "idx_libraries_embedding_hnsw_l2")
+    assert not VectorIndex.explain_uses_index(plan, "idx_libraries_embedding_hnsw_ip")
+    assert not VectorIndex.explain_uses_index(["Seq Scan on libraries"], "idx")
+
+
+def test_method_of_indexdef():
+    indexdef = "CREATE INDEX idx ON public.libraries USING hnsw (embedding vector_l2_ops) WITH (m='16')"
+    assert VectorIndex.method_of_indexdef(indexdef) == "hnsw"
+    indexdef = (
+        "CREATE INDEX idx ON public.libraries USING ivfflat (embedding vector_l2_ops)"
+    )
+    assert VectorIndex.method_of_indexdef(indexdef) == "ivfflat"
+    indexdef = "CREATE UNIQUE INDEX libraries_pkey ON public.libraries USING btree (id)"
+    assert VectorIndex.method_of_indexdef(indexdef) is None
+    assert VectorIndex.search_param("hnsw") == "hnsw.ef_search"
+
+
+def test_is_vector_index_on():
+    indexdef = "CREATE INDEX idx_libraries_embedding_hnsw_cosine ON public.libraries USING hnsw (embedding vector_cosine_ops) WITH (m='16')"
+    assert VectorIndex.is_vector_index_on(indexdef, "embedding") == True
+    indexdef = "CREATE INDEX my_index ON public.libraries USING ivfflat (embedding vector_l2_ops) WITH (lists='100')"
+    assert VectorIndex.is_vector_index_on(indexdef, "embedding") == True
+    assert VectorIndex.is_vector_index_on(indexdef, "other") == False
+    indexdef = "CREATE UNIQUE INDEX libraries_pkey ON public.libraries USING btree (id)"
+    assert VectorIndex.is_vector_index_on(indexdef, "id") == False
+
+
+def test_lists_of_indexdef():
+    indexdef = "CREATE INDEX idx ON public.libraries USING ivfflat (embedding vector_l2_ops) WITH (lists='250')"
+    assert VectorIndex.lists_of_indexdef(indexdef) == 250
+    indexdef = "CREATE INDEX idx ON public.libraries USING ivfflat (embedding vector_l2_ops) WITH (lists = 10)"
+    assert VectorIndex.lists_of_indexdef(indexdef) == 10
+    indexdef = (
+        "CREATE INDEX idx ON public.libraries USING ivfflat (embedding vector_l2_ops)"
+    )
+    assert VectorIndex.lists_of_indexdef(indexdef) == 100
+
+
+def test_sweep_values():
+    assert VectorIndex.sweep_values("ivfflat", 10, 10) == [1, 2, 4, 8, 10]
+    assert VectorIndex.sweep_values("ivfflat", 1, 10) == [1]
+    assert VectorIndex.sweep_values("ivfflat", 100, 10) == [1, 2, 4, 8, 16, 32, 64, 100]
+    assert VectorIndex.sweep_values("hnsw", 10000, 10) == [
+        10,
+        20,
+        40,
+        80,
+        160,
+        320,
+        640,
+        1000,
+    ]
+    assert VectorIndex.sweep_values("hnsw", 10000, 100) == [100, 160, 320, 640, 1000]
+
+
+def test_recall_at_k():
+    assert VectorIndex.recall_at_k([1, 2, 3, 4], [1, 2, 3, 4], 4) == 1.0
+    assert VectorIndex.recall_at_k([1, 2, 3, 4], [4, 3, 9, 8], 4) == 0.5
+    assert VectorIndex.recall_at_k([1, 2, 3, 4], [1, 2, 9, 3], 2) == 1.0
+    assert VectorIndex.recall_at_k([], [1], 10) == 1.0
@@ -0,0 +1,161 @@
+import asyncio
+import pytest
+
+from contextlib import asynccontextmanager
+
+from src.services.db_service import DbService
+from src.services.vector_search_service import VectorSearchService
+
+# pytest -v tests/test_vector_search_service.py
+
+
+class FakeColumn:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeCursor:
+    def __init__(self, extversion, rows):
+        self.extversion = extversion
+        self.rows = rows
+        self.executed = list()
+        self.prepared = list()
+        self.description = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def execute(self, sql, params=None, prepare=None):
+        self.executed.append((sql, params))
+        self.prepared.append(prepare)
+        if "limit %(k)s" in sql:
+            self.description = [FakeColumn("name"), FakeColumn("distance")]
+
+    async def fetchone(self):
+        return (self.extversion,)
+
+    async def fetchall(self):
+        return self.rows
+
+
+class FakeTransaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self.fake_cursor = cursor
+
+    def transaction(self):
+        return FakeTransaction()
+
+    def cursor(self):
+        return self.fake_cursor
+
+
+def search(svc, cursor, monkeypatch, **kwargs):
+    @asynccontextmanager
+    async def fake_connection(timeout=None):
+        yield FakeConnection(cursor)
+
+    monkeypatch.setattr(DbService, "connection", fake_connection)
+    monkeypatch.setattr(VectorSearchService, "pgvector_version", None)
+    return asyncio.run(svc.search(**kwargs))
+
+
+def test_validation():
+    assert VectorSearchService(k=0).k == 1
+    assert VectorSearchService(k=5000).k == 1000
+    with pytest.raises(ValueError):
+        VectorSearchService(preset="fastest")
+    with pytest.raises(ValueError):
+        VectorSearchService(filter_strategy="postfilter")
+
+
+def test_parse_version():
+    assert VectorSearchService.parse_version("0.8.0") == (0, 8, 0)
+    assert VectorSearchService.parse_version("0.7") == (0, 7, 0)
+    assert VectorSearchService.parse_version("0.5.1-dev") == (0, 5, 1)
+    assert VectorSearchService.supports_iterative_scan((0, 8, 0))
+    assert not VectorSearchService.supports_iterative_scan((0, 7, 4))
+    assert not VectorSearchService.supports_iterative_scan(None)
+
+
+def test_strategy_and_settings():
+    svc = VectorSearchService(k=200, preset="balanced")
+    assert svc.strategy((0, 8, 0)) == "none"
+    assert svc.settings("none") == {"ivfflat.probes": "10", "hnsw.ef_search": "200"}
+
+    svc = VectorSearchService(libtype="pypi")
+    assert svc.strategy((0, 8, 0)) == "iterative"
+    assert svc.strategy((0, 7, 4)) == "prefilter"
+    settings = svc.settings("iterative")
+    assert settings["hnsw.iterative_scan"] == "relaxed_order"
+    assert settings["ivfflat.iterative_scan"] == "relaxed_order"
+
+    svc = VectorSearchService(libtype="pypi", filter_strategy="prefilter")
+    assert svc.strategy((0, 8, 0)) == "prefilter"
+    assert VectorSearchService(preset="exact").settings("none") == {
+        "enable_indexscan": "off"
+    }
+
+
+def test_search_sql():
+    svc = VectorSearchService(
+        libtype="pypi", license="MIT", min_release_count=5, max_release_count=50
+    )
+    where = svc.where_clause(None)
+    assert "libtype = %(libtype)s" in where
+    assert "license = %(license)s" in where
+    assert "release_count >= %(min_release_count)s" in where
+    assert "release_count <= %(max_release_count)s" in where
+
+    sql = svc.search_sql("prefilter")
+    assert sql.startswith("with candidates as materialized (select ")
+    assert "embedding <-> %(embedding)b as distance from candidates" in sql
+
+    sql = svc.search_sql("iterative")
+    assert sql.startswith("with results as materialized (select ")
+    assert sql.endswith("select * from results order by distance")
+
+    sql = VectorSearchService().search_sql("none", library="flask")
+    assert "name <> %(library)s" in sql
+    assert "(select embedding from libraries where name = %(library)s limit 1)" in sql
+    assert "%(embedding)b" not in sql
+
+
+def test_search(monkeypatch):
+    cursor = FakeCursor("0.8.0", [("flask", 0.1), ("django", 0.2)])
+    svc = VectorSearchService(k=2, preset="fast", libtype="pypi")
+    result = search(svc, cursor, monkeypatch, embedding=[0.5, 0.25])
+    assert result["strategy"] == "iterative"
+    assert result["rows"] == [
+        {"name": "flask", "distance": 0.1},
+        {"name": "django", "distance": 0.2},
+    ]
+    # the settings are local to the transaction of the search
+    set_configs = [e for e in cursor.executed if "set_config" in e[0]]
+    assert len(set_configs) == 4
+    for sql, params in set_configs:
+        assert sql == "SELECT set_config(%s, %s, true);"
+    sql, params = cursor.executed[-1]
+    assert params["k"] == 2
+    assert params["libtype"] == "pypi"
+    assert params["embedding"].values == [0.5, 0.25]
+    assert cursor.prepared[-1] is True
+
+
+def test_search_exact_is_not_prepared(monkeypatch):
+    cursor = FakeCursor("0.8.0", [("flask", 0.1)])
+    svc = VectorSearchService(k=1, preset="exact")
+    result = search(svc, cursor, monkeypatch, embedding=[0.5, 0.25])
+    assert result["settings"]["enable_indexscan"] == "off"
+    # the exact plan must not share the prepared statement of the presets
+    assert cursor.prepared[-1] is False
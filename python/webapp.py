@@ -11,12 +11,12 @@ import time
 import traceback
 import sys
 
-import psycopg
-import psycopg_pool
+from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
 
 from fastapi import FastAPI, Request, Response, Form, status
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
@@ -28,11 +28,21 @@ from starlette.middleware.sessions import SessionMiddleware
 from src.models.webservice_models import PingModel
 from src.models.webservice_models import LivenessModel
 from src.models.webservice_models import AiConvFeedbackModel
+from src.models.webservice_models import HybridSearchRequestModel
+from src.models.webservice_models import HybridSearchResponseModel
+from src.models.webservice_models import QueryStreamRequestModel
+from src.models.webservice_models import VectorSearchRequestModel
+from src.models.webservice_models import VectorSearchResponseModel
 
 # Services with Business Logic
-from src.services.ai_service import AiService
+from src.services.async_ai_service import AsyncAiService
 from src.services.config_service import ConfigService
+from src.services.db_service import DbService
+from src.services.embedding_cache import EmbeddingCache
+from src.services.hybrid_search_service import HybridSearchService
 from src.services.logging_level_service import LoggingLevelService
+from src.services.query_stream_service import QueryStreamService
+from src.services.vector_search_service import VectorSearchService
 from src.util.fs import FS
 from src.util.query_result_parser import QueryResultParser
 from src.util.sample_queries import SampleQueries
@@ -55,58 +65,22 @@ else:
         )
     )
 
-POOL = None
 
-
-def get_database_connection_string():
-    db = ConfigService.postgresql_database()
-    user = ConfigService.postgresql_user()
-    password = ConfigService.postgresql_password()
-    host = ConfigService.postgresql_server()
-    port = ConfigService.postgresql_port()
-    conn_str = "host={} port={} dbname={} user={} password={}".format(
-        host, port, db, user, password
-    )
-    logging.info(
-        "get_database_connection_string: {} password=<omitted>".format(
-            conn_str.split("password")[0]
-        )
-    )
-    return conn_str
-
-
-async def initialize_async_services():
-    global POOL
-    try:
-        conn_str = get_database_connection_string()
-        POOL = psycopg_pool.AsyncConnectionPool(conninfo=conn_str, open=False)
-        logging.info("initialze_pool, pool created: {}".format(POOL))
-        await POOL.open()
-        await POOL.check()
-        logging.info("initialize_async_services, POOL opened")
-    except Exception as e:
-        logging.error("initialize_async_services - exception: {}".format(str(e)))
-        logging.error(traceback.format_exc())
-
-
-event_loop = None
-try:
-    event_loop = asyncio.get_running_loop()
-except:
-    pass
-logging.error("event_loop: {}".format(event_loop))
-
-if event_loop is not None:
-    # this path is for running in a Docker container with uvicorn
-    logging.error("asyncio event_loop is not None")
-    task = asyncio.create_task(initialize_async_services())
-else:
-    # this path is for running as a Python script
-    logging.error("asyncio event_loop is None")
-    asyncio.run(initialize_async_services())
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Open the shared DbService connection pool and create the shared
+    AsyncAiService when the application starts, within the event loop
+    of the ASGI server, and close them on shutdown.
+    """
+    await DbService.initialize()
+    app.state.ai_svc = AsyncAiService()
+    yield
+    await app.state.ai_svc.close()
+    await DbService.close()
 
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 views = Jinja2Templates(directory="views")
 logging.error("webapp.py started")
@@ -142,6 +116,28 @@ async def get_liveness(req: Request, resp: Response) -> LivenessModel:
     return liveness_data
 
 
+@app.get("/pool_stats")
+async def get_pool_stats(req: Request):
+    """
+    Return the statistics of the shared DbService connection pool, such as
+    its size, the number of connections in use, the number of requests
+    waiting for a connection, and the connection checkout latency.
+    """
+    return DbService.get_stats()
+
+
+@app.get("/embedding_cache_stats")
+async def get_embedding_cache_stats(req: Request):
+    """
+    Return the hit, miss and eviction statistics of the shared
+    EmbeddingCache, or {"enabled": False} if the cache is disabled.
+    """
+    cache = EmbeddingCache.get_shared()
+    if cache is None:
+        return {"enabled": False}
+    return cache.get_stats()
+
+
 @app.get("/")
 async def get_home(req: Request):
     view_data = dict()
@@ -173,7 +169,6 @@ async def get_query_console(req: Request):
 
 @app.post("/query_console")
 async def post_query_console(req: Request):
-    global POOL
     form_data = await req.form()
     logging.info("/query_console form_data: {}".format(form_data))
     query_text = form_data.get("query_text").strip()
@@ -186,28 +181,18 @@ async def post_query_console(req: Request):
         result_objects = list()
         start_time = time.time()
         try:
-            conn_str = get_database_connection_string()
-            async with await psycopg.AsyncConnection.connect(
-                conn_str, autocommit=True
-            ) as conn:
+            # The pooled connections are already configured for Apache AGE
+            # (LOAD 'age' and search_path) by DbService#configure_connection,
+            # so the statement is executed exactly once.
+            async with DbService.connection() as conn:
                 async with conn.cursor() as cursor:
-                    await cursor.execute(
-                        'SET search_path = "$user", ag_catalog, public;'
-                    )
                     stmt = query_text.replace("\r\n", "")
                     logging.info("query_console - stmt: {}".format(stmt))
-
-                    # odd logic here to warmup the cursor to load the extension, set path, etc
-                    try:
-                        await cursor.execute(stmt)
-                    except Exception as e0:
-                        pass
-
                     await cursor.execute(stmt)
                     logging.info("query_console - stmt executed")
 
                     async for row in cursor:
-                        logging.info(
+                        logging.debug(
                             "row: {} {} {}".format(len(row), str(type(row)), row)
                         )
                         result_objects.append(qrp.parse(row))
@@ -233,6 +218,20 @@ async def post_query_console(req: Request):
     )
 
 
+@app.post("/query_stream")
+async def post_query_stream(req_model: QueryStreamRequestModel):
+    """
+    Execute the given query console statement and stream the parsed rows
+    as newline-delimited JSON, followed by a {"__summary": {...}} line.
+    The query_console.html page reads this stream incrementally.
+    """
+    logging.info("/query_stream query_text: {}".format(req_model.query_text))
+    svc = QueryStreamService(req_model.max_rows, req_model.max_bytes)
+    return StreamingResponse(
+        svc.stream(req_model.query_text), media_type="application/x-ndjson"
+    )
+
+
 def write_query_results_to_file(view_data, result_objects):
     """
     Write the query results to a JSON file for visual inspection.
@@ -286,14 +285,14 @@ async def post_vector_search_console(req: Request):
     view_data = vector_search_view_data(search_text)
     results_obj = dict()
 
-    # First, get the embedding - either from the DB or from the AI service
+    # First, get the embedding of the given text from the AI service,
+    # else search for the libraries similar to the given library name
     if search_text.startswith("text:"):
         text = search_text[5:]
         logging.info(f"post_vector_search_console; text: {text}")
         try:
             logging.info("vectorize: {}".format(text))
-            ai_svc = AiService()
-            ai_svc_resp = ai_svc.generate_embeddings(text)
+            ai_svc_resp = await req.app.state.ai_svc.agenerate_embeddings(text)
             embedding = ai_svc_resp.data[0].embedding
         except Exception as e:
             view_data["results_message"] = "Error calling the AiService: {}".format(
@@ -301,13 +300,40 @@ async def post_vector_search_console(req: Request):
             )
             logging.critical((str(e)))
             logging.exception(e, stack_info=True, exc_info=True)
+        # Next, execute the vector search vs the DB using the embedding
+        if embedding is not None:
+            view_data["embedding_message"] = "Embedding, {} dimensions:".format(
+                len(embedding)
+            )
+            view_data["embedding"] = json.dumps(embedding, sort_keys=False, indent=2)
+            results_list = await execute_vector_search(embedding)
+            view_data["results_message"] = "Vector Search Results, {} rows:".format(
+                len(results_list)
+            )
+            view_data["results"] = json.dumps(results_list, sort_keys=False, indent=2)
+        else:
+            view_data["embedding_message"] = "No embedding found or created"
+            view_data["embedding"] = ""
+            view_data["results"] = ""
     else:
-        # Lookup the given library in the libraries table, and get its embedding
+        # Search for the libraries similar to the given library in a single
+        # statement; its embedding is read by PostgreSQL, not by this app.
         try:
             words = search_text.strip().split()
             if len(words) > 0:
                 libname = words[0]
-                embedding = await lookup_library_embedding(libname)
+                results_list = await execute_similar_libraries_search(libname)
+                view_data["results_message"] = (
+                    "Libraries Similar to {}, {} rows:".format(
+                        libname, len(results_list)
+                    )
+                )
+                view_data["results"] = json.dumps(
+                    results_list, sort_keys=False, indent=2
+                )
+                view_data["embedding_message"] = (
+                    "The embedding of {} is read within the database".format(libname)
+                )
         except Exception as e:
             view_data["results_message"] = "Error reading the database; {}".format(
                 str(e)
@@ -315,22 +341,6 @@ async def post_vector_search_console(req: Request):
             logging.critical((str(e)))
             logging.exception(e, stack_info=True, exc_info=True)
 
-    # Next, execute the vector search vs the DB using the embedding
-    if embedding is not None:
-        view_data["embedding_message"] = "Embedding, {} dimensions:".format(
-            len(embedding)
-        )
-        view_data["embedding"] = json.dumps(embedding, sort_keys=False, indent=2)
-        results_list = await execute_vector_search(embedding)
-        view_data["results_message"] = "Vector Search Results, {} rows:".format(
-            len(results_list)
-        )
-        view_data["results"] = json.dumps(results_list, sort_keys=False, indent=2)
-    else:
-        view_data["embedding_message"] = "No embedding found or created"
-        view_data["embedding"] = ""
-        view_data["results"] = ""
-
     return views.TemplateResponse(
         request=req, name="vector_search_console.html", context=view_data
     )
@@ -347,67 +357,105 @@ def vector_search_view_data(search_text="flask"):
     return view_data
 
 
-async def lookup_library_embedding(libname) -> list[float] | None:
-    """Lookup the given library in the libraries table, and get its embedding."""
-    embedding = None
+async def execute_vector_search(embedding, limit=10) -> list:
+    """Execute a vector search with the given embedding value."""
+    result_list = list()
     try:
-        conn_str = get_database_connection_string()
-        async with await psycopg.AsyncConnection.connect(
-            conn_str, autocommit=True
-        ) as conn:
-            async with conn.cursor() as cursor:
-                sql = "select id, embedding from libraries where name = '{}' offset 0 limit 1".format(
-                    libname
-                )
-                await cursor.execute(sql)
-                async for row in cursor:
-                    embedding = json.loads(
-                        row[1]
-                    )  # column 0 is the id, column 1 is the embedding
-                    logging.info(
-                        "lookup_library_embedding; embedding: {}".format(
-                            str(type(embedding))
-                        )
-                    )
+        svc = VectorSearchService(k=limit)
+        result = await svc.search(embedding=embedding)
+        for row in result["rows"]:
+            result_list.append([row["name"], row["keywords"], row["description"]])
     except Exception as e:
         logging.critical((str(e)))
         logging.exception(e, stack_info=True, exc_info=True)
-    return embedding
-
-
-def libraries_vector_search_sql(embeddings, limit=10):
-    return (
-        """
-select name, keywords, description
- from libraries
- order by embedding <-> '{}'
- offset 0 limit 10;
-    """.format(
-            embeddings
-        )
-        .replace("\n", " ")
-        .strip()
-    )
+    return result_list
 
 
-async def execute_vector_search(embedding) -> list:
-    """Execute a vector search with the given embedding value."""
+async def execute_similar_libraries_search(libname, limit=10) -> list:
+    """Execute a single-statement vector search for libraries similar to libname."""
     result_list = list()
+    svc = VectorSearchService(k=limit)
+    result = await svc.search(library=libname)
+    for row in result["rows"]:
+        result_list.append([row["name"], row["keywords"], row["description"]])
+    return result_list
+
+
+@app.post("/vector_search", response_model=VectorSearchResponseModel)
+async def post_vector_search(req: Request, req_model: VectorSearchRequestModel):
+    """
+    Execute a vector search of the libraries table for the embedding of the
+    given text, or for the libraries similar to the given library, with the
+    given k, recall/latency preset (fast, balanced, accurate or exact) and
+    optional libtype, license and release_count range filters.
+    """
+    resp_obj = dict()
+    resp_obj["k"] = req_model.k
+    resp_obj["preset"] = req_model.preset
+    resp_obj["filters"] = dict()
+    resp_obj["strategy"] = ""
+    resp_obj["settings"] = dict()
+    resp_obj["rows"] = list()
+    resp_obj["elapsed"] = 0.0
+    resp_obj["error"] = None
     try:
-        conn_str = get_database_connection_string()
-        sql = libraries_vector_search_sql(embedding)
-        # async with POOL.connection() as conn:
-        async with await psycopg.AsyncConnection.connect(
-            conn_str, autocommit=True
-        ) as conn:
-            async with conn.cursor() as cursor:
-                await cursor.execute(sql)
-                async for row in cursor:
-                    result_list.append(row)
+        svc = VectorSearchService(
+            k=req_model.k,
+            preset=req_model.preset,
+            libtype=req_model.libtype,
+            license=req_model.license,
+            min_release_count=req_model.min_release_count,
+            max_release_count=req_model.max_release_count,
+            filter_strategy=req_model.filter_strategy,
+        )
+        if req_model.library is not None:
+            resp_obj = await svc.search(library=req_model.library)
+        elif req_model.text is not None:
+            ai_svc_resp = await req.app.state.ai_svc.agenerate_embeddings(
+                req_model.text
+            )
+            if ai_svc_resp is None:
+                resp_obj["error"] = "unable to generate the embedding of the text"
+            else:
+                resp_obj = await svc.search(embedding=ai_svc_resp.data[0].embedding)
+        else:
+            resp_obj["error"] = "either text or library is required"
     except Exception as e:
         logging.critical((str(e)))
         logging.exception(e, stack_info=True, exc_info=True)
-    return result_list
+        resp_obj["error"] = str(e)
+    return resp_obj
+
+
+@app.post("/hybrid_search", response_model=HybridSearchResponseModel)
+async def post_hybrid_search(req: Request, req_model: HybridSearchRequestModel):
+    """
+    Execute a hybrid full-text and vector search of the libraries table,
+    fused with Reciprocal Rank Fusion.  The mode is auto (the default),
+    hybrid, keyword, or vector; the keyword mode, and the auto mode for
+    package-name-like text, don't call Azure OpenAI for an embedding.
+    """
+    resp_obj = dict()
+    resp_obj["text"] = req_model.text
+    resp_obj["k"] = req_model.k
+    resp_obj["mode"] = req_model.mode
+    resp_obj["counts"] = dict()
+    resp_obj["rows"] = list()
+    resp_obj["elapsed"] = 0.0
+    resp_obj["error"] = None
+    try:
+        svc = HybridSearchService(
+            req.app.state.ai_svc,
+            k=req_model.k,
+            mode=req_model.mode,
+            preset=req_model.preset,
+        )
+        resp_obj = await svc.search(req_model.text)
+    except Exception as e:
+        logging.critical((str(e)))
+        logging.exception(e, stack_info=True, exc_info=True)
+        resp_obj["error"] = str(e)
+    return resp_obj
 
 
 # ---
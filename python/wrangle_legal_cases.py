@@ -8,8 +8,14 @@ Usage:
     python wrangle_legal_cases.py step1_scan_sqlfile_for_citations /Users/cjoakim/Downloads/cases.sql
     python wrangle_legal_cases.py step2_link_cases_from_seeds <iterations>
     python wrangle_legal_cases.py step2_link_cases_from_seeds 10
-    python wrangle_legal_cases.py step3_extract_subset_from_sqlfile <cases-sql-infile> <iteration-infile>
-    python wrangle_legal_cases.py step3_extract_subset_from_sqlfile /Users/cjoakim/Downloads/cases.sql tmp/iteration_5.json
+    python wrangle_legal_cases.py step2_link_cases_from_seeds <iterations> <max-nodes> <max-fanout>
+    python wrangle_legal_cases.py step2_link_cases_from_seeds 10 5000
+    python wrangle_legal_cases.py step2_link_cases_from_seeds 10 5000 50
+    python wrangle_legal_cases.py step3_extract_subset_from_sqlfile <cases-sql-infile> <iteration-store>
+    python wrangle_legal_cases.py step3_extract_subset_from_sqlfile /Users/cjoakim/Downloads/cases.sql tmp/iteration_5
+    python wrangle_legal_cases.py export_case_store_json
+    python wrangle_legal_cases.py export_iteration_json <iteration-store>
+    python wrangle_legal_cases.py export_iteration_json tmp/iteration_5
     python wrangle_legal_cases.py step4_create_cypher_load_file TODO
 Options:
   -h --help     Show this screen.
@@ -24,6 +30,7 @@ import sys
 import time
 import traceback
 
+import numpy as np
 import psycopg_pool
 
 from docopt import docopt
@@ -33,9 +40,17 @@ from src.services.ai_service import AiService
 from src.services.config_service import ConfigService
 from src.services.logging_level_service import LoggingLevelService
 
-from src.util.cite_parser import CiteParser
+from src.util.case_file_index import CaseFileIndex
+from src.util.case_file_scanner import CaseFileScanner
+from src.util.case_store import ITERATION_DIRECTORY, CaseStore
+from src.util.citation_graph import CitationGraph
+from src.util.columnar_store import ColumnarStore
 from src.util.fs import FS
 
+# step 1 parses the JSON of the data lines before line 999999 only; the
+# remaining lines are counted and indexed for step 3, but not parsed
+STEP1_MAX_DATA_LINES = 999998
+
 logging.basicConfig(
     format="%(asctime)s - %(message)s", level=LoggingLevelService.get_level()
 )
@@ -54,13 +69,13 @@ def print_options(msg):
 def step1_scan_sqlfile_for_citations(cases_sql_infile: str):
     """
     Read the cases.sql file, parse the JSON in each line, and calculate
-    each case url and its citations.
+    each case url and its citations.  The file is scanned in parallel
+    byte ranges by class CaseFileScanner.  Only the first
+    STEP1_MAX_DATA_LINES data lines are parsed.
     """
     print(
         "step1_scan_sqlfile_for_citations, reading infile: {}".format(cases_sql_infile)
     )
-    data_lines_read, json_parse_ok, json_parse_fail = 0, 0, 0
-    case_id_name_dict = dict()  # key is the case id, value is the case name
     seeds = initial_seeds()
     start_time = time.time()
 
@@ -69,74 +84,40 @@ def step1_scan_sqlfile_for_citations(cases_sql_infile: str):
         return
     print("seeds: {} {}".format(len(seeds), sorted(seeds.keys())))
 
-    with open(
-        cases_sql_infile, "r", encoding="ISO-8859-1"
-    ) as file:  # cp1252 is the default encoding for Windows.  ISO-8859-1
-        for line in file:
-            stripped = line.strip()
-            if len(stripped) > 10:
-                tokens = stripped.split("\t")
-                if len(tokens) == 3:
-                    try:
-                        data_lines_read = data_lines_read + 1
-                        if data_lines_read < 999999:
-                            if data_lines_read % 1000 == 0:
-                                print("data lines read: {}".format(data_lines_read))
-                            id, json_str, embeddings = (
-                                tokens[0].strip(),
-                                tokens[1].strip(),
-                                tokens[2].strip(),
-                            )
-                            try:
-                                case_doc = json.loads(json_str)
-                                json_parse_ok = json_parse_ok + 1
-                                id = str(case_doc["id"])
-                                calculate_url(case_doc)
-                                collect_cites_to(case_doc)
-                                metadata = dict()
-                                metadata["id"] = id
-                                metadata["name_abbreviation"] = case_doc[
-                                    "name_abbreviation"
-                                ]
-                                metadata["__case_url"] = case_doc["__case_url"]
-                                metadata["__citations"] = case_doc["__citations"]
-                                case_id_name_dict[id] = metadata
-                                # Write the original seed documents to better understand the data
-                                if id in seeds.keys():
-                                    outfile = "tmp/{}.json".format(id)
-                                    FS.write_json(case_doc, outfile)
-                            except Exception as jpe:
-                                json_parse_fail = json_parse_fail + 1
-                    except Exception as e:
-                        print("Exception: {}".format(e))
-                        print(traceback.format_exc())
-                        print(
-                            "Exception line {} {} tokens: {} prefix: |{}|".format(
-                                data_lines_read,
-                                len(stripped),
-                                len(tokens),
-                                stripped[0:40],
-                            )
-                        )
+    scanner = CaseFileScanner()
+    scan_results = scanner.scan(cases_sql_infile, seeds.keys(), STEP1_MAX_DATA_LINES)
+    data_lines_read = scan_results["data_lines_read"]
+    json_parse_ok = scan_results["json_parse_ok"]
+    json_parse_fail = scan_results["json_parse_fail"]
+    case_id_name_dict = scan_results["cases"]
+    # Write the original seed documents to better understand the data
+    for id, case_doc in scan_results["seed_docs"].items():
+        FS.write_json(case_doc, "tmp/{}.json".format(id))
 
     elapsed_time = time.time() - start_time
     print("data lines read: {}".format(data_lines_read))
+    if data_lines_read > STEP1_MAX_DATA_LINES:
+        print(
+            "data lines not parsed: {}, past STEP1_MAX_DATA_LINES: {}".format(
+                data_lines_read - STEP1_MAX_DATA_LINES, STEP1_MAX_DATA_LINES
+            )
+        )
     print("elapsed time: {} seconds".format(elapsed_time))
+    print("scanner workers: {}".format(scanner.workers))
     print(
         "json_parse_ok: {} json_parse_fail: {}".format(json_parse_ok, json_parse_fail)
     )
 
-    FS.write_json(case_id_name_dict, "tmp/case_id_name_dict.json")
-    print("case_id_name_dict size: {}".format(len(case_id_name_dict.keys())))
+    index_file = CaseFileIndex.index_file(cases_sql_infile)
+    CaseFileIndex.save(scan_results["index"], index_file)
+    print("index_file: {} entries: {}".format(index_file, len(scan_results["index"])))
 
-    # flip the above case_id_name_dict to use the '__case_url' as the key
-    case_url_dict = dict()
-    for id in case_id_name_dict.keys():
-        metadata = case_id_name_dict[id]
-        case_url = metadata["__case_url"]
-        case_url_dict[case_url] = metadata
-    FS.write_json(case_url_dict, "tmp/case_url_dict.json")
-    print("case_url_dict size: {}".format(len(case_url_dict.keys())))
+    case_store = CaseStore.write(case_id_name_dict)
+    print(
+        "case_store: {} rows: {}".format(
+            case_store.store.directory, case_store.row_count()
+        )
+    )
 
 
 def initial_seeds():
@@ -157,122 +138,106 @@ def calculate_url(case_doc):
     https://static.case.law/wash/184/cases/0560-01.json
     Populate the '__case_url' in the given case_doc.
     """
-    try:
-        url_key = "__case_url"
-        case_doc[url_key] = "?"
-        if "file_name" in case_doc.keys():  # this is expected
-            file_name = case_doc["file_name"].strip()
-            if "citations" in case_doc.keys():
-                cite = case_doc["citations"][0]["cite"]
-                cite_parser = CiteParser()
-                url = cite_parser.parse(cite, file_name)
-                if url is not None:
-                    case_doc[url_key] = url
-    except Exception as e:
-        pass
+    case_doc["__case_url"] = CaseFileScanner.case_url(case_doc)
 
 
 def collect_cites_to(case_doc):
-    citations = list()
-    citations_key = "__citations"
-    case_doc[citations_key] = citations
-    cite_parser = CiteParser()
+    case_doc["__citations"] = CaseFileScanner.cited_urls(case_doc)
+
+
+def step2_link_cases_from_seeds(
+    iteration_count: int, max_nodes: int | None = None, max_fanout: int | None = None
+):
+    """
+    Collect the cases linked to the seed cases by their citations, with a
+    breadth-first search of class CitationGraph.  Write the case rows within
+    n + 1 hops of the seeds to the tmp/iteration_<n> store for each
+    iteration n; see export_iteration_json.
+    """
+    print(
+        "step2_link_cases_from_seeds, iteration_count: {} max_nodes: {} max_fanout: {}".format(
+            iteration_count, max_nodes, max_fanout
+        )
+    )
+    start_time = time.time()
+    case_store = CaseStore()
+    graph = CitationGraph.from_case_store(case_store)
+    print(
+        "citation graph nodes: {} edges: {} loaded in {} seconds".format(
+            graph.node_count(), graph.edge_count(), time.time() - start_time
+        )
+    )
+    seeds = list(initial_seeds().keys())
+    seed_rows = case_store.find_rows(seeds)
+    print("seeds: {} found: {}".format(len(seeds), len(seed_rows)))
+    nodes, depths = graph.expand(seed_rows, iteration_count, max_nodes, max_fanout)
+    print("expanded in {} seconds".format(time.time() - start_time))
+
+    # the seeds use their own metadata, even if other cases have their url
+    node_rows = graph.node_rows[nodes]
+    node_rows[depths == 0] = seed_rows_by_node(graph, seed_rows, nodes[depths == 0])
+    for n in range(iteration_count):
+        count = int(np.searchsorted(depths, n + 1, side="right"))  # in depth order
+        CaseStore.write_iteration(
+            ITERATION_DIRECTORY.format(n),
+            node_rows[:count],
+            depths[:count],
+            depths[:count] <= n,
+        )
+        print("iteration {} collected cases count: {}".format(n, count))
 
-    try:
-        for citation in case_doc["cites_to"]:
-            cite = citation["cite"]
-            url = cite_parser.parse(cite, None)
-            if url is not None:
-                citations.append(url)
-    except Exception as e:
-        pass
 
+def seed_rows_by_node(graph: CitationGraph, seed_rows: list[int], seed_nodes):
+    """Return the case row of each of the given seed nodes; the last seed of a url wins."""
+    rows = dict()
+    for row in seed_rows:
+        rows[int(graph.url_codes[row])] = row
+    return [rows[int(node)] for node in seed_nodes]
 
-def step2_link_cases_from_seeds(iteration_count: int):
-    print("step2_link_cases_from_seeds, iteration_count: {}".format(iteration_count))
 
-    case_id_name_dict = FS.read_json("tmp/case_id_name_dict.json")
-    case_url_dict = FS.read_json("tmp/case_url_dict.json")
-    collected_metadata = dict()  # key is the case url, value is the metadata
+def export_case_store_json():
+    """Export the step 1 case store to JSON files for inspection."""
+    CaseStore().export_json("tmp")
 
-    for n in range(iteration_count):
-        print("iteration: {}".format(n))
-        if n == 0:
-            seeds = initial_seeds()
-            for seed in seeds:
-                print("seed: {}".format(seed))
-                if seed in case_id_name_dict.keys():
-                    meta = case_id_name_dict[seed]
-                    meta["iteration"] = n
-                    meta["citations_gathered"] = 1
-                    url = meta["__case_url"]
-                    collected_metadata[url] = meta
-                    for url in meta["__citations"]:
-                        if url not in collected_metadata.keys():
-                            if url in case_url_dict.keys():
-                                citation_meta = case_url_dict[url]
-                                citation_meta["iteration"] = n + 1
-                                citation_meta["citations_gathered"] = (
-                                    0  # not yet gathered
-                                )
-                                collected_metadata[url] = citation_meta
-        else:
-            metadata_keys = collected_metadata.keys()
-            print(
-                "iteration {} collected_metadata keys count: {}".format(
-                    n, len(metadata_keys)
-                )
-            )
-            for collected_url in sorted(metadata_keys):
-                if collected_url in case_url_dict.keys():
-                    meta = case_url_dict[collected_url]
-                    if "citations_gathered" in meta.keys():
-                        if meta["citations_gathered"] == 1:
-                            pass  # already gathered its' cites_to citations
-                        else:
-                            # print("collected_url: {}".format(collected_url))
-                            for cite_url in meta["__citations"]:
-                                if cite_url not in collected_metadata.keys():
-                                    if cite_url in case_url_dict.keys():
-                                        citation_meta = case_url_dict[cite_url]
-                                        citation_meta["iteration"] = n + 1
-                                        citation_meta["citations_gathered"] = 0
-                                        collected_metadata[cite_url] = citation_meta
-                            meta["citations_gathered"] == 1
-        FS.write_json(collected_metadata, "tmp/iteration_{}.json".format(n))
-
-
-def step3_extract_subset_from_sqlfile(cases_sql_infile: str, iteration_infile: str):
+
+def export_iteration_json(iteration_store: str):
+    """Export the given step 2 iteration store to a JSON file for inspection."""
+    print("file written: {}".format(CaseStore().export_iteration_json(iteration_store)))
+
+
+def step3_extract_subset_from_sqlfile(cases_sql_infile: str, iteration_store: str):
     print(
-        "step3_extract_subset_from_sqlfile, reading iteration_infile: {}".format(
-            iteration_infile
+        "step3_extract_subset_from_sqlfile, reading iteration_store: {}".format(
+            iteration_store
         )
     )
-    collected_metadata = FS.read_json(iteration_infile)
-    collected_ids = dict()
-    output_lines = list()
-
-    for url in collected_metadata.keys():
-        meta = collected_metadata[url]
-        id = meta["id"]
-        collected_ids[id] = id
-        print("adding id: {}".format(id))
+    rows = ColumnarStore(iteration_store).array("row")
+    collected_ids = CaseStore().case_ids(rows)
 
-    print("collected_ids size: {}".format(len(collected_ids.keys())))
+    print("collected_ids size: {}".format(len(collected_ids)))
 
-    with open(cases_sql_infile, "r", encoding="ISO-8859-1") as file:
-        for line in file:
-            stripped = line.strip()
-            if len(stripped) > 10:
-                tokens = stripped.split("\t")
-                if len(tokens) == 3:
-                    id = tokens[0].strip()
-                    if id in collected_ids.keys():
-                        print("match on id: {}".format(id))
-                        output_lines.append(stripped)
-
-    FS.write_lines(output_lines, "tmp/filtered_cases.sql")
-    print("output_lines size: {}".format(len(output_lines)))
+    # read only the collected cases, located with the step 1 index
+    start_time = time.time()
+    index_file = CaseFileIndex.index_file(cases_sql_infile)
+    if os.path.isfile(index_file):
+        index = CaseFileIndex.load(index_file)
+    else:
+        print("index_file {} not found; indexing the infile".format(index_file))
+        index = CaseFileScanner().index(cases_sql_infile)
+        CaseFileIndex.save(index, index_file)
+    records = CaseFileIndex.lookup(index, collected_ids)
+    print("indexed ids: {}".format(len(records)))
+
+    outfile = "tmp/filtered_cases.sql"
+    output_lines_count = 0
+    with open(outfile, "wb") as out:
+        for line in CaseFileIndex.read_records(cases_sql_infile, records):
+            out.write(line)
+            out.write(b"\n")
+            output_lines_count = output_lines_count + 1
+    print("file written: {}".format(outfile))
+    print("output_lines size: {}".format(output_lines_count))
+    print("elapsed time: {} seconds".format(time.time() - start_time))
 
 
 def step4_create_cypher_load_file():
@@ -299,11 +264,20 @@ if __name__ == "__main__":
                 step1_scan_sqlfile_for_citations(cases_sql_infile)
             elif func == "step2_link_cases_from_seeds":
                 iteration_count = int(sys.argv[2])
-                step2_link_cases_from_seeds(iteration_count)
+                max_nodes, max_fanout = None, None
+                if len(sys.argv) > 3:
+                    max_nodes = int(sys.argv[3])
+                if len(sys.argv) > 4:
+                    max_fanout = int(sys.argv[4])
+                step2_link_cases_from_seeds(iteration_count, max_nodes, max_fanout)
             elif func == "step3_extract_subset_from_sqlfile":
                 cases_sql_infile = sys.argv[2]
-                iteration_infile = sys.argv[3]
-                step3_extract_subset_from_sqlfile(cases_sql_infile, iteration_infile)
+                iteration_store = sys.argv[3]
+                step3_extract_subset_from_sqlfile(cases_sql_infile, iteration_store)
+            elif func == "export_case_store_json":
+                export_case_store_json()
+            elif func == "export_iteration_json":
+                export_iteration_json(sys.argv[2])
             elif func == "step4_create_cypher_load_file":
                 step4_create_cypher_load_file()
             else: